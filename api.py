@@ -0,0 +1,290 @@
+# api.py
+# Headless HTTP API next to the Streamlit UI: kiosks and batch jobs submit trial results
+# and get back scores and normative percentiles, logged exactly as the tabs log them.
+#
+# Usage: python api.py [--host 127.0.0.1] [--port 8502] [--root .]
+#
+#   GET  /health                                  log writer metrics
+#   GET  /percentile?snr=-7.5&age=45&language=en  normative percentile and z-score
+#   GET  /summary?patient=Jane%20Doe              materialized patient summary
+#   POST /diagnosis   {"patient", "trials": [[target, response, snr], ...], "snr"?, "age"?, "language"?, "subjective"?}
+#   POST /fitting     {"patient", "mode", "environment", "snr" | "trials": [[snr, correct], ...], "subjective"?}
+#   POST /monitoring  {"patient", "checkin_type", "answers": {...}}
+#
+# Without an "snr", Diagnosis and Fitting runs are scored by a psychometric fit to their
+# trials (returned under "fit", with 95% intervals), warm-started from the patient's last one.
+#
+# One asyncio event loop serves every connection. Requests are dispatched on the loop's
+# default thread pool, since scoring may fit a psychometric curve and reads profiles,
+# summaries and new Diagnosis records from disk; saving only queues the record for the
+# background log writer.
+import argparse
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import scoring
+from logwriter import BatchedLogWriter
+from normative import NormativeEngine
+from normdb import NormativeDB
+from profilestore import ProfileStore
+from recordstore import RecordStore
+from summaryview import SummaryView
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class NotFound(Exception):
+    pass
+
+
+class ScoringAPI:
+    """
+    Routes requests to the scoring core. dispatch() is plain synchronous code,
+    so it can be called directly; the HTTP server runs it on worker threads.
+    """
+
+    def __init__(self, engine, writer, profiles=None, summaries=None):
+        self.engine = engine
+        self.writer = writer
+        self.profiles = profiles
+        self.summaries = summaries
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/percentile"): self.percentile,
+            ("GET", "/summary"): self.summary,
+            ("POST", "/diagnosis"): self.diagnosis,
+            ("POST", "/fitting"): self.fitting,
+            ("POST", "/monitoring"): self.monitoring,
+        }
+
+    def dispatch(self, method, target, body=None):
+        """Returns (status, payload) for one request."""
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path.rstrip("/") or "/"))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                return 405, {"error": f"{method} is not supported on {url.path}"}
+            return 404, {"error": f"No such endpoint: {url.path}"}
+        try:
+            if method == "POST":
+                if not isinstance(body, dict):
+                    raise ValueError("The request body must be a JSON object.")
+                return 200, handler(body)
+            return 200, handler({k: v[-1] for k, v in parse_qs(url.query).items()})
+        except NotFound as exc:
+            return 404, {"error": str(exc)}
+        except (ValueError, KeyError, TypeError) as exc:
+            return 400, {"error": str(exc)}
+
+    # --- Helpers ---
+    def _group(self, fields):
+        """Normative group from the request, falling back to the patient's saved profile."""
+        age, language = fields.get("age"), fields.get("language")
+        if (age is None or language is None) and self.profiles and fields.get("patient"):
+            profile = self.profiles.load(fields["patient"]) or {}
+            age = profile.get("age") if age is None else age
+            language = profile.get("primary_language") if language is None else language
+        self.engine.refresh()
+        return self.engine.group_for(None if age in (None, "") else float(age), language)
+
+    def _previous_fit(self, patient, condition=None):
+        """The patient's last saved Diagnosis fit (or Fitting fit of ``condition``), to warm-start from."""
+        summary = self.summaries.load(patient) if self.summaries else None
+        if not summary:
+            return None
+        if condition is None:
+            return (summary["diagnosis"]["latest"] or {}).get("fit")
+        return summary["fitting"]["conditions"].get(condition, {}).get("fit")
+
+    @staticmethod
+    def _patient(body):
+        patient = str(body.get("patient") or "").strip()
+        if not patient:
+            raise ValueError("A patient name is required.")
+        return patient
+
+    # --- Endpoints ---
+    def health(self, query):
+        return {"status": "ok", "log_writer": self.writer.metrics()}
+
+    def percentile(self, query):
+        if "snr" not in query:
+            raise ValueError("Missing query parameter: snr")
+        snr = float(query["snr"])
+        group = self._group(query)
+        curve = self.engine.curve(group)
+        return {"snr": snr, "group": list(group), "percentile": round(float(curve.percentile(snr)), 1),
+                "z_score": round(float(curve.z_score(snr)), 2)}
+
+    def summary(self, query):
+        if self.summaries is None:
+            raise ValueError("Summaries are not enabled on this server.")
+        summary = self.summaries.load(self._patient(query))
+        if summary is None:
+            raise NotFound(f"No saved records for {query['patient']!r}")
+        return summary
+
+    def diagnosis(self, body):
+        patient = self._patient(body)
+        result = scoring.score_diagnosis(self.engine, self._group(body), body.get("trials"), body.get("snr"),
+                                         previous=self._previous_fit(patient))
+        self.writer.submit("diagnosis", scoring.diagnosis_record(result, patient, body.get("subjective")))
+        return result
+
+    def fitting(self, body):
+        patient = self._patient(body)
+        mode, environment = body.get("mode"), body.get("environment")
+        condition = scoring.condition_key(mode, environment)
+        snr, fit = body.get("snr"), None
+        if snr is None:
+            if not body.get("trials"):
+                raise ValueError("Give either an snr or the trials ([snr, correct] each) of the run.")
+            fit = scoring.score_fitting(body["trials"], self._previous_fit(patient, condition))
+            snr = fit["snr50"]
+        record = scoring.fitting_record(patient, mode, environment, float(snr), body.get("subjective"), fit)
+        self.writer.submit("fitting", record)
+        return dict(record, condition=condition)
+
+    def monitoring(self, body):
+        record = scoring.checkin_record(self._patient(body), body.get("checkin_type"), body.get("answers") or {})
+        self.writer.submit("monitoring", record)
+        return record
+
+    # --- HTTP ---
+    async def handle(self, reader, writer):
+        """Serves one connection, keeping it open between requests (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "Request body too large."}
+                    await self._respond(writer, status, payload, keep_alive=False)
+                    break
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    status, payload = 400, {"error": "The request body is not valid JSON."}
+                else:
+                    try:
+                        status, payload = await asyncio.to_thread(self.dispatch, method, target, body)
+                    except Exception:
+                        logger.exception("Unhandled error in %s %s", method, target)
+                        status, payload = 500, {"error": "Internal error."}
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8502):
+        """Starts listening and returns the asyncio server."""
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+
+def create_api(root="."):
+    """A ScoringAPI writing to the same logs, profiles and summaries as a UI started in ``root``."""
+    store = RecordStore(root)
+    writer = BatchedLogWriter(store)
+    view = SummaryView(store, os.path.join(root, "summaries"))
+    profiles = ProfileStore(os.path.join(root, "profiles"))
+    db = NormativeDB(store.data_path("diagnosis"), profiles)
+    if not os.path.exists(db.checkpoint):
+        db.build(workers=1)  # no process pool inside the threaded server
+    return ScoringAPI(NormativeEngine(db=db), writer, profiles, view)
+
+
+# --- Local client ---
+class Client:
+    """Minimal keep-alive client for the API, for scripts and benchmarks."""
+
+    def __init__(self, host="127.0.0.1", port=8502):
+        self.host = host
+        self.port = port
+        self._reader = self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """Sends one request and returns (status, decoded JSON body)."""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self._writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ULIPlus headless scoring API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--root", default=".", help="Directory holding the logs and profiles")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        api = create_api(args.root)
+        server = await api.serve(args.host, args.port)
+        logger.info("Scoring API listening on http://%s:%d", args.host, args.port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            api.writer.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
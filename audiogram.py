@@ -0,0 +1,244 @@
+# audiogram.py
+# Columnar audiogram dataset (one row per patient-ear, one column per frequency) and
+# vectorized population analytics over it.
+import json
+import os
+import warnings
+
+import numpy as np
+
+from logsegments import read_log
+
+FREQUENCIES = [250, 500, 1000, 2000, 4000, 8000]
+FREQ_LABELS = [f"{f} Hz" for f in FREQUENCIES]   # keys used by the Profile tab
+EARS = ["Left", "Right"]
+
+# Four-frequency pure-tone average
+PTA_FREQUENCIES = [500, 1000, 2000, 4000]
+
+# Degree of loss from the better-hearing PTA (WHO 2021 grades): lower bound (dB HL) -> label
+DEGREES = [(-np.inf, "Normal"), (20, "Mild"), (35, "Moderate"), (50, "Moderately severe"),
+           (65, "Severe"), (80, "Profound"), (95, "Complete")]
+DEGREE_LABELS = [label for _, label in DEGREES]
+
+AIR_BONE_GAP_DB = 10     # mean gap over the PTA frequencies that counts as conductive
+ASYMMETRY_DB = 15        # interaural air-conduction difference ...
+ASYMMETRY_FREQS = 2      # ... needed at this many frequencies to flag an asymmetry
+
+_PTA_COLUMNS = [FREQUENCIES.index(f) for f in PTA_FREQUENCIES]
+
+
+def _quiet(func, values, axis):
+    """nanmean/nanmin without the all-NaN warning; such rows come out NaN."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return func(values, axis=axis)
+
+
+def _thresholds(condition, ear):
+    """One ear's thresholds from a Profile-tab dict, NaN where a frequency is missing."""
+    values = (condition or {}).get(ear) or {}
+    return [np.nan if values.get(label) is None else float(values[label]) for label in FREQ_LABELS]
+
+
+class AudiogramTable:
+    """
+    Audiograms as NumPy columns: ``record`` (which profile), ``patient`` (code
+    into ``patients``), ``ear`` (0 left, 1 right) and ``timestamp`` per row,
+    plus ``air`` and ``bone`` thresholds (dB HL, float32, NaN when missing)
+    with one column per entry of FREQUENCIES.
+
+    Every analytic is a whole-table array expression, so a few hundred
+    thousand rows are scored in one pass.
+    """
+
+    def __init__(self, patients, record, patient, ear, timestamp, air, bone):
+        self.patients = list(patients)
+        self.record = np.asarray(record, dtype=np.int32)
+        self.patient = np.asarray(patient, dtype=np.int32)
+        self.ear = np.asarray(ear, dtype=np.int8)
+        self.timestamp = np.asarray(timestamp, dtype="datetime64[us]")
+        self.air = np.asarray(air, dtype=np.float32).reshape(-1, len(FREQUENCIES))
+        self.bone = np.asarray(bone, dtype=np.float32).reshape(-1, len(FREQUENCIES))
+
+    def __len__(self):
+        return self.ear.size
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.record, self.patient, self.ear, self.timestamp, self.air, self.bone))
+
+    # --- Import / export ---
+    @classmethod
+    def from_profiles(cls, profiles):
+        """
+        Builds the table from saved profile dicts (logevent.json lines or
+        ProfileStore files). Profiles without air-conduction results are skipped.
+        """
+        names, codes = [], {}
+        record, patient, ear, timestamp, air, bone = [], [], [], [], [], []
+        r = 0
+        for profile in profiles:
+            air_condition = profile.get("air_condition") or {}
+            ears = [i for i, name in enumerate(EARS) if air_condition.get(name)]
+            if not ears:
+                continue
+            name = str(profile.get("name") or profile.get("patient") or "").strip()
+            key = name.lower()
+            if key not in codes:
+                codes[key] = len(names)
+                names.append(name)
+            for i in ears:
+                record.append(r)
+                patient.append(codes[key])
+                ear.append(i)
+                timestamp.append(profile.get("timestamp") or "NaT")
+                air.append(_thresholds(air_condition, EARS[i]))
+                bone.append(_thresholds(profile.get("bone_condition"), EARS[i]))
+            r += 1
+        return cls(names, record, patient, ear, timestamp, air, bone)
+
+    @classmethod
+    def from_log(cls, path="logevent.json"):
+        """Builds the table from a JSON-lines profile log (every segment of it), skipping lines that do not parse."""
+        return cls.from_profiles(read_log(path))
+
+    @classmethod
+    def from_profile_store(cls, store):
+        """Builds the table from the current profile of every patient in a ProfileStore."""
+        return cls.from_profiles(store.profiles())
+
+    def to_profiles(self):
+        """
+        One dict per record with the patient name, timestamp and the
+        ``air_condition``/``bone_condition`` layout the Profile tab saves.
+        """
+        profiles = {}
+        for row in range(len(self)):
+            r = int(self.record[row])
+            profile = profiles.get(r)
+            if profile is None:
+                ts = self.timestamp[row]
+                profile = profiles[r] = {
+                    "name": self.patients[self.patient[row]],
+                    "timestamp": None if np.isnat(ts) else str(ts),
+                    "air_condition": {},
+                    "bone_condition": {},
+                }
+            ear = EARS[self.ear[row]]
+            for column, key in ((self.air, "air_condition"), (self.bone, "bone_condition")):
+                values = {label: int(v) if v.is_integer() else v
+                          for label, v in zip(FREQ_LABELS, column[row].tolist()) if not np.isnan(v)}
+                if values:
+                    profile[key][ear] = values
+        return [profiles[r] for r in sorted(profiles)]
+
+    def save(self, path):
+        """Writes the columns to one uncompressed .npz file."""
+        np.savez(path, patients=np.array(self.patients, dtype=str), record=self.record, patient=self.patient,
+                 ear=self.ear, timestamp=self.timestamp, air=self.air, bone=self.bone)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["patients"].tolist(), data["record"], data["patient"], data["ear"],
+                       data["timestamp"], data["air"], data["bone"])
+
+    # --- Selection ---
+    def take(self, rows):
+        """A table holding only the given rows (indices or a boolean mask)."""
+        return AudiogramTable(self.patients, self.record[rows], self.patient[rows], self.ear[rows],
+                              self.timestamp[rows], self.air[rows], self.bone[rows])
+
+    def latest(self):
+        """Only the most recent record of each patient."""
+        if not len(self):
+            return self
+        order = np.lexsort((self.timestamp, self.patient))
+        last = np.r_[self.patient[order][1:] != self.patient[order][:-1], True]
+        keep = np.isin(self.record, self.record[order][last])
+        return self.take(keep)
+
+    # --- Analytics ---
+    def pta(self, conduction="air", frequencies=PTA_FREQUENCIES):
+        """Pure-tone average of every row (NaN when none of the frequencies were measured)."""
+        columns = [FREQUENCIES.index(f) for f in frequencies]
+        return _quiet(np.nanmean, getattr(self, conduction)[:, columns], axis=1)
+
+    def air_bone_gap(self):
+        """Air minus bone threshold per row and frequency (NaN where either is missing)."""
+        return self.air - self.bone
+
+    def _by_record(self, values):
+        """Scatters a per-row array into (records, 2 ears, ...) with NaN for a missing ear."""
+        records = int(self.record.max()) + 1 if len(self) else 0
+        out = np.full((records, len(EARS)) + values.shape[1:], np.nan, dtype=np.float32)
+        out[self.record, self.ear] = values
+        return out
+
+    def asymmetric(self):
+        """
+        Per row: the record's two ears differ by at least ASYMMETRY_DB at
+        ASYMMETRY_FREQS or more frequencies. False when one ear is missing.
+        """
+        if not len(self):
+            return np.zeros(0, dtype=bool)
+        ears = self._by_record(self.air)
+        with np.errstate(invalid="ignore"):
+            count = (np.abs(ears[:, 0] - ears[:, 1]) >= ASYMMETRY_DB).sum(axis=1)
+        return (count >= ASYMMETRY_FREQS)[self.record]
+
+    def degree(self):
+        """
+        Degree-of-loss code (index into DEGREE_LABELS) per row, graded on the
+        better ear's air PTA of the record as WHO does; -1 without a PTA.
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.int8)
+        better = _quiet(np.nanmin, self._by_record(self.pta("air")), axis=1)[self.record]
+        bounds = np.array([bound for bound, _ in DEGREES[1:]])
+        codes = np.searchsorted(bounds, better, side="right").astype(np.int8)
+        codes[np.isnan(better)] = -1
+        return codes
+
+    def analyze(self):
+        """Every per-row metric at once: PTAs, mean air-bone gap and the clinical flags."""
+        pta_air = self.pta("air")
+        mean_gap = _quiet(np.nanmean, self.air_bone_gap()[:, _PTA_COLUMNS], axis=1)
+        return {
+            "pta_air": pta_air,
+            "pta_bone": self.pta("bone"),
+            "air_bone_gap": mean_gap,
+            "conductive": mean_gap >= AIR_BONE_GAP_DB,
+            "asymmetric": self.asymmetric(),
+            "degree": self.degree(),
+        }
+
+    def summary(self):
+        """Population counts: records, ears, degree-of-loss distribution and flag rates."""
+        metrics = self.analyze()
+        first_row = np.r_[True, self.record[1:] != self.record[:-1]] if len(self) else np.zeros(0, dtype=bool)
+        degrees = metrics["degree"][first_row]
+        return {
+            "records": int(first_row.sum()),
+            "patients": int(np.unique(self.patient).size),
+            "ears": len(self),
+            "degree": {label: int((degrees == i).sum()) for i, label in enumerate(DEGREE_LABELS)},
+            "conductive_ears": int(metrics["conductive"].sum()),
+            "asymmetric_records": int(metrics["asymmetric"][first_row].sum()),
+            "pta_air_mean": None if not len(self) else round(float(np.nanmean(metrics["pta_air"])), 1),
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "logevent.json"
+    if source.endswith(".npz"):
+        table = AudiogramTable.load(source)
+    elif os.path.isdir(source):
+        from profilestore import ProfileStore
+        table = AudiogramTable.from_profile_store(ProfileStore(source))
+    else:
+        table = AudiogramTable.from_log(source)
+    print(json.dumps(table.summary(), indent=2))
@@ -0,0 +1,92 @@
+# api_load.py
+# Hundreds of concurrent kiosk submissions against the headless scoring API, in one process.
+#
+# Usage: python benchmarks/api_load.py [--clients 200] [--requests 10]
+# The API is started on a free local port with its logs in a temporary directory; each
+# client keeps one connection open and alternates Diagnosis, Fitting and Monitoring posts.
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import staircase
+from api import Client, create_api
+from confusion import simulate_responses
+from logsegments import iter_lines
+from recordstore import LOG_FILES
+
+
+def _diagnosis_trials(rng):
+    track = staircase.simulate(-8.0, 0.0, [rng.normal(-8.0, 1.6)], 0.8, down=2, max_trials=48,
+                               rng=rng, record_trials=True)
+    targets, responses = simulate_responses(track["trial_correct"][0], rng)
+    return [[t, r, float(s)] for t, r, s in zip(targets, responses, track["trial_snr"][0])]
+
+
+def _payloads(client_id, count, rng):
+    patient = f"Kiosk Patient {client_id}"
+    for i in range(count):
+        kind = ("diagnosis", "fitting", "monitoring")[i % 3]
+        if kind == "diagnosis":
+            body = {"patient": patient, "age": 45, "trials": _diagnosis_trials(rng)}
+        elif kind == "fitting":
+            body = {"patient": patient, "mode": "Aided", "environment": "Noise", "snr": round(rng.normal(-8, 1.2), 2)}
+        else:
+            body = {"patient": patient, "checkin_type": "Day", "answers": {"listening_effort": 6, "energy_current": 4}}
+        yield kind, body
+
+
+async def _client(port, payloads, latencies, failures):
+    client = Client("127.0.0.1", port)
+    try:
+        for kind, body in payloads:
+            start = time.perf_counter()
+            status, _ = await client.request("POST", "/" + kind, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append(status)
+    finally:
+        await client.close()
+
+
+async def run(clients, requests, root):
+    api = create_api(root)
+    server = await api.serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    # Built up front so generating trials does not hold up the event loop during the run
+    payloads = [list(_payloads(c, requests, np.random.default_rng(c))) for c in range(clients)]
+    latencies, failures = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(port, p, latencies, failures) for p in payloads))
+    wall = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    api.writer.flush()
+    return np.array(latencies), failures, wall, api.writer.metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent submissions to the scoring API")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="uliplus-api-")
+    latencies, failures, wall, metrics = asyncio.run(run(args.clients, args.requests, root))
+    ms = latencies * 1000
+    print(f"{args.clients} clients x {args.requests} requests: {latencies.size / wall:.0f} req/s over {wall:.2f} s")
+    print(f"latency p50 {np.percentile(ms, 50):.1f} ms, p95 {np.percentile(ms, 95):.1f} ms, "
+          f"p99 {np.percentile(ms, 99):.1f} ms; {len(failures)} failed")
+    lines = 0
+    for name in LOG_FILES.values():
+        lines += sum(1 for _ in iter_lines(os.path.join(root, name)))
+    print(f"{lines} records on disk in {metrics['batches']} batches (logs in {root})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# audiogram_bench.py
+# Import, one-pass analytics and save/load of a large synthetic audiogram population.
+#
+# Usage: python benchmarks/audiogram_bench.py [--patients 150000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audiogram import EARS, FREQ_LABELS, AudiogramTable
+
+
+def synthetic_profiles(patients, seed=0):
+    """Profile dicts in the Profile tab's layout: sloping losses, some conductive, some asymmetric."""
+    rng = np.random.default_rng(seed)
+    base = rng.gamma(2.0, 12.0, patients)
+    slope = rng.uniform(0, 8, patients)
+    gap = np.where(rng.random(patients) < 0.1, rng.uniform(10, 35, patients), 0.0)
+    skew = np.where(rng.random(patients) < 0.05, rng.uniform(15, 40, patients), 0.0)
+    for p in range(patients):
+        air, bone = {}, {}
+        for e, ear in enumerate(EARS):
+            bc = base[p] + slope[p] * np.arange(len(FREQ_LABELS)) + rng.normal(0, 3, len(FREQ_LABELS))
+            ac = bc + gap[p] + (skew[p] if e else 0.0)
+            bone[ear] = {label: int(round(v / 5) * 5) for label, v in zip(FREQ_LABELS, bc)}
+            air[ear] = {label: int(round(v / 5) * 5) for label, v in zip(FREQ_LABELS, ac)}
+        yield {"timestamp": f"2025-01-01T00:00:{p % 60:02d}", "name": f"Patient {p}",
+               "past_hearing_test": "Yes", "air_condition": air, "bone_condition": bone}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar audiogram analytics benchmark")
+    parser.add_argument("--patients", type=int, default=150000)
+    args = parser.parse_args()
+
+    profiles = list(synthetic_profiles(args.patients))
+
+    start = time.perf_counter()
+    table = AudiogramTable.from_profiles(profiles)
+    imported = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics = table.analyze()
+    analyzed = time.perf_counter() - start
+
+    path = os.path.join(tempfile.mkdtemp(), "audiograms.npz")
+    start = time.perf_counter()
+    table.save(path)
+    loaded = AudiogramTable.load(path)
+    stored = time.perf_counter() - start
+
+    roundtrip = AudiogramTable.from_profiles(table.take(slice(0, 2000)).to_profiles())
+    assert np.array_equal(roundtrip.air, table.air[:2000]) and np.array_equal(roundtrip.bone, table.bone[:2000], equal_nan=True)
+    assert len(loaded) == len(table)
+
+    print(f"{len(table)} ears from {args.patients} profiles, {table.nbytes / 2 ** 20:.1f} MB of columns")
+    print(f"import {imported:.2f} s, analyze {1000 * analyzed:.1f} ms, save+load {1000 * stored:.1f} ms")
+    print(f"conductive ears {int(metrics['conductive'].sum())}, asymmetric ears {int(metrics['asymmetric'].sum())}")
+    print(table.summary()["degree"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benefit_bench.py
+# The aided benefit engine on a synthetic Fitting log (see workload.py): the whole clinic in one
+# process and in a pool, the vectorized bootstrap against a resample-at-a-time loop, the cost on
+# a Fitting tab rerun, and how often the 95% intervals cover the benefit the generator put in.
+#
+# Usage: python benchmarks/benefit_bench.py [--records 500000] [--patients 2000] [--workers N]
+# --records counts the whole corpus; about 28% of it (the Fitting share) is generated and written.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import benefit
+import workload
+from recordstore import RecordStore
+
+LOOP_PATIENTS = 20   # patients timed with the resample-at-a-time bootstrap
+
+
+def loop_benefit(unaided, aided, rng, resamples=benefit.RESAMPLES):
+    """The unpaired bootstrap-t one resample at a time, as it would be written without index matrices."""
+    unaided, aided = np.asarray(unaided), np.asarray(aided)
+    estimate = unaided.mean() - aided.mean()
+    se = np.sqrt(unaided.var(ddof=1) / unaided.size + aided.var(ddof=1) / aided.size)
+    t = []
+    for _ in range(resamples):
+        u, a = rng.choice(unaided, unaided.size), rng.choice(aided, aided.size)
+        boot_se = np.sqrt(u.var(ddof=1) / u.size + a.var(ddof=1) / a.size)
+        t.append((u.mean() - a.mean() - estimate) / max(boot_se, benefit.SE_FLOOR * se))
+    low, high = np.percentile(t, [2.5, 97.5])
+    return estimate - high * se, estimate - low * se
+
+
+def write_log(root, records, patients, days, seed):
+    store = RecordStore(root)
+    written = 0
+    for kind, batch in workload.generate(records, patients, days, seed, kinds=["fitting"]):
+        store.append_many(kind, batch)
+        written += len(batch)
+    return store.data_path("fitting"), written
+
+
+def coverage(results, people):
+    """Share of 95% intervals (per environment, method and interval) that hold the generator's true benefit."""
+    index = {name: p for p, name in enumerate(people["name"])}
+    hits = {}
+    for result in results.values():
+        true = people["benefit"][index[result["patient"]]]
+        for env, scale in (("quiet", 1.0), ("noise", 0.7)):
+            r = result.get(env)
+            if r and r["ci"] is not None:
+                low, high = r["ci"]
+                hits.setdefault((env, r["method"], r["interval"]), []).append(low <= true * scale <= high)
+    return {key: (float(np.mean(h)), len(h)) for key, h in sorted(hits.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aided benefit engine benchmark")
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="uliplus-benefit-")
+    path, written = write_log(root, args.records, args.patients, args.days, args.seed)
+    print(f"{written} fitting records from {args.patients} patients over {args.days} days in {root}")
+
+    timings = {}
+    for workers in (1, args.workers):
+        start = time.perf_counter()
+        results = benefit.clinic_benefit(path, workers=workers, seed=args.seed)
+        timings[workers] = time.perf_counter() - start
+        print(f"clinic_benefit, {workers} worker(s): {timings[workers]:.2f} s for {len(results)} patients "
+              f"({1000 * timings[workers] / max(1, len(results)):.2f} ms per patient)")
+    for env, row in benefit.clinic_report(results).items():
+        print(f"  {env}: median benefit {row['median_benefit']:+.2f} dB, {row['significant_benefit']} of "
+              f"{row['tested']} tested patients significantly better aided, {row['significant_loss']} worse")
+
+    people = workload.cohort(args.patients, args.seed)
+    for (env, method, interval), (share, n) in coverage(results, people).items():
+        print(f"95% CI coverage of the true benefit, {env}, {method} ({interval}): {100 * share:.1f}% of {n}")
+
+    runs = {}
+    for _, record in RecordStore(root).window(kinds=["fitting"]):
+        runs.setdefault(record["patient"], []).append(record)
+    sample = sorted(runs)[:LOOP_PATIENTS]
+    pairs = []
+    for name in sample:
+        history = benefit.history_runs(runs[name])
+        for env in ("quiet", "noise"):
+            unaided, aided = history.get(f"unaided_{env}"), history.get(f"aided_{env}")
+            # Only arms large enough to be bootstrapped; smaller ones get the t interval
+            if unaided and aided and min(len(unaided[0]), len(aided[0])) >= benefit.BOOTSTRAP_MIN_N:
+                pairs.append((unaided[0], aided[0]))
+    rng = np.random.default_rng(args.seed)
+    if pairs:
+        start = time.perf_counter()
+        for unaided, aided in pairs:
+            benefit.environment_benefit(unaided, aided, rng=rng)
+        vectorized = (time.perf_counter() - start) / len(pairs)
+        start = time.perf_counter()
+        for unaided, aided in pairs:
+            loop_benefit(unaided, aided, rng)
+        loop = (time.perf_counter() - start) / len(pairs)
+        print(f"unpaired bootstrap ({benefit.RESAMPLES} resamples): {1000 * vectorized:.2f} ms vectorized "
+              f"(with the t-test), {1000 * loop:.1f} ms one resample at a time ({loop / vectorized:.0f}x)")
+    else:
+        print(f"no sampled session has {benefit.BOOTSTRAP_MIN_N} runs per mode to bootstrap")
+
+    session = {key: rng.normal(-4.0 if key.startswith("unaided") else -7.0, 1.0, 5).tolist()
+               for key in ("unaided_quiet", "aided_quiet", "unaided_noise", "aided_noise")}
+    samples = []
+    for _ in range(200):
+        start = time.perf_counter()
+        benefit.patient_benefit(session, rng)
+        samples.append(time.perf_counter() - start)
+    print(f"live session (5 runs per condition) on a Fitting rerun: {1000 * np.median(samples):.2f} ms median")
+
+
+if __name__ == "__main__":
+    main()
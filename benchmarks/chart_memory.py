@@ -0,0 +1,55 @@
+# chart_memory.py
+# Renders the Diagnosis and Fitting charts repeatedly and reports process RSS.
+#
+# Usage: python benchmarks/chart_memory.py [--renders 1000] [--distinct 200]
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import charts
+from normative import NormativeEngine
+
+LABELS = ["a", "o", "i", "Low", "Mid", "High"]
+
+
+def rss_mb():
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart cache memory benchmark")
+    parser.add_argument("--renders", type=int, default=1000, help="chart requests, like reruns")
+    parser.add_argument("--distinct", type=int, default=200, help="distinct input data sets")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    norm = NormativeEngine().curve()
+    inputs = [(round(float(rng.normal(-8, 1.6)), 2), rng.integers(0, 101, 6).tolist()) for _ in range(args.distinct)]
+    cache = charts.ChartCache(max_entries=64)
+
+    start = time.perf_counter()
+    samples = []
+    for i in range(args.renders):
+        snr, errors = inputs[i % args.distinct] if i % 2 else inputs[0]
+        charts.diagnosis_png(cache, norm.x, norm.pdf, snr, errors, LABELS)
+        charts.fitting_png(cache, {"Aided Noise": [snr, snr - 1], "Unaided Noise": [snr + 2]})
+        if i % (args.renders // 10 or 1) == 0:
+            samples.append(rss_mb())
+    elapsed = time.perf_counter() - start
+
+    print(f"renders={2 * args.renders} in {elapsed:.1f}s, cache={cache.stats()}")
+    print("RSS (MB) over the run: " + " ".join(f"{s:.0f}" for s in samples + [rss_mb()]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# loadtest.py
+# Drives N concurrent simulated sessions through realistic clinic flows, headlessly.
+#
+# Usage: python benchmarks/loadtest.py [--sessions 8] [--rounds 3] [--baseline benchmarks/loadtest_baseline.json]
+#        python benchmarks/loadtest.py --save-baseline   # record the current numbers as the baseline
+# AppTest swaps process-wide state (the runtime, config options) on every run, so two
+# sessions cannot rerun in one process at the same time; each session gets its own
+# worker process instead, and all of them share one working directory (a temporary
+# one, since the app writes its logs there), so the saves contend for the same files.
+# Every session first goes through one whole round unmeasured, so the numbers are the rerun
+# path and not the imports and first renders; that warmup is reported on its own.
+# The Screener flow is left out: it needs the adaptivetest module.
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "loadtest_baseline.json")
+
+
+def _hardware():
+    """What the run was measured on; numbers from different hardware are not comparable."""
+    model = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            model = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), model)
+    except OSError:
+        pass
+    return {"cpus": os.cpu_count(), "cpu_model": model, "platform": platform.platform(),
+            "python": platform.python_version()}
+
+
+def _rss_mb():
+    """Current resident set size of the process (MB); the peak so far where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+class Session:
+    """One simulated clinician; every rerun is timed and tagged with the tab it ran on."""
+
+    def __init__(self, script, name):
+        self.at = AppTest.from_file(script, default_timeout=120)
+        self.name = name
+        self.samples = []
+        self.tab = "Profile"
+        self.errors = []
+
+    def _run(self):
+        start = time.perf_counter()
+        self.at.run()
+        elapsed = time.perf_counter() - start
+        self.samples.append((self.tab, elapsed, _rss_mb()))
+        for exc in self.at.exception:
+            self.errors.append(f"{self.tab}: {exc.value}")
+
+    def click(self, label):
+        next(b for b in self.at.button if b.label.startswith(label)).click()
+        self._run()
+
+    def open(self, tab):
+        self.tab = tab
+        self.click(tab)
+
+    # --- Flows ---
+    def profile(self):
+        self.tab = "Profile"  # the tab the app opens on
+        self.at.text_input(key="profile_name").input(self.name)
+        self._run()
+        self.click("💾 Save Profile")
+
+    def diagnosis(self):
+        self.open("Diagnosis")
+        self.click("▶️ Run Diagnosis")
+        self.click("💾 Save Diagnosis")
+
+    def fitting(self):
+        self.open("Fitting")
+        for mode in ("Unaided", "Aided"):
+            self.at.radio[0].set_value(mode)
+            self._run()
+            self.click("▶️ Run Test")
+            self.click("💾 Save Fitting")
+
+    def monitoring(self):
+        self.open("Monitoring")
+        self.click("🕗 Morning")
+        self.click("💾 Save Check-In")
+
+    def summary(self):
+        self.open("Summary")
+        self.click("💾 Save Summary")
+
+    def run(self, rounds):
+        self.profile()
+        for _ in range(rounds):
+            self.diagnosis()
+            self.fitting()
+            self.monitoring()
+            self.summary()
+
+
+def _worker(script, name, rounds, barrier, results):
+    sys.path.insert(0, ROOT)
+    session = Session(script, name)
+    # One unmeasured round: imports, cached resources and every tab's first render
+    start = time.perf_counter()
+    try:
+        session._run()
+        session.run(1)
+        session.open("Profile")  # where the measured run starts, as the app opens on it
+    except Exception as exc:
+        session.errors.append(f"warmup {session.tab}: {exc!r}")
+    warmup = time.perf_counter() - start
+    session.samples = []
+    barrier.wait()
+    try:
+        session.run(rounds)
+    except Exception as exc:
+        session.errors.append(f"{session.tab}: {exc!r}")
+    # Worker processes skip atexit, so drain the log writer before reporting
+    from sections.shared import get_log_writer
+    get_log_writer().flush(timeout=30)
+    results.put((session.samples, session.errors, warmup))
+
+
+def load_test(script, sessions, rounds):
+    barrier = mp.Barrier(sessions + 1)
+    results = mp.Queue()
+    workers = [mp.Process(target=_worker, args=(script, f"Load Patient {i}", rounds, barrier, results))
+               for i in range(sessions)]
+    for w in workers:
+        w.start()
+    barrier.wait()  # every session has done its first run
+    start = time.perf_counter()
+    samples, errors, warmups = [], [], []
+    for _ in workers:
+        s, e, warmup = results.get()
+        samples.extend(s)
+        errors.extend(e)
+        warmups.append(warmup)
+    wall = time.perf_counter() - start
+    for w in workers:
+        w.join()
+
+    report = {"sessions": sessions, "rounds": rounds, "hardware": _hardware(), "wall_s": round(wall, 3),
+              "reruns_per_s": round(len(samples) / wall, 2),
+              "warmup_s": {"p50": round(float(np.median(warmups)), 2), "max": round(max(warmups), 2)}, "tabs": {}}
+    for tab in sorted({s[0] for s in samples}):
+        latency = np.array([s[1] for s in samples if s[0] == tab]) * 1000
+        report["tabs"][tab] = {
+            "reruns": int(latency.size),
+            "p50_ms": round(float(np.percentile(latency, 50)), 1),
+            "p95_ms": round(float(np.percentile(latency, 95)), 1),
+            "p99_ms": round(float(np.percentile(latency, 99)), 1),
+            "peak_rss_mb": round(max(s[2] for s in samples if s[0] == tab), 1),
+        }
+    return report, errors
+
+
+def compare(report, baseline, tolerance):
+    """Lines describing every metric that got worse than the baseline by more than ``tolerance``."""
+    regressions = []
+    for tab, base in baseline.get("tabs", {}).items():
+        current = report["tabs"].get(tab)
+        if current is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"):
+            if current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{tab} {metric}: {base[metric]} -> {current[metric]}")
+    if report["reruns_per_s"] < baseline.get("reruns_per_s", 0) * (1 - tolerance):
+        regressions.append(f"reruns_per_s: {baseline['reruns_per_s']} -> {report['reruns_per_s']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the Streamlit app")
+    parser.add_argument("--script", default=os.path.join(ROOT, "ULIPlus.py"))
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3, help="Diagnosis/Fitting/Monitoring/Summary rounds per session")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    args = parser.parse_args()
+
+    script = os.path.abspath(args.script)
+    # Notes are off by default; the stub backend keeps the Summary tab's note panel in the load
+    os.environ.setdefault("ULIPLUS_NOTES_BACKEND", "stub")
+    workdir = tempfile.mkdtemp(prefix="uliplus-load-")
+    os.chdir(workdir)
+    report, errors = load_test(script, args.sessions, args.rounds)
+
+    print(f"{args.sessions} sessions x {args.rounds} rounds: {report['reruns_per_s']} reruns/s "
+          f"over {report['wall_s']} s (logs in {workdir})")
+    print(f"warmup round per session (not measured): {report['warmup_s']['p50']} s median, "
+          f"{report['warmup_s']['max']} s max")
+    print(f"{'tab':<12}{'reruns':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'peak RSS (MB)':>15}")
+    for tab, m in report["tabs"].items():
+        print(f"{tab:<12}{m['reruns']:>8}{m['p50_ms']:>10}{m['p95_ms']:>10}{m['p99_ms']:>10}{m['peak_rss_mb']:>15}")
+    for error in errors[:10]:
+        print("error:", error)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print("baseline written to", args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get("sessions"), baseline.get("rounds")) != (args.sessions, args.rounds):
+            print("baseline was recorded with a different --sessions/--rounds; comparing anyway")
+        if baseline.get("hardware", {}).get("cpus") != report["hardware"]["cpus"]:
+            print(f"baseline was recorded on {baseline.get('hardware', {}).get('cpus')} CPUs, this run has "
+                  f"{report['hardware']['cpus']}; comparing anyway")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print("regression:", line)
+        if regressions:
+            sys.exit(1)
+        print("no regressions against", args.baseline)
+    if errors:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# log_writer_bench.py
+# Save-button latency under a burst of saves from many sessions: synchronous durable
+# appends on the calling thread versus handing records to the background writer.
+#
+# Usage: python benchmarks/log_writer_bench.py [--sessions 32] [--saves 50]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwriter import BatchedLogWriter
+from recordstore import RecordStore
+
+
+def _record(session, i):
+    return {"timestamp": f"2025-01-01T10:{i // 60 % 60:02d}:{i % 60:02d}.{session:06d}",
+            "patient": f"Patient {session}", "snr": -8.0, "subjective": {"notes": "x" * 80}}
+
+
+def _burst(save, sessions, saves):
+    def run(session):
+        latencies = []
+        for i in range(saves):
+            start = time.perf_counter()
+            save("diagnosis", _record(session, i))
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        latencies = np.concatenate([np.array(l) for l in pool.map(run, range(sessions))])
+    return latencies, time.perf_counter() - start
+
+
+def _report(name, latencies, wall):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{name:<12} save p50={p50:8.3f}ms p99={p99:8.3f}ms max={latencies.max() * 1000:8.3f}ms  wall={wall:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched log writer benchmark")
+    parser.add_argument("--sessions", type=int, default=32, help="concurrent saving sessions")
+    parser.add_argument("--saves", type=int, default=50, help="saves per session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = RecordStore(root)
+        latencies, wall = _burst(lambda kind, record: store.append_many(kind, [record], durable=True),
+                                 args.sessions, args.saves)
+        _report("synchronous", latencies, wall)
+
+    with tempfile.TemporaryDirectory() as root:
+        writer = BatchedLogWriter(RecordStore(root))
+        latencies, wall = _burst(writer.submit, args.sessions, args.saves)
+        flush_start = time.perf_counter()
+        writer.flush()
+        wall += time.perf_counter() - flush_start
+        _report("background", latencies, wall)
+        metrics = writer.metrics()
+        writer.close()
+        print(f"writer: {metrics['records_written']} records in {metrics['batches']} batches, "
+              f"flush mean={metrics['flush_latency_mean'] * 1000:.2f}ms max={metrics['flush_latency_max'] * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
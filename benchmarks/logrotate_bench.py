@@ -0,0 +1,76 @@
+# logrotate_bench.py
+# A year of Diagnosis records written through the RecordStore with rotation on: disk usage
+# of the compressed segments, and the cost of a full streaming scan against one week.
+#
+# Usage: python benchmarks/logrotate_bench.py [--records 500000] [--segment-mb 16]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import logsegments
+from recordstore import RecordStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log rotation and streaming reader benchmark")
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--segment-mb", type=float, default=16)
+    parser.add_argument("--patients", type=int, default=2000)
+    args = parser.parse_args()
+    config.LOG_SEGMENT_BYTES = int(args.segment_mb * 2 ** 20)
+
+    rng = np.random.default_rng(0)
+    store = RecordStore(tempfile.mkdtemp())
+    path = store.data_path("diagnosis")
+    start_day = datetime(2025, 1, 1)
+    step = timedelta(days=365) / args.records
+    batch = 256
+    start = time.perf_counter()
+    for first in range(0, args.records, batch):
+        records = []
+        for i in range(first, min(first + batch, args.records)):
+            errors = rng.integers(0, 40, 16).tolist()
+            records.append({"timestamp": (start_day + i * step).isoformat(), "patient": f"Patient {i % args.patients}",
+                            "snr": round(float(rng.normal(-8, 1.6)), 2), "error_proportion": errors,
+                            "percentile": 50.0, "z_score": 0.0, "subjective": {"notes": ""}})
+        store.append_many("diagnosis", records)
+    written = time.perf_counter() - start
+
+    usage = logsegments.disk_usage(path)
+    on_disk = usage["active"] + usage["compressed"]
+    print(f"{args.records} records in {written:.1f} s ({args.records / written:.0f}/s), {usage['segments']} closed "
+          f"segments: {usage['uncompressed'] / 2 ** 20:.0f} MB of JSON lines stored in {on_disk / 2 ** 20:.1f} MB "
+          f"({usage['uncompressed'] / on_disk:.1f}x)")
+
+    start = time.perf_counter()
+    total = sum(1 for _ in logsegments.read_log(path))
+    full = time.perf_counter() - start
+    week = ("2025-06-01", "2025-06-07T23:59:59")
+    start = time.perf_counter()
+    in_week = sum(1 for _ in logsegments.read_log(path, *week))
+    ranged = time.perf_counter() - start
+    print(f"streaming scan: all {total} records {full:.2f} s; one week ({in_week} records) {1000 * ranged:.0f} ms")
+
+    fresh = RecordStore(store.root)
+    start = time.perf_counter()
+    fresh.patients("diagnosis")
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    window = fresh.window(*week, kinds=["diagnosis"])
+    indexed = time.perf_counter() - start
+    start = time.perf_counter()
+    history = fresh.history("Patient 7", kinds=["diagnosis"])
+    patient = time.perf_counter() - start
+    print(f"RecordStore: index load {loaded:.2f} s, one-week window ({len(window)} records) {1000 * indexed:.0f} ms, "
+          f"one patient's history ({len(history)} records) {1000 * patient:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
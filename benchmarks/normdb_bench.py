@@ -0,0 +1,90 @@
+# normdb_bench.py
+# Learning normative distributions from a large Diagnosis log: full builds with one and
+# several processes, tailing new records, quantile accuracy against the exact values, and
+# the cost of a percentile lookup once the curves are learned.
+#
+# Usage: python benchmarks/normdb_bench.py [--records 1000000] [--patients 2000] [--workers 4]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from normative import NormativeEngine
+from normdb import NormativeDB, stratum
+from profilestore import ProfileStore
+
+LANGUAGES = ["english", "spanish", "mandarin", "arabic", "hindi"]
+
+
+def write_data(root, records, patients, seed=0):
+    """Profiles with random ages and languages, and a diagnosis log whose SNR depends on both."""
+    rng = np.random.default_rng(seed)
+    profiles = ProfileStore(os.path.join(root, "profiles"))
+    ages = rng.integers(10, 90, patients)
+    languages = rng.integers(len(LANGUAGES), size=patients)
+    for p in range(patients):
+        profiles.save({"name": f"Patient {p}", "age": int(ages[p]), "primary_language": LANGUAGES[languages[p]]})
+    who = rng.integers(patients, size=records)
+    snrs = rng.normal(-9.0 + 0.05 * ages[who] + 0.4 * languages[who], 1.6)
+    path = os.path.join(root, "diagnosis_log.json")
+    with open(path, "w") as f:
+        for p, snr in zip(who, snrs):
+            f.write(json.dumps({"timestamp": "2025-01-01T09:00:00", "patient": f"Patient {p}",
+                                "snr": round(float(snr), 2)}) + "\n")
+    strata = [stratum(ages[p], LANGUAGES[languages[p]]) for p in who]
+    return profiles, path, strata, snrs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental normative database benchmark")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    profiles, path, strata, snrs = write_data(root, args.records, args.patients)
+    print(f"{args.records} diagnosis records ({os.path.getsize(path) / 2 ** 20:.0f} MB), {args.patients} patients")
+
+    for workers in sorted({1, args.workers}):
+        db = NormativeDB(path, profiles, checkpoint=os.path.join(root, f"norms-{workers}"))
+        start = time.perf_counter()
+        db.build(workers=workers)
+        print(f"build with {workers} process(es): {time.perf_counter() - start:.2f} s, "
+              f"{len(db.sketches)} strata, checkpoint {os.path.getsize(db.checkpoint) / 1024:.0f} KB")
+
+    engine = NormativeEngine(db=db, refresh_seconds=0.0)
+    with open(path, "a") as f:
+        for i in range(100):
+            f.write(json.dumps({"timestamp": "2025-01-02T09:00:00", "patient": "Patient 0", "snr": -8.0}) + "\n")
+    start = time.perf_counter()
+    engine.refresh()
+    print(f"refresh after 100 new records: {1000 * (time.perf_counter() - start):.1f} ms")
+
+    # Quantile error of each learned stratum against the exact quantiles of its SNRs
+    keys = np.array([str(s) for s in strata])
+    worst = 0.0
+    for key, sketch in db.sketches.items():
+        exact = np.quantile(snrs[keys == str(key)], [0.05, 0.25, 0.5, 0.75, 0.95])
+        worst = max(worst, np.abs(sketch.quantile([0.05, 0.25, 0.5, 0.75, 0.95]) - exact).max())
+    print(f"largest quantile error over strata (p5..p95): {worst:.3f} dB")
+
+    group = engine.group_for(45, "spanish")
+    curve = engine.curve(group)
+    samples = []
+    for snr in np.linspace(-14, 0, 2000):
+        start = time.perf_counter()
+        engine.group_for(45, "spanish")
+        float(curve.percentile(snr))
+        samples.append(time.perf_counter() - start)
+    print(f"group {group}: learned from {db.count(group)} records; "
+          f"group lookup + percentile {1e6 * np.median(samples):.1f} us median, {1e6 * np.percentile(samples, 99):.1f} us p99")
+
+
+if __name__ == "__main__":
+    main()
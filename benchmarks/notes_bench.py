@@ -0,0 +1,89 @@
+# notes_bench.py
+# The Summary tab's clinical notes with the stub backend: how long a rerun would block if it
+# wrote the note itself, against the cost of handing it to the worker pool; time to first
+# text and to the full note under load; and cache hits from memory and from disk.
+#
+# Usage: python benchmarks/notes_bench.py [--patients 50] [--visits 500] [--rate 20] [--workers 8]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from notes import NoteGenerator, StubBackend, note_inputs
+
+
+def patient_inputs(rng, p, visit=0):
+    """Inputs of a patient's note; ``visit`` stands for new results that change them."""
+    profile = {"name": f"Patient {p}", "age": int(rng.integers(18, 90)), "primary_language": "English",
+               "tinnitus": ["Yes", "No", "Sometimes"][p % 3], "hearing_aid_use": ["Yes", "No"][p % 2]}
+    diagnosis = {"snr": round(-8.0 + 0.1 * visit + p % 7 * 0.3, 2), "percentile": 50.0,
+                 "fit": {"snr50_ci": [-9.5, -6.5]}}
+    summary = {"fitting": {"benefit": {"noise": 3.1, "quiet": 4.0}},
+               "wellbeing": {"scores": {"listening_effort": 4.0 + p % 5}}}
+    return note_inputs(profile, diagnosis, summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background clinical note generation benchmark")
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--visits", type=int, default=500, help="Summary tab visits, spread over the patients")
+    parser.add_argument("--rate", type=float, default=20.0, help="Visits per second")
+    parser.add_argument("--changed", type=float, default=0.1, help="Share of visits with new results")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--first-token", type=float, default=0.5)
+    parser.add_argument("--per-chunk", type=float, default=0.05)
+    args = parser.parse_args()
+
+    backend = StubBackend(args.first_token, args.per_chunk)
+    inputs = patient_inputs(np.random.default_rng(0), 0)
+    start = time.perf_counter()
+    for _ in backend.stream(inputs):
+        pass
+    print(f"one note written on the script thread would block the rerun for {time.perf_counter() - start:.2f} s")
+
+    generator = NoteGenerator(backend, cache_dir=tempfile.mkdtemp(), workers=args.workers)
+    rng = np.random.default_rng(1)
+    visits = [0] * args.patients
+    handoff, jobs = [], []
+    for _ in range(args.visits):
+        p = int(rng.integers(args.patients))
+        if rng.random() < args.changed:
+            visits[p] += 1
+        inputs = patient_inputs(np.random.default_rng(p), p, visits[p])
+        start = time.perf_counter()
+        job = generator.request(inputs)
+        handoff.append(time.perf_counter() - start)
+        jobs.append(job)
+        time.sleep(1 / args.rate)
+    for job in jobs:
+        job.wait()
+    written = [job for job in jobs if not job.cached and job.first_chunk is not None]
+    stats = generator.stats()
+    print(f"{args.visits} visits: request() {1e6 * np.median(handoff):.0f} us median, "
+          f"{1e6 * np.percentile(handoff, 99):.0f} us p99 on the script thread")
+    print(f"{stats['misses']} notes written, {stats['hits']} cache hits, "
+          f"{args.visits - stats['misses'] - stats['hits']} joined a note already being written")
+    print(f"under load ({args.workers} workers): first text {np.median([j.first_chunk for j in written]):.2f} s median, "
+          f"full note {np.median([j.seconds for j in written]):.2f} s median, {max(j.seconds for j in written):.2f} s max")
+
+    p = 0
+    key_inputs = patient_inputs(np.random.default_rng(p), p, visits[p])
+    samples = []
+    for _ in range(1000):
+        start = time.perf_counter()
+        generator.request(key_inputs)
+        samples.append(time.perf_counter() - start)
+    restarted = NoteGenerator(backend, cache_dir=generator.cache_dir, workers=1)
+    start = time.perf_counter()
+    job = restarted.request(key_inputs)
+    disk = time.perf_counter() - start
+    print(f"cache hit: {1e6 * np.median(samples):.0f} us from memory, {1e6 * disk:.0f} us from disk after a restart "
+          f"(cached: {job.cached})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# profile_saves.py
+# Measures ProfileStore save latency and lock contention with many concurrent sessions.
+#
+# Usage: python benchmarks/profile_saves.py [--sessions 32] [--saves 50] [--patients 8]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profilestore import ProfileStore
+
+
+def _session(args):
+    root, session, saves, patients = args
+    store = ProfileStore(root)
+    for i in range(saves):
+        # Sessions share a small pool of patients so that saves collide
+        name = f"Patient {(session + i) % patients}"
+        store.save({"name": name, "age": 30 + session, "session": session, "save": i})
+    return store.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProfileStore concurrent save benchmark")
+    parser.add_argument("--sessions", type=int, default=32, help="concurrent saving processes")
+    parser.add_argument("--saves", type=int, default=50, help="saves per session")
+    parser.add_argument("--patients", type=int, default=8, help="distinct patients shared by the sessions")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        jobs = [(root, s, args.saves, args.patients) for s in range(args.sessions)]
+        start = time.perf_counter()
+        with Pool(args.sessions) as pool:
+            results = pool.map(_session, jobs)
+        wall = time.perf_counter() - start
+        intact = all(ProfileStore(root).load(f"Patient {p}") is not None for p in range(args.patients))
+
+    saves = sum(r["saves"] for r in results)
+    contended = sum(r["contended_saves"] for r in results)
+    print(f"sessions={args.sessions} saves={saves} wall={wall:.3f}s throughput={saves / wall:.0f} saves/s")
+    print(f"latency mean={1000 * sum(r['latency_mean'] for r in results) / len(results):.2f}ms "
+          f"p95(max over sessions)={1000 * max(r['latency_p95'] for r in results):.2f}ms "
+          f"max={1000 * max(r['latency_max'] for r in results):.2f}ms")
+    print(f"lock contention: {contended}/{saves} saves waited, "
+          f"total wait={sum(r['lock_wait_total'] for r in results):.3f}s "
+          f"max wait={1000 * max(r['lock_wait_max'] for r in results):.2f}ms")
+    print(f"all profiles readable: {intact}")
+
+
+if __name__ == "__main__":
+    main()
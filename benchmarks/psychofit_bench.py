@@ -0,0 +1,75 @@
+# psychofit_bench.py
+# Batched psychometric fits of simulated Diagnosis tracks: time per batch against a loop of
+# per-session scipy.optimize fits, and the accuracy and interval coverage of SNR-50.
+#
+# Usage: python benchmarks/psychofit_bench.py [--sessions 5000] [--loop 200]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import minimize
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import psychofit
+import staircase
+from scoring import DIAGNOSIS_DOWN, DIAGNOSIS_TRIALS
+
+
+def loop_fit(snr, correct):
+    """One session at a time, the way a fit would be written without batching."""
+    estimates = []
+    for x, y in zip(snr, correct):
+        used = ~np.isnan(x)
+        x, y = x[used], y[used]
+
+        def loss(theta):
+            p = staircase.psychometric(x, theta[0], np.exp(theta[1]), psychofit.GUESS, psychofit.LAPSE)
+            p = np.clip(p, 1e-12, 1 - 1e-12)
+            prior = ((theta[0] - psychofit.PRIOR_MIDPOINT[0]) / psychofit.PRIOR_MIDPOINT[1]) ** 2 + \
+                ((theta[1] - psychofit.PRIOR_LOG_SLOPE[0]) / psychofit.PRIOR_LOG_SLOPE[1]) ** 2
+            return -np.where(y, np.log(p), np.log1p(-p)).sum() + 0.5 * prior
+
+        estimates.append(minimize(loss, [x.mean(), psychofit.PRIOR_LOG_SLOPE[0]], method="BFGS").x[0])
+    return np.array(estimates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched psychometric fitting benchmark")
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--loop", type=int, default=200, help="Sessions fitted one at a time for comparison")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    midpoints = rng.normal(-8.0, 1.6, args.sessions)
+    slopes = np.exp(rng.normal(np.log(0.8), 0.3, args.sessions))
+    track = staircase.simulate(-8.0, 0.0, midpoints, slopes, down=DIAGNOSIS_DOWN,
+                               max_trials=DIAGNOSIS_TRIALS, rng=rng, record_trials=True)
+    snr, correct = track["trial_snr"], track["trial_correct"]
+
+    start = time.perf_counter()
+    fit = psychofit.fit(snr, correct)
+    batch = time.perf_counter() - start
+
+    n = min(args.loop, args.sessions)
+    start = time.perf_counter()
+    looped = loop_fit(snr[:n], correct[:n])
+    loop = time.perf_counter() - start
+
+    error = fit["snr50"] - midpoints
+    track_error = track["threshold"] - staircase.snr_at(staircase.target_probability(DIAGNOSIS_DOWN),
+                                                         midpoints, slopes)
+    low, high = fit["snr50_ci"][:, 0], fit["snr50_ci"][:, 1]
+    print(f"{args.sessions} sessions x {DIAGNOSIS_TRIALS} trials: batch fit {batch:.2f} s "
+          f"({1e6 * batch / args.sessions:.0f} us/session, {np.median(fit['iterations']):.0f} iterations median, "
+          f"{fit['converged'].mean():.1%} converged)")
+    print(f"scipy loop over {n} sessions {loop:.2f} s ({1e6 * loop / n:.0f} us/session), "
+          f"max |difference| {np.abs(looped - fit['snr50'][:n]).max():.3f} dB")
+    print(f"SNR-50 bias {error.mean():+.2f} dB, RMSE {np.sqrt((error ** 2).mean()):.2f} dB "
+          f"(track threshold RMSE {np.sqrt((track_error ** 2).mean()):.2f} dB), "
+          f"95% interval coverage {((low <= midpoints) & (midpoints <= high)).mean():.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# rerun_timing.py
+# Times cold start and per-interaction reruns of the app for every tab, headlessly.
+#
+# Usage: python benchmarks/rerun_timing.py [--script ULIPlus.py] [--reruns 20]
+# Run it once on the old revision and once on the new one to compare.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TABS = ["Profile", "Screener", "Diagnosis", "Fitting", "Monitoring", "Summary"]
+
+
+def _open(script):
+    at = AppTest.from_file(script, default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    return at, time.perf_counter() - start
+
+
+def _click(at, label):
+    next(b for b in at.button if b.label == label).click()
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start
+
+
+def cold_start(script):
+    """First run in a fresh interpreter, so module imports are part of the cost."""
+    code = (
+        "import sys, json; sys.path.insert(0, %r); import benchmarks.rerun_timing as r; "
+        "at, t = r._open(%r); first = {'Profile': t}\n"
+        "for tab in r.TABS[1:]:\n"
+        "    first[tab] = r._click(at, tab)\n"
+        "print(json.dumps(first))" % (ROOT, script)
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def warm_reruns(script, reruns):
+    """Median rerun time with a tab open, once every module has been imported."""
+    at, _ = _open(script)
+    timings = {}
+    for tab in TABS:
+        _click(at, tab)
+        samples = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - start)
+        timings[tab] = statistics.median(samples)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit rerun timing per tab")
+    parser.add_argument("--script", default=os.path.join(ROOT, "ULIPlus.py"))
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    cold = cold_start(os.path.abspath(args.script))
+    warm = warm_reruns(os.path.abspath(args.script), args.reruns)
+    print(f"{'tab':<12}{'first open (ms)':>18}{'warm rerun (ms)':>18}")
+    for tab in TABS:
+        print(f"{tab:<12}{1000 * cold[tab]:>18.1f}{1000 * warm[tab]:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# session_memory.py
+# session_state memory of a long clinic session: Diagnosis and Fitting histories kept as
+# lists of result dicts (as the tabs used to) against the bounded RunHistory columns.
+#
+# Usage: python benchmarks/session_memory.py [--runs 1000] [--limit 100]
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scoring
+from instrumentation import deep_size
+from normative import NormativeEngine
+from sessionhistory import RunHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session history memory benchmark")
+    parser.add_argument("--runs", type=int, default=1000, help="Diagnosis runs, and Fitting runs per condition")
+    parser.add_argument("--limit", type=int, default=100, help="RunHistory retention")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    engine = NormativeEngine()
+    group = engine.group_for()
+    diagnosis_list, diagnosis_history = [], RunHistory(args.limit)
+    fitting_list = {key: [] for key in scoring.CONDITIONS}
+    fitting_history = {key: RunHistory(args.limit) for key in scoring.CONDITIONS}
+    spilled = 0
+    for _ in range(args.runs):
+        result = scoring.simulate_diagnosis(engine, group, rng)
+        diagnosis_list.append(result)
+        spilled += diagnosis_history.append(result["snr"], result["fit"], result["timestamp"], detail=result) is not None
+        for key in scoring.CONDITIONS:
+            fit = scoring.simulate_fitting("Noise" if key.endswith("noise") else "Quiet", rng)
+            fitting_list[key].append({"timestamp": result["timestamp"], "snr": fit["snr50"], "fit": fit})
+            spilled += fitting_history[key].append(fit["snr50"], fit) is not None
+
+    before = deep_size(diagnosis_list), deep_size(fitting_list)
+    after = deep_size(diagnosis_history), deep_size(fitting_history)
+    print(f"{args.runs} Diagnosis runs and {args.runs} Fitting runs per condition, retention {args.limit}")
+    print(f"lists of dicts:  diagnosis {before[0] / 1024:8.0f} KB, fitting {before[1] / 1024:8.0f} KB")
+    print(f"RunHistory:      diagnosis {after[0] / 1024:8.0f} KB, fitting {after[1] / 1024:8.0f} KB "
+          f"({spilled} runs spilled to the log)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# staircase_bench.py
+# Monte Carlo sweep of the adaptive staircase: test length and accuracy per setting,
+# plus the simulator's own throughput.
+#
+# Usage: python benchmarks/staircase_bench.py [--initial -4 -8 -12] [--criteria 0.5 1 2]
+#                                             [--listeners 10000] [--down 1]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import staircase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive staircase Monte Carlo benchmark")
+    parser.add_argument("--initial", type=float, nargs="+", default=[-4.0, -8.0, -12.0], help="initial thresholds (dB SNR)")
+    parser.add_argument("--criteria", type=float, nargs="+", default=[0.5, 1.0, 2.0], help="convergence criteria (dB)")
+    parser.add_argument("--listeners", type=int, default=10000, help="virtual listeners per setting")
+    parser.add_argument("--slope", type=float, default=0.8, help="psychometric slope (1/dB)")
+    parser.add_argument("--down", type=int, default=1, help="correct answers needed before the SNR drops")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = staircase.sweep(args.initial, args.criteria, listeners=args.listeners,
+                           slope=args.slope, down=args.down, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'initial':>8}{'criterion':>10}{'converged':>10}{'trials':>8}{'p95':>6}{'bias dB':>9}{'rmse dB':>9}")
+    for row in rows:
+        print(f"{row['initial_threshold']:>8.1f}{row['convergence_criteria']:>10.2f}{row['converged']:>10.1%}"
+              f"{row['trials_mean']:>8.1f}{row['trials_p95']:>6.0f}{row['bias']:>9.2f}{row['rmse']:>9.2f}")
+    trials = sum(row["trials_mean"] * row["listeners"] for row in rows)
+    print(f"\n{len(rows) * args.listeners} simulated tests, {trials:.0f} trials in {elapsed:.3f}s "
+          f"({trials / elapsed:,.0f} trials/s)")
+
+
+if __name__ == "__main__":
+    main()
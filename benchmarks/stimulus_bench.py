@@ -0,0 +1,62 @@
+# stimulus_bench.py
+# Per-trial stimulus preparation latency for the memory-mapped stimulus bank, using
+# synthetic waveforms and staircase-like SNR sequences from many concurrent listeners.
+#
+# Usage: python benchmarks/stimulus_bench.py [--listeners 64] [--trials 40] [--cache 256]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stimuli import StimulusBank, build_bank, synthetic_corpus
+
+
+def _listener(bank, seed, trials):
+    rng = np.random.default_rng(seed)
+    snr, step = -8.0, 4.0
+    for _ in range(trials):
+        bank.mix(rng.choice(bank.tokens), snr)
+        # Random walk on the staircase grid, halving the step down to 0.5 dB
+        snr += step * rng.choice([-1, 1])
+        step = max(step / 2, 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stimulus bank preparation latency benchmark")
+    parser.add_argument("--listeners", type=int, default=64, help="concurrent virtual listeners")
+    parser.add_argument("--trials", type=int, default=40, help="trials per listener")
+    parser.add_argument("--cache", type=int, default=256, help="LRU size of the mix cache")
+    args = parser.parse_args()
+
+    tokens, noise, fs = synthetic_corpus(tokens=("ala", "omo", "iki", "asa", "ono", "iti"))
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "bank.f32")
+        build_bank(path, tokens, noise, fs)
+        bank = StimulusBank(path, cache_size=args.cache)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(lambda s: _listener(bank, s, args.trials), range(args.listeners)))
+        elapsed = time.perf_counter() - start
+
+        batch_start = time.perf_counter()
+        bank.mix_many("ala", np.arange(-20, 10.5, 0.5))
+        batch = time.perf_counter() - batch_start
+
+    stats = bank.stats()
+    total = args.listeners * args.trials
+    print(f"{total} trials in {elapsed:.3f}s ({total / elapsed:,.0f} trials/s)")
+    print(f"cache hits={stats['hits']} misses={stats['misses']} "
+          f"({stats['hits'] / max(1, stats['hits'] + stats['misses']):.1%} hit rate)")
+    print(f"preparation latency p50={1e6 * stats['latency_p50']:.0f}us "
+          f"p95={1e6 * stats['latency_p95']:.0f}us max={1e6 * stats['latency_max']:.0f}us")
+    print(f"mix_many: 61 SNRs in {1e3 * batch:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
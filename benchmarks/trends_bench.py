@@ -0,0 +1,82 @@
+# trends_bench.py
+# Cost of the Monitoring trends view as the check-in log grows: the initial catch-up,
+# resuming from the checkpoint, and one rerun after a single new check-in.
+#
+# Usage: python benchmarks/trends_bench.py [--patients 500] [--days 365]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trends import SLEEP_QUALITY, TrendEngine
+
+
+def checkin(rng, patient, when, kind):
+    record = {"timestamp": when.isoformat(), "patient": patient, "checkin_type": kind}
+    if kind == "Morning":
+        record.update(sleep_quality=SLEEP_QUALITY[rng.integers(5)], hours_slept="6–8",
+                      physical_readiness=int(rng.integers(11)), mental_readiness=int(rng.integers(11)))
+    elif kind == "Day":
+        record.update(listening_effort=int(rng.integers(11)), communication_success=int(rng.integers(11)),
+                      energy_current=int(rng.integers(11)))
+    else:
+        record.update(hearing_fatigue=int(rng.integers(11)), general_fatigue=int(rng.integers(11)),
+                      hearing_success=int(rng.integers(11)))
+    return json.dumps(record) + "\n"
+
+
+def write_log(path, patients, days, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1, 8)
+    with open(path, "w") as f:
+        for d in range(days):
+            for p in range(patients):
+                for hour, kind in ((0, "Morning"), (5, "Day"), (13, "Evening")):
+                    f.write(checkin(rng, f"Patient {p}", start + timedelta(days=d, hours=hour), kind))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental Monitoring trends benchmark")
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "daily_log.json")
+    write_log(path, args.patients, args.days)
+    lines = 3 * args.patients * args.days
+
+    start = time.perf_counter()
+    first_engine = TrendEngine(path)
+    first_engine.update()
+    first_engine.save()
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = TrendEngine(path)
+    engine.update()
+    resumed = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    samples = []
+    for i in range(50):
+        with open(path, "a") as f:
+            f.write(checkin(rng, "Patient 0", datetime(2025, 1, 1) + timedelta(days=args.days, minutes=i), "Day"))
+        start = time.perf_counter()
+        engine.update()
+        engine.trends("Patient 0")
+        samples.append(time.perf_counter() - start)
+
+    print(f"{lines} check-ins ({os.path.getsize(path) / 2 ** 20:.0f} MB), "
+          f"checkpoint {os.path.getsize(engine.checkpoint) / 2 ** 20:.1f} MB")
+    print(f"first catch-up and checkpoint {first:.2f} s, resume from checkpoint {1000 * resumed:.0f} ms, "
+          f"rerun after one new check-in {1000 * np.median(samples):.1f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
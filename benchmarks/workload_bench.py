@@ -0,0 +1,203 @@
+# workload_bench.py
+# Times the ingest, query and analytics paths on a seeded synthetic corpus (see workload.py),
+# so storage and analytics changes can be measured against the same data every time.
+#
+# Usage: python benchmarks/workload_bench.py [--preset small] [--seed 0] [--baseline FILE]
+#        python benchmarks/workload_bench.py --preset medium --save-baseline --baseline medium.json
+# Every timing is in milliseconds and lower is better; a run is compared against --baseline
+# when that file exists (recorded with the same preset and seed, on the same machine).
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import confusion
+import logsegments
+import workload
+from audiogram import AudiogramTable
+from logwriter import BatchedLogWriter
+from normdb import NormativeDB
+from profilestore import ProfileStore
+from recordstore import LOG_FILES, RecordStore
+from summaryview import SummaryView
+from trends import TrendEngine
+
+QUERY_PATIENTS = 200     # patients sampled for the per-patient queries
+
+
+class Timings:
+    """Named wall-clock timings (ms), in the order they were taken."""
+
+    def __init__(self):
+        self.ms = {}
+
+    def add(self, name, seconds):
+        self.ms[name] = round(self.ms.get(name, 0.0) + 1000 * seconds, 2)
+
+    def time(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.add(name, time.perf_counter() - start)
+        return result
+
+    def each(self, name, func, items):
+        """Times ``func`` on every item; records the median and p99 as ``name.p50``/``name.p99``."""
+        samples = []
+        for item in items:
+            start = time.perf_counter()
+            func(item)
+            samples.append(1000 * (time.perf_counter() - start))
+        self.ms[f"{name}.p50"] = round(float(np.percentile(samples, 50)), 3)
+        self.ms[f"{name}.p99"] = round(float(np.percentile(samples, 99)), 3)
+
+
+def ingest(root, records, patients, days, seed, t):
+    """Appends the generated batches through a RecordStore, timing generation and writes apart."""
+    store = RecordStore(root)
+    written = dict.fromkeys(workload.KINDS, 0)
+    latest = {}
+    batches = workload.generate(records, patients, days, seed)
+    while True:
+        start = time.perf_counter()
+        kind, batch = next(batches, (None, None))
+        t.add("ingest.generate", time.perf_counter() - start)
+        if kind is None:
+            break
+        t.time("ingest.append", store.append_many, kind, batch)
+        written[kind] += len(batch)
+        if kind == "profile":
+            latest.update((profile["name"], profile) for profile in batch)
+    profiles = ProfileStore(os.path.join(root, "profiles"))
+    t.time("ingest.profile_saves", lambda: [profiles.save(p) for p in latest.values()])
+    return written, profiles
+
+
+def queries(root, people, rng, t):
+    """Index load, per-patient history and latest, a one-week window, and streaming scans."""
+    store = RecordStore(root)
+    t.time("query.index_load", store.patients)
+    sample = rng.choice(people, min(QUERY_PATIENTS, len(people)), replace=False).tolist()
+    t.each("query.history", store.history, sample)
+    t.each("query.latest_diagnosis", lambda p: store.latest("diagnosis", p), sample)
+    week = ("2025-02-01", "2025-02-07T23:59:59")
+    t.time("query.window_week", store.window, *week)
+    path = store.data_path("diagnosis")
+    t.time("query.scan_diagnosis", lambda: sum(1 for _ in logsegments.read_log(path)))
+    t.time("query.scan_diagnosis_week", lambda: sum(1 for _ in logsegments.read_log(path, *week)))
+    return store
+
+
+def analytics(root, store, profiles, people, rng, t):
+    """Trends, learned norms, audiograms, phoneme confusions and the materialized summaries."""
+    trends = TrendEngine(store.data_path("monitoring"), checkpoint=os.path.join(root, "bench.trends"))
+    t.time("analytics.trends_build", trends.update)
+    sample = rng.choice(people, min(QUERY_PATIENTS, len(people)), replace=False).tolist()
+    t.each("analytics.trends_patient", trends.trends, sample)
+    db = NormativeDB(store.data_path("diagnosis"), profiles, checkpoint=os.path.join(root, "bench.norms"))
+    t.time("analytics.norms_build", db.build)
+    table = t.time("analytics.audiogram_load", AudiogramTable.from_log, store.data_path("profile"))
+    t.time("analytics.audiogram_summary", table.summary)
+    t.time("analytics.confusion_report", lambda: confusion.clinic_report(confusion.read_log(store.data_path("diagnosis"))))
+    view = SummaryView(store, os.path.join(root, "summaries"))
+    t.time("analytics.summaries_rebuild", view.rebuild)
+    return view
+
+
+def live_ingest(root, view, records, patients, days, seed, t):
+    """Saves through the background log writer, then folds the new records into the summaries."""
+    writer = BatchedLogWriter(RecordStore(root))
+    batches = list(workload.generate(records, patients, days, seed + 1))
+    start = time.perf_counter()
+    for kind, batch in batches:
+        for record in batch:
+            writer.submit(kind, record)
+    writer.flush()
+    t.add("live.submit_and_flush", time.perf_counter() - start)
+    writer.close()
+    t.time("live.summaries_update", view.update)
+    return sum(len(batch) for _, batch in batches)
+
+
+def run(root, records, patients, days, seed):
+    t = Timings()
+    rng = np.random.default_rng(seed)
+    written, profiles = ingest(root, records, patients, days, seed, t)
+    people = workload.cohort(patients, seed)["name"]
+    store = queries(root, people, rng, t)
+    view = analytics(root, store, profiles, people, rng, t)
+    live = live_ingest(root, view, max(records // 100, 1000), patients, days, seed, t)
+    sizes = {kind: logsegments.disk_usage(store.data_path(kind)) for kind in LOG_FILES}
+    return {
+        "records": sum(written.values()), "patients": patients, "days": days, "seed": seed,
+        "cpus": os.cpu_count(), "written": written, "live_records": live,
+        "log_mb": round(sum(s["uncompressed"] for s in sizes.values()) / 2 ** 20, 1),
+        "disk_mb": round(sum(s["active"] + s["compressed"] for s in sizes.values()) / 2 ** 20, 1),
+        "timings_ms": t.ms,
+    }
+
+
+def compare(report, baseline, tolerance, floor_ms=1.0):
+    """Timings slower than the baseline by more than ``tolerance`` (and by more than ``floor_ms``)."""
+    regressions = []
+    for name, base in baseline.get("timings_ms", {}).items():
+        current = report["timings_ms"].get(name)
+        if current is not None and current > base * (1 + tolerance) and current - base > floor_ms:
+            regressions.append(f"{name}: {base} -> {current} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest, query and analytics benchmark on a synthetic corpus")
+    parser.add_argument("--preset", default="small", choices=list(workload.PRESETS))
+    parser.add_argument("--records", type=int, help="Overrides the preset's record count")
+    parser.add_argument("--patients", type=int, help="Overrides the preset's patient count")
+    parser.add_argument("--days", type=int, help="Overrides the preset's time span")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", help="Directory for the corpus (default: a new temporary one)")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    args = parser.parse_args()
+
+    records, patients, days = workload.preset(args.preset)
+    records, patients, days = args.records or records, args.patients or patients, args.days or days
+    root = args.root or tempfile.mkdtemp(prefix="uliplus-workload-")
+    if os.path.exists(os.path.join(root, LOG_FILES["diagnosis"])):
+        parser.error(f"{root} already holds a corpus; give an empty --root")
+    report = dict(run(root, records, patients, days, args.seed), preset=args.preset)
+
+    written = report["written"]
+    print(f"{report['records']} records from {patients} patients over {days} days (seed {args.seed}) in {root}: "
+          + ", ".join(f"{kind} {n}" for kind, n in written.items()))
+    print(f"{report['log_mb']} MB of JSON lines, {report['disk_mb']} MB on disk")
+    ingest_s = report["timings_ms"]["ingest.append"] / 1000
+    print(f"ingest: {report['records'] / ingest_s:.0f} records/s appended "
+          f"(generation {report['timings_ms']['ingest.generate'] / 1000:.1f} s not counted)")
+    print(f"{'timing':<36}{'ms':>12}")
+    for name, ms in report["timings_ms"].items():
+        print(f"{name:<36}{ms:>12}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print("baseline written to", args.baseline)
+    elif args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get("records"), baseline.get("seed")) != (report["records"], report["seed"]):
+            print("baseline was recorded on a different corpus; comparing anyway")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print("regression:", line)
+        if regressions:
+            sys.exit(1)
+        print("no regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# benefit.py
+# Aided benefit (unaided minus aided SNR, dB; positive is better) per patient and environment,
+# with t or bootstrap-t intervals and significance tests, for one session or a whole clinic.
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.special import stdtr, stdtrit
+
+import logsegments
+from recordstore import patient_key
+from scoring import ENVIRONMENTS, condition_key
+
+RESAMPLES = 2000   # bootstrap resamples per estimate
+ALPHA = 0.05       # two-sided significance level, and 1 - the interval's coverage
+MIN_PAIRS = 3      # visits with both aided and unaided runs needed for the paired analysis
+BOOTSTRAP_MIN_N = 8  # runs per arm (or pairs) below which the interval is the t interval, not bootstrap-t
+SE_FLOOR = 0.25    # resampled standard errors are floored at this fraction of the observed one
+
+
+def visit(timestamp):
+    """The visit a run belongs to: its calendar day ("" when unknown)."""
+    return str(timestamp or "")[:10]
+
+
+def _rng(seed, key):
+    """A bootstrap generator that depends only on the seed and the patient, however the work is split."""
+    return np.random.default_rng([seed, zlib.crc32(str(key).encode("utf-8"))])
+
+
+def _visit_means(values, visits, keep):
+    """Mean of ``values`` per visit, for the sorted visits in ``keep``."""
+    visits = np.asarray(visits)
+    inside = np.isin(visits, keep)
+    index = np.searchsorted(keep, visits[inside])
+    return np.bincount(index, values[inside], len(keep)) / np.bincount(index, minlength=len(keep))
+
+
+def _t_p_value(t, df):
+    """Two-sided p-value of a t statistic; stdtr spares the Fitting tab the second scipy.stats takes to import."""
+    return 2.0 * stdtr(df, -abs(t))
+
+
+def _t_interval(estimate, se, df):
+    """The (paired or Welch) t interval around ``estimate``."""
+    half = stdtrit(df, 1 - ALPHA / 2) * se
+    return [round(float(estimate - half), 2), round(float(estimate + half), 2)]
+
+
+def _studentized(estimate, se, boot, boot_se):
+    """
+    Bootstrap-t interval and two-sided p-value of no benefit: the resampled
+    estimates are studentized by their own standard errors. A resample that
+    repeats one value has a standard error near zero and would blow its t up,
+    so those are floored at SE_FLOOR of the observed one.
+    """
+    t = (boot - estimate) / np.maximum(boot_se, SE_FLOOR * se)
+    low, high = np.percentile(t, [100 * ALPHA / 2, 100 * (1 - ALPHA / 2)])
+    ci = [round(float(estimate - high * se), 2), round(float(estimate - low * se), 2)]
+    return ci, round(float(np.mean(np.abs(t) >= abs(estimate) / se)), 4)
+
+
+def visit_benefit(unaided, aided):
+    """
+    The benefit environment_benefit estimates, from per-visit totals of each
+    condition ({visit: [sum of SNRs, runs]}): the mean per-visit difference
+    over at least MIN_PAIRS shared visits, else the difference of the means
+    of all runs. SummaryView keeps these totals as records are saved.
+    """
+    visits = sorted(set(unaided) & set(aided) - {""})
+    if len(visits) >= MIN_PAIRS:
+        return float(np.mean([unaided[v][0] / unaided[v][1] - aided[v][0] / aided[v][1] for v in visits]))
+    u_sum, u_runs = np.sum(list(unaided.values()), axis=0)
+    a_sum, a_runs = np.sum(list(aided.values()), axis=0)
+    return float(u_sum / u_runs - a_sum / a_runs)
+
+
+def environment_benefit(unaided, aided, unaided_visits=None, aided_visits=None, rng=None, resamples=RESAMPLES):
+    """
+    Benefit in one environment from its unaided and aided SNRs (dB).
+
+    With the visit of every run and at least MIN_PAIRS visits that have
+    both, the runs are averaged per visit and paired: the benefit is the
+    mean per-visit difference, bootstrapped over visits and tested with a
+    paired t-test. Otherwise (one live session, say) the two sets of runs
+    are resampled independently and compared with Welch's t-test.
+
+    With fewer than BOOTSTRAP_MIN_N pairs, or runs in the smaller arm, the
+    interval is the t-test's own, since a bootstrap of three values has
+    too few distinct resamples to studentize. From there on it is a
+    bootstrap-t interval (see _studentized), with every resample drawn at
+    once as an index matrix; "interval" says which one was used.
+
+    Returns None without runs in both conditions; with a single run in
+    either, only the point estimate.
+    """
+    unaided, aided = np.asarray(unaided, dtype=float), np.asarray(aided, dtype=float)
+    if not unaided.size or not aided.size:
+        return None
+    rng = np.random.default_rng() if rng is None else rng
+    result = {"benefit": round(float(unaided.mean() - aided.mean()), 2), "ci": None, "p_value": None,
+              "p_bootstrap": None, "significant": None, "method": "single", "interval": None,
+              "unaided": int(unaided.size), "aided": int(aided.size), "pairs": 0}
+
+    if unaided_visits is not None and aided_visits is not None:
+        visits = np.array(sorted(set(unaided_visits) & set(aided_visits) - {""}))
+        if len(visits) >= MIN_PAIRS:
+            differences = _visit_means(unaided, unaided_visits, visits) - _visit_means(aided, aided_visits, visits)
+            n = len(differences)
+            result.update(benefit=round(float(differences.mean()), 2), method="paired", pairs=n)
+            se = differences.std(ddof=1) / np.sqrt(n)
+
+            def paired_draws():
+                draws = differences[rng.integers(n, size=(resamples, n))]
+                return draws.mean(axis=1), draws.std(axis=1, ddof=1) / np.sqrt(n)
+            return _tested(result, differences.mean(), se, n - 1, n, paired_draws)
+
+    if unaided.size < 2 or aided.size < 2:
+        return result
+    result["method"] = "unpaired"
+    u_var, a_var = unaided.var(ddof=1) / unaided.size, aided.var(ddof=1) / aided.size
+    se = np.sqrt(u_var + a_var)
+    # Welch-Satterthwaite degrees of freedom
+    df = (u_var + a_var) ** 2 / (u_var ** 2 / (unaided.size - 1) + a_var ** 2 / (aided.size - 1)) if se > 0 else None
+
+    def unpaired_draws():
+        u_draws = unaided[rng.integers(unaided.size, size=(resamples, unaided.size))]
+        a_draws = aided[rng.integers(aided.size, size=(resamples, aided.size))]
+        return (u_draws.mean(axis=1) - a_draws.mean(axis=1),
+                np.sqrt(u_draws.var(axis=1, ddof=1) / unaided.size + a_draws.var(axis=1, ddof=1) / aided.size))
+    return _tested(result, unaided.mean() - aided.mean(), se, df, min(unaided.size, aided.size), unpaired_draws)
+
+
+def _tested(result, estimate, se, df, n, draw):
+    """
+    Fills in the interval and tests. The t-test (paired or Welch, on ``df``
+    degrees of freedom) decides significance; ``draw()`` gives the bootstrap
+    estimates and their standard errors, and is only called from
+    BOOTSTRAP_MIN_N on.
+    """
+    if se == 0:   # every run the same: no spread to test against
+        p_value = float(estimate == 0)
+        result.update(ci=[round(float(estimate), 2)] * 2, p_value=p_value, p_bootstrap=p_value,
+                      significant=bool(p_value < ALPHA), interval="none")
+        return result
+    p_value = float(_t_p_value(estimate / se, df))
+    if n < BOOTSTRAP_MIN_N:
+        ci, p_bootstrap, interval = _t_interval(estimate, se, df), None, "t"
+    else:
+        ci, p_bootstrap = _studentized(estimate, se, *draw())
+        interval = "bootstrap-t"
+    result.update(ci=ci, p_value=round(p_value, 4), p_bootstrap=p_bootstrap, significant=bool(p_value < ALPHA),
+                  interval=interval)
+    return result
+
+
+def patient_benefit(runs, rng=None, resamples=RESAMPLES):
+    """
+    Benefit in every environment with runs in both modes. ``runs`` maps a
+    condition key ("aided_noise", ...) to a list of SNRs, or to (SNRs,
+    visits) when the runs span visits. Returns {environment: result}.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    results = {}
+    for env in ENVIRONMENTS:
+        unaided = runs.get(f"unaided_{env.lower()}")
+        aided = runs.get(f"aided_{env.lower()}")
+        if unaided is None or aided is None:
+            continue
+        unaided, unaided_visits = unaided if isinstance(unaided, tuple) else (unaided, None)
+        aided, aided_visits = aided if isinstance(aided, tuple) else (aided, None)
+        result = environment_benefit(unaided, aided, unaided_visits, aided_visits, rng, resamples)
+        if result is not None:
+            results[env.lower()] = result
+    return results
+
+
+def history_runs(records):
+    """(SNRs, visits) per condition from saved fitting_log_extended.json records."""
+    runs = {}
+    for record in records:
+        try:
+            key = condition_key(record.get("mode"), record.get("environment"))
+        except ValueError:
+            continue
+        if isinstance(record.get("snr"), (int, float)):
+            snrs, visits = runs.setdefault(key, ([], []))
+            snrs.append(float(record["snr"]))
+            visits.append(visit(record.get("timestamp")))
+    return runs
+
+
+# --- Batch mode ---
+def _collect(path, segment, start, end):
+    """Runs per patient in one share of the log: {key: [name, {condition: (snrs, visits)}]}."""
+    patients = {}
+    for _, _, raw in logsegments.iter_share(path, segment, start, end):
+        try:
+            record = json.loads(raw)
+            key = patient_key(record)
+            condition = condition_key(record.get("mode"), record.get("environment"))
+        except (ValueError, AttributeError):
+            continue
+        snr = record.get("snr")
+        if not key or not isinstance(snr, (int, float)):
+            continue
+        entry = patients.setdefault(key, [str(record.get("patient") or record.get("name")).strip(), {}])
+        snrs, visits = entry[1].setdefault(condition, ([], []))
+        snrs.append(float(snr))
+        visits.append(visit(record.get("timestamp")))
+    return patients
+
+
+def _evaluate(patients, seed, resamples):
+    """Benefit of a chunk of patients: [(key, name, {environment: result})]."""
+    return [(key, name, patient_benefit(runs, _rng(seed, key), resamples)) for key, name, runs in patients]
+
+
+def clinic_benefit(path="fitting_log_extended.json", workers=None, seed=0, resamples=RESAMPLES):
+    """
+    Benefit of every patient in a Fitting log (all segments). Reading the
+    log and the statistics are both spread over a pool of ``workers``
+    processes; each patient's bootstrap is seeded from ``seed`` and the
+    patient, so results do not depend on the split.
+    Returns {patient key: {"patient": name, environment: result, ...}}.
+    """
+    workers = workers or os.cpu_count() or 1
+    shares, _ = logsegments.shares(path, workers)
+    pool = ProcessPoolExecutor(workers) if workers > 1 and shares else None
+    try:
+        if pool is None:
+            parts = [_collect(path, *share) for share in shares]
+        else:
+            parts = list(pool.map(_collect, [path] * len(shares), *zip(*shares)))
+        merged = {}
+        for part in parts:
+            for key, (name, runs) in part.items():
+                entry = merged.setdefault(key, [name, {}])
+                for condition, (snrs, visits) in runs.items():
+                    have = entry[1].setdefault(condition, ([], []))
+                    have[0].extend(snrs)
+                    have[1].extend(visits)
+        patients = [(key, name, runs) for key, (name, runs) in sorted(merged.items())
+                    if any(c.startswith("aided") for c in runs) and any(c.startswith("unaided") for c in runs)]
+        size = max(1, -(-len(patients) // (4 * workers)))
+        chunks = [patients[i:i + size] for i in range(0, len(patients), size)]
+        if pool is None:
+            evaluated = [_evaluate(chunk, seed, resamples) for chunk in chunks]
+        else:
+            evaluated = list(pool.map(_evaluate, chunks, [seed] * len(chunks), [resamples] * len(chunks)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return {key: dict(results, patient=name) for chunk in evaluated for key, name, results in chunk}
+
+
+def clinic_report(results):
+    """Per environment: patients evaluated, median benefit, and how many gained or lost significantly."""
+    report = {}
+    for env in ENVIRONMENTS:
+        rows = [r[env.lower()] for r in results.values() if env.lower() in r]
+        if not rows:
+            continue
+        tested = [r for r in rows if r["significant"] is not None]
+        report[env.lower()] = {
+            "patients": len(rows),
+            "tested": len(tested),
+            "median_benefit": round(float(np.median([r["benefit"] for r in rows])), 2),
+            "significant_benefit": sum(r["significant"] and r["benefit"] > 0 for r in tested),
+            "significant_loss": sum(r["significant"] and r["benefit"] < 0 for r in tested),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from recordstore import RecordStore
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    start = time.perf_counter()
+    results = clinic_benefit(RecordStore(root).data_path("fitting"))
+    print(f"{len(results)} patients with aided and unaided runs, evaluated in {time.perf_counter() - start:.1f} s")
+    print(json.dumps(clinic_report(results), indent=2))
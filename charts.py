@@ -0,0 +1,161 @@
+# charts.py
+# Rendering layer for the Diagnosis, Fitting and Monitoring plots: cached PNGs and native charts.
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+from instrumentation import timer
+
+
+def _fingerprint(digest, value):
+    if isinstance(value, np.ndarray):
+        digest.update(str((value.dtype, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _fingerprint(digest, item)
+        digest.update(b"]")
+    elif isinstance(value, dict):
+        _fingerprint(digest, list(value.items()))
+    else:
+        digest.update(repr(value).encode())
+        digest.update(b"|")
+
+
+def chart_key(*inputs):
+    """Stable key for a chart built from the given input data."""
+    digest = hashlib.sha1()
+    _fingerprint(digest, inputs)
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """
+    Bounded LRU of rendered PNGs keyed by the chart's input data.
+
+    Figures are built with matplotlib.figure.Figure rather than pyplot, so they
+    never enter pyplot's global registry. Each one is cleared right after it is
+    rendered, and only the PNG bytes are kept.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or config.CHART_CACHE_ENTRIES
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, draw, figsize=None):
+        """Returns the PNG for ``key``, calling ``draw(fig)`` only when it is not cached."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        with timer("chart.render"):
+            from matplotlib.figure import Figure  # only the matplotlib backend pays for the import
+            fig = Figure(figsize=figsize)
+            try:
+                draw(fig)
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format="png", bbox_inches="tight")
+                image = buffer.getvalue()
+            finally:
+                fig.clear()
+                del fig
+
+        with self._lock:
+            self._images[key] = image
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+        return image
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "bytes": sum(len(image) for image in self._images.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# --- Diagnosis ---
+def diagnosis_png(cache, norm_x, norm_pdf, snr, error_proportion, labels):
+    """Normative curve with the patient's SNR, next to the error proportion bars (N/A where a category had no trials)."""
+    def draw(fig):
+        axs = fig.subplots(1, 2)
+        axs[0].plot(norm_x, norm_pdf, label="Normative Data")
+        axs[0].axvline(snr, color='red', linestyle='--', label="Your SNR")
+        axs[0].set_xlabel("SNR (dB)")
+        axs[0].set_ylabel("Probability Density")
+        axs[0].legend()
+
+        heights = [np.nan if p is None else p for p in error_proportion]
+        axs[1].bar(labels, heights)
+        for i, p in enumerate(error_proportion):
+            if p is None:  # no trials in that category
+                axs[1].text(i, 0, "N/A", ha="center", va="bottom", color="gray")
+        axs[1].set_ylabel("Error Proportion (%)")
+
+    key = chart_key("diagnosis", norm_x, norm_pdf, snr, error_proportion, labels)
+    return cache.get_or_render(key, draw, figsize=(12, 4))
+
+
+# --- Fitting ---
+def fitting_png(cache, series):
+    """SNR per session for each condition; ``series`` maps label -> list of SNRs."""
+    def draw(fig):
+        ax = fig.subplots()
+        for label, snrs in series.items():
+            ax.plot(snrs, marker='o', label=label)
+        ax.set_ylabel("SNR (dB)")
+        ax.set_xlabel("Session")
+        ax.legend()
+
+    return cache.get_or_render(chart_key("fitting", series), draw)
+
+
+# --- Monitoring ---
+def trends_png(cache, daily):
+    """Daily means of the tracked check-in scores; ``daily`` maps label -> {ISO date: mean}."""
+    def draw(fig):
+        ax = fig.subplots()
+        for label, days in daily.items():
+            dates = sorted(days)
+            ax.plot([np.datetime64(d) for d in dates], [days[d] for d in dates], marker='o', label=label)
+        ax.set_ylabel("Daily mean (0-10)")
+        ax.set_ylim(0, 10)
+        ax.legend()
+        fig.autofmt_xdate()
+
+    return cache.get_or_render(chart_key("trends", daily), draw, figsize=(8, 3.5))
+
+
+def normative_spec(norm_x, norm_pdf, snr):
+    """Vega-Lite spec of the normative curve with the patient's SNR marked, for the native backend."""
+    x = {"field": "snr", "type": "quantitative", "title": "SNR (dB)"}
+    return {
+        "layer": [
+            {"data": {"values": [{"snr": float(v), "density": float(d)} for v, d in zip(norm_x, norm_pdf)]},
+             "mark": "line",
+             "encoding": {"x": x, "y": {"field": "density", "type": "quantitative", "title": "Probability Density"}}},
+            {"data": {"values": [{"snr": float(snr), "label": "Your SNR"}]},
+             "mark": {"type": "rule", "color": "red", "strokeDash": [6, 4], "size": 2},
+             "encoding": {"x": x, "tooltip": [{"field": "label"}, {"field": "snr", "title": "SNR (dB)"}]}},
+        ],
+    }
+
+
+def padded_series(series):
+    """Pads series of unequal length with NaN so they fit one native line chart."""
+    length = max((len(values) for values in series.values()), default=0)
+    return {label: list(values) + [float("nan")] * (length - len(values)) for label, values in series.items()}
@@ -0,0 +1,44 @@
+# config.py
+# Deployment settings, read once from environment variables.
+import os
+
+# "matplotlib" renders cached PNG figures; "native" uses Streamlit's built-in charts
+# for the simple line and bar plots
+CHART_BACKEND = os.environ.get("ULIPLUS_CHARTS", "matplotlib")
+
+# Rendered charts kept in memory per server process
+CHART_CACHE_ENTRIES = int(os.environ.get("ULIPLUS_CHART_CACHE_ENTRIES", "128"))
+
+# Per-rerun profiling; off unless ULIPLUS_PROFILE is set to something other than "0"
+PROFILING = os.environ.get("ULIPLUS_PROFILE", "0") not in ("", "0")
+
+# Where profiled reruns are appended, one JSON line each (rotated like the record logs)
+METRICS_FILE = os.environ.get("ULIPLUS_METRICS_FILE", "metrics.jsonl")
+
+# Port of the Prometheus-text /metrics endpoint; 0 leaves it off
+METRICS_PORT = int(os.environ.get("ULIPLUS_METRICS_PORT", "0"))
+
+# Diagnosis and Fitting runs each browser session keeps in memory per test; older runs
+# are spilled to session_history.json
+SESSION_HISTORY_LIMIT = int(os.environ.get("ULIPLUS_SESSION_HISTORY", "100"))
+
+# Size (MB) at which a JSON-lines log is closed into a compressed segment; 0 never rotates
+LOG_SEGMENT_BYTES = int(float(os.environ.get("ULIPLUS_LOG_SEGMENT_MB", "64")) * 2 ** 20)
+
+# Backend that drafts the Summary tab's clinical notes: "" (the default) leaves notes off and
+# hides the panel, "module:attribute" names a backend class or factory, and "stub" is a local,
+# deterministic template for tests and benchmarks only, never for patients
+NOTES_BACKEND = os.environ.get("ULIPLUS_NOTES_BACKEND", "")
+
+# Where finished notes are cached, how many are also kept in memory, and how many are
+# written at once
+NOTES_CACHE_DIR = os.environ.get("ULIPLUS_NOTES_CACHE_DIR", "notes_cache")
+NOTES_CACHE_ENTRIES = int(os.environ.get("ULIPLUS_NOTES_CACHE_ENTRIES", "256"))
+NOTES_WORKERS = int(os.environ.get("ULIPLUS_NOTES_WORKERS", "4"))
+
+# Seconds a note whose backend failed is shown as failed before a request tries it again
+NOTES_RETRY_SECONDS = float(os.environ.get("ULIPLUS_NOTES_RETRY_SECONDS", "60"))
+
+# Simulated latency of the stub backend: seconds to the first text, then between chunks
+NOTES_STUB_FIRST_TOKEN = float(os.environ.get("ULIPLUS_NOTES_STUB_FIRST_TOKEN", "0.5"))
+NOTES_STUB_PER_CHUNK = float(os.environ.get("ULIPLUS_NOTES_STUB_PER_CHUNK", "0.05"))
@@ -0,0 +1,197 @@
+# confusion.py
+# Phoneme confusion matrices for VCV trials and the error proportions derived from them.
+import json
+import warnings
+
+import numpy as np
+
+import logsegments
+
+VOWELS = ["a", "o", "i"]
+
+# Consonant -> (spectral region, voicing, manner, place)
+CONSONANTS = {
+    "m": ("Low", "voiced", "nasal", "labial"),
+    "n": ("Low", "voiced", "nasal", "alveolar"),
+    "l": ("Low", "voiced", "liquid", "alveolar"),
+    "r": ("Low", "voiced", "liquid", "alveolar"),
+    "b": ("Low", "voiced", "stop", "labial"),
+    "p": ("Low", "voiceless", "stop", "labial"),
+    "d": ("Mid", "voiced", "stop", "alveolar"),
+    "g": ("Mid", "voiced", "stop", "velar"),
+    "k": ("Mid", "voiceless", "stop", "velar"),
+    "v": ("Mid", "voiced", "fricative", "labiodental"),
+    "t": ("High", "voiceless", "stop", "alveolar"),
+    "f": ("High", "voiceless", "fricative", "labiodental"),
+    "s": ("High", "voiceless", "fricative", "alveolar"),
+    "z": ("High", "voiced", "fricative", "alveolar"),
+}
+BANDS = ["Low", "Mid", "High"]
+FEATURES = ["voicing", "manner", "place"]
+
+# Every VCV token uses the same vowel on both sides: "ala", "omo", "iki", ...
+TOKENS = [v + c + v for v in VOWELS for c in CONSONANTS]
+TOKEN_INDEX = {token: i for i, token in enumerate(TOKENS)}
+
+# Labels of the six error proportions shown on the Diagnosis tab
+ERROR_LABELS = VOWELS + BANDS
+
+
+def _tables():
+    vowel = np.array([VOWELS.index(t[0]) for t in TOKENS])
+    consonant = [t[1:-1] for t in TOKENS]
+    band = np.array([BANDS.index(CONSONANTS[c][0]) for c in consonant])
+    # Indicator matrices group token rows by target vowel and by consonant band
+    vowel_groups = np.eye(len(VOWELS))[vowel]
+    band_groups = np.eye(len(BANDS))[band]
+    # mismatch[f][i, j] is True when response j differs from target i on feature f
+    mismatch = {
+        "vowel": vowel[:, None] != vowel[None, :],
+        "consonant": np.array(consonant)[:, None] != np.array(consonant)[None, :],
+    }
+    for k, feature in enumerate(FEATURES, start=1):
+        values = np.array([CONSONANTS[c][k] for c in consonant])
+        mismatch[feature] = values[:, None] != values[None, :]
+    return vowel_groups, band_groups, {name: m.astype(np.float64) for name, m in mismatch.items()}
+
+
+VOWEL_GROUPS, BAND_GROUPS, MISMATCH = _tables()
+
+
+def _ratio(errors, totals):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(totals > 0, 100.0 * errors / totals, np.nan)
+
+
+def error_proportions(matrices):
+    """
+    Six error proportions (%) for one (n, n) matrix or a (sessions, n, n) stack:
+    vowel errors for targets a/o/i, then consonant errors for Low/Mid/High targets.
+    Categories without trials are NaN.
+    """
+    matrices = np.asarray(matrices)
+    totals = matrices.sum(axis=-1)
+    vowel_errors = np.einsum("...ij,ij->...i", matrices, MISMATCH["vowel"])
+    consonant_errors = np.einsum("...ij,ij->...i", matrices, MISMATCH["consonant"])
+    vowels = _ratio(vowel_errors @ VOWEL_GROUPS, totals @ VOWEL_GROUPS)
+    bands = _ratio(consonant_errors @ BAND_GROUPS, totals @ BAND_GROUPS)
+    return np.concatenate([vowels, bands], axis=-1)
+
+
+def feature_errors(matrices):
+    """Percentage of trials with voicing, manner and place errors (one column each)."""
+    matrices = np.asarray(matrices)
+    totals = matrices.sum(axis=(-2, -1))
+    return np.stack([_ratio(np.einsum("...ij,ij->...", matrices, MISMATCH[f]), totals) for f in FEATURES], axis=-1)
+
+
+class PhonemeConfusion:
+    """Target-by-response confusion counts for one session, updated as each trial arrives."""
+
+    def __init__(self):
+        self.counts = np.zeros((len(TOKENS), len(TOKENS)), dtype=np.int32)
+
+    def add(self, target, response):
+        self.counts[TOKEN_INDEX[target], TOKEN_INDEX[response]] += 1
+
+    def add_many(self, targets, responses):
+        targets = [TOKEN_INDEX[t] for t in targets]
+        responses = [TOKEN_INDEX[r] for r in responses]
+        np.add.at(self.counts, (targets, responses), 1)
+
+    @property
+    def trials(self):
+        return int(self.counts.sum())
+
+    def error_proportions(self):
+        return error_proportions(self.counts)
+
+    def feature_errors(self):
+        return dict(zip(FEATURES, feature_errors(self.counts).tolist()))
+
+
+def batch_matrices(records):
+    """
+    Rebuilds the confusion matrix of every record with a "trials" list
+    ([target, response, ...] per trial) in one pass. Trials with a token
+    outside TOKENS (from an older inventory, say) are skipped and counted.
+    Returns (records used, (sessions, n, n) counts, trials skipped).
+    """
+    used, sessions, targets, responses = [], [], [], []
+    skipped = 0
+    for record in records:
+        trials = record.get("trials") or []
+        known = [(TOKEN_INDEX[trial[0]], TOKEN_INDEX[trial[1]]) for trial in trials
+                 if trial[0] in TOKEN_INDEX and trial[1] in TOKEN_INDEX]
+        skipped += len(trials) - len(known)
+        if not known:
+            continue
+        s = len(used)
+        used.append(record)
+        for target, response in known:
+            sessions.append(s)
+            targets.append(target)
+            responses.append(response)
+    counts = np.zeros((len(used), len(TOKENS), len(TOKENS)), dtype=np.int32)
+    np.add.at(counts, (np.array(sessions, dtype=np.intp), np.array(targets, dtype=np.intp),
+                       np.array(responses, dtype=np.intp)), 1)
+    return used, counts, skipped
+
+
+def read_log(path="diagnosis_log.json"):
+    """Streams the records of a JSON-lines log, closed segments included, skipping lines that do not parse."""
+    return logsegments.read_log(path)
+
+
+def simulate_responses(correct, rng):
+    """
+    Targets and responses for simulated trials, until the test UI reports real ones.
+    Errors pick a random other token that shares the vowel or the consonant.
+    """
+    targets = rng.choice(TOKENS, size=len(correct))
+    responses = []
+    for target, ok in zip(targets, correct):
+        if ok:
+            responses.append(target)
+            continue
+        vowel, consonant = target[0], target[1:-1]
+        if rng.random() < 0.3:
+            v = rng.choice([x for x in VOWELS if x != vowel])
+            responses.append(v + consonant + v)
+        else:
+            c = rng.choice([x for x in CONSONANTS if x != consonant])
+            responses.append(vowel + c + vowel)
+    return [str(t) for t in targets], responses
+
+
+def _report_values(labels, values):
+    """Labels to values rounded to 0.1; None where no session had trials (NaN is not JSON)."""
+    return {label: None if np.isnan(value) else round(float(value), 1) for label, value in zip(labels, values)}
+
+
+def clinic_report(records):
+    """
+    Mean error proportions and feature errors over every session with trial
+    data; a category no session tested is None.
+    """
+    used, counts, skipped = batch_matrices(records)
+    if not used:
+        return {"sessions": 0, "skipped_trials": skipped}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # "Mean of empty slice" for untested categories
+        proportions = np.nanmean(error_proportions(counts), axis=0)
+        features = np.nanmean(feature_errors(counts), axis=0)
+    return {
+        "sessions": len(used),
+        "trials": int(counts.sum()),
+        "skipped_trials": skipped,
+        "error_proportion": _report_values(ERROR_LABELS, proportions),
+        "feature_errors": _report_values(FEATURES, features),
+        "pooled_error_proportion": _report_values(ERROR_LABELS, error_proportions(counts.sum(axis=0))),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(json.dumps(clinic_report(read_log(*sys.argv[1:2])), indent=2))
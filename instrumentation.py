@@ -0,0 +1,260 @@
+# instrumentation.py
+# Per-rerun timing and memory metrics, written to a local file and optionally served
+# as Prometheus text. Everything is a no-op unless profiling is enabled in config.
+import atexit
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+import logsegments
+from fileutil import locked
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_SESSIONS = 256
+TOP_KEYS = 5             # largest session_state keys listed in each rerun record
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Series:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+def deep_size(obj, _seen=None):
+    """Approximate memory held by an object graph (bytes), counting shared objects once."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):  # NumPy arrays own a buffer getsizeof may not see
+        size = max(size, nbytes)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, s), seen) for s in obj.__slots__ if hasattr(obj, s))
+    return size
+
+
+class Profiler:
+    """
+    Collects timings of named operations. Timings made inside rerun() are
+    also grouped per rerun, and each rerun is appended to the metrics file as
+    one JSON line; past LOG_SEGMENT_BYTES the file is rotated into compressed
+    segments like the record logs. When disabled, timer() returns a shared
+    no-op context manager.
+    """
+
+    def __init__(self, enabled=False, metrics_file=None, port=0):
+        self.enabled = enabled
+        self.metrics_file = metrics_file
+        self._lock = threading.Lock()
+        self._series = {}
+        self._sessions = OrderedDict()   # session id -> session_state bytes
+        self._local = threading.local()  # the rerun running on this thread
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._server = None
+        self._gauges = {}
+        if enabled:
+            atexit.register(self.flush)
+            if port:
+                self.serve(port)
+
+    # --- Timing ---
+    def timer(self, name):
+        """Context manager timing the block under ``name``."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series()
+            series.add(seconds)
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run["timings"][name] = run["timings"].get(name, 0.0) + seconds
+
+    # --- Reruns ---
+    def rerun(self, session_id, tab, state=None):
+        """Context manager wrapping one script run of a session; ``state`` is sized afterwards."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Rerun(self, session_id, tab, state)
+
+    def _finish_rerun(self, run, seconds, state):
+        run["total"] = seconds
+        if state is not None:
+            state = dict(state)
+            seen = set()
+            sizes = {str(key): deep_size(value, seen) for key, value in state.items()}
+            run["session_bytes"] = sys.getsizeof(state) + sum(sizes.values())
+            run["session_keys"] = dict(sorted(sizes.items(), key=lambda item: -item[1])[:TOP_KEYS])
+            with self._lock:
+                self._sessions[run["session"]] = run["session_bytes"]
+                self._sessions.move_to_end(run["session"])
+                while len(self._sessions) > MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+        self.observe("rerun." + run["tab"], seconds)
+        with self._lock:
+            self._buffer.append(json.dumps(run))
+            due = len(self._buffer) >= 50 or time.monotonic() - self._last_flush > 5.0
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Appends buffered rerun records to the metrics file."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if lines and self.metrics_file:
+            # Every server process appends here; the lock keeps rotation from racing an append
+            with locked(logsegments.lock_path(self.metrics_file)):
+                with open(self.metrics_file, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                    size = f.tell()
+                if logsegments.needs_rotation(size):
+                    logsegments.rotate(self.metrics_file)
+
+    def add_gauges(self, prefix, read):
+        """Exports every numeric value of ``read()`` (a dict) as a gauge named uliplus_<prefix>_<key>."""
+        self._gauges[prefix] = read
+
+    # --- Export ---
+    def snapshot(self):
+        """Current aggregates: {name: {count, total, max}} and session memory."""
+        with self._lock:
+            return {
+                "timings": {name: {"count": s.count, "total": s.total, "max": s.max}
+                            for name, s in self._series.items()},
+                "session_bytes": dict(self._sessions),
+            }
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP uliplus_operation_seconds Time spent in instrumented operations.",
+            "# TYPE uliplus_operation_seconds histogram",
+        ]
+        with self._lock:
+            for name, s in sorted(self._series.items()):
+                for bound, count in zip(BUCKETS, s.buckets):
+                    lines.append(f'uliplus_operation_seconds_bucket{{op="{name}",le="{bound}"}} {count}')
+                lines.append(f'uliplus_operation_seconds_bucket{{op="{name}",le="+Inf"}} {s.count}')
+                lines.append(f'uliplus_operation_seconds_sum{{op="{name}"}} {s.total}')
+                lines.append(f'uliplus_operation_seconds_count{{op="{name}"}} {s.count}')
+            lines.append("# HELP uliplus_session_state_bytes Approximate session_state size per session.")
+            lines.append("# TYPE uliplus_session_state_bytes gauge")
+            for session, size in self._sessions.items():
+                lines.append(f'uliplus_session_state_bytes{{session="{session}"}} {size}')
+            lines.append("# HELP uliplus_session_state_bytes_total session_state size summed over tracked sessions.")
+            lines.append("# TYPE uliplus_session_state_bytes_total gauge")
+            lines.append(f"uliplus_session_state_bytes_total {sum(self._sessions.values())}")
+        for prefix, read in list(self._gauges.items()):
+            for key, value in read().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"# TYPE uliplus_{prefix}_{key} gauge")
+                    lines.append(f"uliplus_{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port):
+        """Serves prometheus_text() at http://<host>:<port>/metrics from a daemon thread."""
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = profiler.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("", port), Handler)
+        except OSError:
+            logger.warning("Metrics endpoint not started: port %d is in use", port)
+            return
+        threading.Thread(target=self._server.serve_forever, name="uliplus-metrics", daemon=True).start()
+
+
+class _Rerun:
+    def __init__(self, profiler, session_id, tab, state):
+        self.profiler = profiler
+        self.run = {"timestamp": time.time(), "session": session_id, "tab": tab, "timings": {}}
+        self.state = state
+
+    def __enter__(self):
+        self.profiler._local.run = self.run
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._local.run = None
+        self.profiler._finish_rerun(self.run, time.perf_counter() - self.start, self.state)
+        return False
+
+
+# One profiler per server process, configured from the environment
+PROFILER = Profiler(config.PROFILING, config.METRICS_FILE, config.METRICS_PORT)
+timer = PROFILER.timer
@@ -0,0 +1,323 @@
+# logsegments.py
+# Rotation of the JSON-lines logs into compressed segments, and readers that span them.
+#
+# A log such as diagnosis_log.json is the active segment. Once it passes
+# LOG_SEGMENT_BYTES it is closed: its lines move to diagnosis_log.json.00003.gz,
+# written as a series of independent gzip members ("blocks") of about BLOCK_BYTES
+# each, and its RecordStore index moves to diagnosis_log.json.00003.idx. Segments
+# are numbered from 0 and the active segment takes the next free number, so a
+# (segment, offset) position in the log never changes meaning.
+#
+# diagnosis_log.json.segments is the sparse index: one JSON line per closed
+# segment with its timestamp range, sizes and, per block, the uncompressed start
+# offset, the compressed offset and length, and the timestamp range.
+import bisect
+import json
+import os
+import re
+import zlib
+
+import config
+from fileutil import locked
+
+BLOCK_BYTES = 1 << 20
+GZIP_LEVEL = 6
+
+# Every record the app writes starts with its timestamp, which lets range scans
+# skip lines without parsing them; other lines are parsed and checked in full
+_LEADING_TIMESTAMP = re.compile(rb'\{"timestamp": "([^"\\]*)"')
+
+_manifests = {}  # manifest path -> (mtime_ns, size, segments)
+
+
+def manifest_path(path):
+    return path + ".segments"
+
+
+def lock_path(path):
+    return path + ".lock"
+
+
+def segment_path(path, segment):
+    return f"{path}.{segment:05d}.gz"
+
+
+def segment_index_path(path, segment):
+    return f"{path}.{segment:05d}.idx"
+
+
+def load_segments(path):
+    """The closed segments of a log, oldest first (re-read only when the manifest changes)."""
+    manifest = manifest_path(path)
+    try:
+        stat = os.stat(manifest)
+    except FileNotFoundError:
+        return []
+    cached = _manifests.get(manifest)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    segments = {}
+    with open(manifest) as f:
+        for line in f:
+            try:
+                segment = json.loads(line)
+            except ValueError:
+                continue  # torn line of an interrupted rotation; it is rewritten on recovery
+            segment["starts"] = [block[0] for block in segment["blocks"]]
+            segments[segment["segment"]] = segment
+    segments = [segments[n] for n in sorted(segments)]
+    _manifests[manifest] = (stat.st_mtime_ns, stat.st_size, segments)
+    return segments
+
+
+def active_segment(path):
+    """Number of the active (uncompressed) segment."""
+    segments = load_segments(path)
+    return segments[-1]["segment"] + 1 if segments else 0
+
+
+def _timestamp(raw):
+    match = _LEADING_TIMESTAMP.match(raw)
+    if match:
+        return match.group(1).decode() or None
+    try:
+        timestamp = json.loads(raw).get("timestamp")
+    except (ValueError, AttributeError):
+        return None
+    return timestamp if isinstance(timestamp, str) and timestamp else None
+
+
+def _overlaps(low, high, start, end):
+    """Whether [low, high] can hold timestamps in [start, end]; unknown bounds always can."""
+    if low is None or high is None:
+        return True
+    return (start is None or high >= start) and (end is None or low <= end)
+
+
+# --- Rotation ---
+def _compress(path, segment, source):
+    """Writes ``source`` (an uncompressed segment) as gzip blocks and records it in the manifest."""
+    blocks, first, last, records = [], None, None, 0
+    target = segment_path(path, segment)
+    with open(source, "rb") as src, open(target + ".tmp", "wb") as dst:
+        offset = 0
+        while True:
+            lines = src.readlines(BLOCK_BYTES)
+            if not lines:
+                break
+            data = b"".join(lines)
+            stamps = [t for t in map(_timestamp, lines) if t]
+            low, high = (min(stamps), max(stamps)) if stamps else (None, None)
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            member = compressor.compress(data) + compressor.flush()
+            blocks.append([offset, dst.tell(), len(member), low, high])
+            dst.write(member)
+            offset += len(data)
+            records += len(lines)
+            if stamps:
+                first = low if first is None else min(first, low)
+                last = high if last is None else max(last, high)
+        dst.flush()
+        os.fsync(dst.fileno())
+        compressed = dst.tell()
+    os.replace(target + ".tmp", target)
+    entry = {"segment": segment, "first": first, "last": last, "records": records, "bytes": offset,
+             "compressed": compressed, "blocks": blocks}
+    fd = os.open(manifest_path(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(entry) + "\n").encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.unlink(source)
+
+
+def recover(path):
+    """Finishes a rotation that was interrupted after the active segment was renamed. Hold the log's lock."""
+    segment = active_segment(path)
+    source = f"{path}.{segment:05d}"
+    if os.path.exists(source):
+        _compress(path, segment, source)
+
+
+def rotate(path, index_path=None):
+    """
+    Closes the active segment of a log: compresses it and moves its index
+    (``index_path``) alongside. The caller must hold the log's lock so no
+    writer appends during the move. Returns the closed segment's number, or
+    None when the active segment is empty.
+    """
+    recover(path)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    segment = active_segment(path)
+    source = f"{path}.{segment:05d}"
+    os.replace(path, source)
+    if index_path and os.path.exists(index_path):
+        os.replace(index_path, segment_index_path(path, segment))
+    _compress(path, segment, source)
+    return segment
+
+
+def needs_rotation(size):
+    return config.LOG_SEGMENT_BYTES > 0 and size >= config.LOG_SEGMENT_BYTES
+
+
+# --- Reading ---
+def read_block(path, segment, block):
+    """The uncompressed bytes of one block of a closed segment."""
+    _, offset, length = segment["blocks"][block][:3]
+    with open(segment_path(path, segment["segment"]), "rb") as f:
+        f.seek(offset)
+        return zlib.decompress(f.read(length), 31)
+
+
+def block_of(segment, offset):
+    """Index of the block holding an uncompressed offset of a closed segment."""
+    return max(bisect.bisect_right(segment["starts"], offset) - 1, 0)
+
+
+def iter_segment(path, segment, offset=0):
+    """Yields (end offset, raw line) for the lines of a closed segment from ``offset`` on."""
+    if offset >= segment["bytes"]:
+        return
+    for block in range(block_of(segment, offset), len(segment["blocks"])):
+        start = segment["starts"][block]
+        data = read_block(path, segment, block)
+        position = max(offset - start, 0)
+        while position < len(data):
+            end = data.find(b"\n", position) + 1 or len(data)
+            yield start + end, data[position:end]
+            position = end
+
+
+def shares(path, parts):
+    """
+    Splits a log for parallel readers: one share per closed segment, and the
+    active segment cut into up to ``parts`` byte ranges of at least 1 MB.
+    Returns ([(segment, start, end)], number of the active segment).
+    """
+    with locked(lock_path(path)):
+        segments = load_segments(path)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+    active = segments[-1]["segment"] + 1 if segments else 0
+    tasks = [(s["segment"], 0, s["bytes"]) for s in segments]
+    slices = max(1, min(parts, size // (1 << 20) + 1))
+    bounds = [size * i // slices for i in range(slices + 1)]
+    tasks += [(active, bounds[i], bounds[i + 1]) for i in range(slices) if size]
+    return tasks, active
+
+
+def iter_share(path, segment, start, end):
+    """Yields (segment, end offset, raw line) for the complete lines starting in one share of shares()."""
+    closed = {s["segment"]: s for s in load_segments(path)}
+    if segment in closed:  # also when the share was cut from a segment that has since been closed
+        for stop, raw in iter_segment(path, closed[segment]):
+            if start <= stop - len(raw) < end:
+                yield segment, stop, raw
+        return
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                f.readline()  # the line straddling the boundary belongs to the previous share
+        offset = f.tell()
+        for raw in f:
+            if offset >= end or not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            yield segment, offset, raw
+
+
+def iter_lines(path, segment=0, offset=0):
+    """
+    Yields (segment, end offset, raw line) for every line of a log after the
+    position (segment, offset), through the closed segments and on into the
+    active one. Stops before a line a writer has not finished.
+    """
+    with locked(lock_path(path)):
+        segments = load_segments(path)
+        active = segments[-1]["segment"] + 1 if segments else 0
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            f = None
+    try:
+        for closed in segments:
+            if closed["segment"] >= segment:
+                start = offset if closed["segment"] == segment else 0
+                for end, raw in iter_segment(path, closed, start):
+                    yield closed["segment"], end, raw
+        if f is not None and active >= segment:
+            position = offset if active == segment else 0
+            f.seek(position)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                position += len(raw)
+                yield active, position, raw
+    finally:
+        if f is not None:
+            f.close()
+
+
+def read_log(path, start=None, end=None):
+    """
+    Streams the records of a log, oldest segment first, decompressing as it
+    goes. With ``start``/``end`` (ISO timestamps) only records in that range
+    are yielded, and closed segments and blocks entirely outside it are
+    skipped unread, so a scan costs what the range holds plus the active
+    segment, not the whole history.
+    """
+    bounded = start is not None or end is not None
+    with locked(lock_path(path)):
+        segments = load_segments(path)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            f = None
+
+    start_bytes = start.encode() if start else None
+    end_bytes = end.encode() if end else None
+
+    def records(lines):
+        for raw in lines:
+            if bounded:
+                match = _LEADING_TIMESTAMP.match(raw)
+                if match and ((start_bytes and match.group(1) < start_bytes)
+                              or (end_bytes and match.group(1) > end_bytes)):
+                    continue
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            if bounded:
+                timestamp = record.get("timestamp")
+                if not isinstance(timestamp, str) or (start and timestamp < start) or (end and timestamp > end):
+                    continue
+            yield record
+
+    try:
+        for segment in segments:
+            if bounded and not _overlaps(segment["first"], segment["last"], start, end):
+                continue
+            for block, (_, _, _, low, high) in enumerate(segment["blocks"]):
+                if bounded and not _overlaps(low, high, start, end):
+                    continue
+                yield from records(read_block(path, segment, block).splitlines(keepends=True))
+        if f is not None:
+            yield from records(raw for raw in f if raw.endswith(b"\n"))
+    finally:
+        if f is not None:
+            f.close()
+
+
+def disk_usage(path):
+    """Bytes of a log on disk: the active segment and every closed one, as stored and uncompressed."""
+    segments = load_segments(path)
+    active = os.path.getsize(path) if os.path.exists(path) else 0
+    return {"segments": len(segments), "active": active,
+            "compressed": sum(s["compressed"] for s in segments),
+            "uncompressed": active + sum(s["bytes"] for s in segments)}
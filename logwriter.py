@@ -0,0 +1,187 @@
+# logwriter.py
+# Background writer that batches log records off the Streamlit script thread.
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from instrumentation import PROFILER
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+FLUSH_ATTEMPTS = 3   # failed writes of the pending records after which a flush() gives up
+
+
+class _Flush:
+    """A flush() waiting on the writer thread, and whether everything it waited for was written."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = True
+        self.attempts = 0
+
+
+class BatchedLogWriter:
+    """
+    Save handlers call submit() and return immediately; a daemon thread drains
+    the queue, groups the records by log, and appends each group to the
+    RecordStore with one write and one fsync per log per batch.
+
+    A batch closes once it holds ``max_batch`` records or ``max_delay``
+    seconds after its first record, whichever comes first. Records that fail
+    to write stay pending and are retried with the next batch; a flush()
+    waiting on them returns False after FLUSH_ATTEMPTS failed writes. close()
+    (also registered with atexit) writes everything still queued.
+
+    Listeners added with add_listener() are called on the writer thread with
+    (kind, records) once those records are on disk.
+    """
+
+    def __init__(self, store, max_batch=256, max_delay=0.05):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._pending = {}  # kind -> records not yet durable, kept across failed attempts
+        self._metrics_lock = threading.Lock()
+        self._flush_latencies = deque(maxlen=1024)
+        self._batches = 0
+        self._written = 0
+        self._failures = 0
+        self._pending_count = 0
+        self._listeners = []
+        self._closed = False
+        self._close_lock = threading.Lock()   # nothing is queued behind _STOP
+        self._thread = threading.Thread(target=self._run, name="uliplus-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Producer side ---
+    def submit(self, kind, record):
+        """Queues a record for the log of the given kind."""
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("The log writer has been closed.")
+            self._queue.put((kind, record))
+
+    def add_listener(self, callback):
+        """Calls ``callback(kind, records)`` after each group of records is written."""
+        self._listeners.append(callback)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every record submitted so far is on disk. Returns False on
+        timeout, after FLUSH_ATTEMPTS failed writes, or once closed if some
+        records could not be written.
+        """
+        with self._close_lock:
+            closed = self._closed
+            if not closed:
+                waiter = _Flush()
+                self._queue.put(waiter)
+        if closed:
+            # Nothing reads the queue after close(); report what it left behind
+            self._thread.join(timeout)
+            return not self._thread.is_alive() and not self._pending
+        return waiter.done.wait(timeout) and waiter.ok
+
+    def close(self, timeout=10.0):
+        """Writes everything still queued and stops the writer thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # --- Writer thread ---
+    def _run(self):
+        stopping = False
+        waiters = []
+        while not stopping:
+            count = 0
+            try:
+                # Wake up periodically while a failed batch is waiting for a retry
+                item = self._queue.get(timeout=1.0 if self._pending else None)
+            except queue.Empty:
+                item = None
+            deadline = time.monotonic() + self.max_delay
+            while True:
+                if item is None:
+                    break
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, _Flush):
+                    waiters.append(item)
+                else:
+                    kind, record = item
+                    self._pending.setdefault(kind, []).append(record)
+                    count += 1
+                if stopping or waiters or count >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            self._write_pending()
+            for waiter in waiters:
+                waiter.attempts += 1
+                if self._pending and (waiter.attempts >= FLUSH_ATTEMPTS or stopping):
+                    waiter.ok = False
+                if not self._pending or not waiter.ok:
+                    waiter.done.set()
+            waiters = [waiter for waiter in waiters if not waiter.done.is_set()]
+        if self._pending:
+            logger.error("Log writer stopped with %d record(s) unwritten", self._pending_count)
+
+    def _write_pending(self):
+        if not any(self._pending.values()):
+            return
+        start = time.perf_counter()
+        written = 0
+        for kind in list(self._pending):
+            records = self._pending[kind]
+            try:
+                self.store.append_many(kind, records, durable=True)
+            except Exception:
+                logger.exception("Could not write %d %s record(s); will retry", len(records), kind)
+                with self._metrics_lock:
+                    self._failures += 1
+                continue
+            written += len(records)
+            del self._pending[kind]
+            for listener in self._listeners:
+                try:
+                    listener(kind, records)
+                except Exception:
+                    logger.exception("Log writer listener failed on %d %s record(s)", len(records), kind)
+        elapsed = time.perf_counter() - start
+        if PROFILER.enabled:
+            PROFILER.observe("log_writer.flush", elapsed)
+        with self._metrics_lock:
+            self._flush_latencies.append(elapsed)
+            self._batches += 1
+            self._written += written
+            self._pending_count = sum(len(r) for r in self._pending.values())
+
+    # --- Metrics ---
+    def metrics(self):
+        """Queue depth, records/batches written and flush latency (seconds) of recent batches."""
+        with self._metrics_lock:
+            latencies = sorted(self._flush_latencies)
+            metrics = {
+                "queue_depth": self._queue.qsize(),
+                "pending_retry": self._pending_count,
+                "batches": self._batches,
+                "records_written": self._written,
+                "write_failures": self._failures,
+            }
+        if latencies:
+            metrics.update(flush_latency_mean=sum(latencies) / len(latencies),
+                           flush_latency_p95=latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+                           flush_latency_max=latencies[-1])
+        return metrics
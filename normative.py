@@ -0,0 +1,178 @@
+# normative.py
+# Normative SNR distributions for the Diagnosis comparison, precomputed once per group.
+import threading
+import time
+
+import numpy as np
+
+# Normative groups are (age band, primary language); None matches anyone
+DEFAULT_GROUP = (None, None)
+
+# mean and standard deviation (dB SNR) of each normative group
+NORMS = {
+    DEFAULT_GROUP: (-8.0, 1.6),
+}
+
+# SNR range plotted on the Diagnosis tab
+SNR_RANGE = (-15, 5)
+
+AGE_BANDS = [(0, "0-17"), (18, "18-39"), (40, "40-59"), (60, "60+")]
+
+REFRESH_SECONDS = 5.0    # how often a NormativeEngine looks for newly saved Diagnosis records
+
+
+def age_band(age):
+    """Returns the age band label for an age in years, or None when unknown."""
+    if age is None or age == "N/A":
+        return None
+    label = None
+    for lower, name in AGE_BANDS:
+        if age >= lower:
+            label = name
+    return label
+
+
+class NormativeCurve:
+    """Density curve and CDF lookup table of one normative group."""
+
+    def __init__(self, mean, std, snr_range=SNR_RANGE, points=100, table_points=4097):
+        from scipy.special import ndtr  # only needed while the tables are built
+
+        self.mean = mean
+        self.std = std
+        self.x = np.linspace(snr_range[0], snr_range[1], points)
+        self.pdf = np.exp(-0.5 * ((self.x - mean) / std) ** 2) / (std * np.sqrt(2 * np.pi))
+        # The CDF table spans +/-8 SD so percentiles outside the plotted range stay exact
+        self.table_x = np.linspace(mean - 8 * std, mean + 8 * std, table_points)
+        self.table_cdf = ndtr((self.table_x - mean) / std)
+        for array in (self.x, self.pdf, self.table_x, self.table_cdf):
+            array.flags.writeable = False
+
+    def z_score(self, snr):
+        """z-score of one SNR or of an array of SNRs."""
+        return (np.asarray(snr, dtype=float) - self.mean) / self.std
+
+    def percentile(self, snr):
+        """Percentile (0-100) of one SNR or of an array of SNRs, read from the CDF table."""
+        return 100.0 * np.interp(np.asarray(snr, dtype=float), self.table_x, self.table_cdf)
+
+
+class EmpiricalCurve:
+    """
+    The NormativeCurve interface over a learned SNRSketch (see normdb.py):
+    percentiles from the sketch's CDF, z-scores from its moments and a
+    smoothed histogram as the plotted density.
+    """
+
+    def __init__(self, sketch, snr_range=SNR_RANGE, points=100):
+        self.n = sketch.n
+        self.table_x, self.table_cdf = sketch.cdf_table()
+        self.mean, std = sketch.mean_std()
+        self.std = max(std, self.table_x[1] - self.table_x[0])
+        self.x = np.linspace(snr_range[0], snr_range[1], points)
+        # Gaussian kernel density with Silverman's bandwidth, evaluated from the bin counts
+        edges = self.table_x
+        centres = 0.5 * (edges[1:] + edges[:-1])
+        used = sketch.counts > 0
+        bandwidth = max(1.06 * self.std * self.n ** -0.2, edges[1] - edges[0])
+        z = (self.x[:, None] - centres[used]) / bandwidth
+        self.pdf = (np.exp(-0.5 * z * z) @ sketch.counts[used]) / (self.n * bandwidth * np.sqrt(2 * np.pi))
+        for array in (self.x, self.pdf, self.table_x, self.table_cdf):
+            array.flags.writeable = False
+
+    def z_score(self, snr):
+        return (np.asarray(snr, dtype=float) - self.mean) / self.std
+
+    def percentile(self, snr):
+        return 100.0 * np.interp(np.asarray(snr, dtype=float), self.table_x, self.table_cdf)
+
+
+class NormativeEngine:
+    """
+    Builds each group's NormativeCurve on first use and keeps it.
+
+    Scoring is a table interpolation, so a whole array of SNRs costs one
+    vectorized NumPy call rather than one SciPy call per record.
+
+    With a NormativeDB, every group that has MIN_SAMPLES saved Diagnosis
+    records is scored against its learned distribution instead, in
+    preference to the fixed NORMS. refresh() picks up new records.
+    """
+
+    def __init__(self, norms=None, snr_range=SNR_RANGE, db=None, refresh_seconds=REFRESH_SECONDS):
+        self.norms = dict(NORMS if norms is None else norms)
+        self.snr_range = snr_range
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self._curves = {}
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        self._db_version = None
+        self.refresh()
+
+    def refresh(self, force=False):
+        """Reads Diagnosis records saved since the last refresh (at most every refresh_seconds)."""
+        if self.db is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+                return
+            self._refreshed_at = now
+            self.db.update()
+            if self.db.version != self._db_version:
+                self._db_version = self.db.version
+                self._curves = {}
+
+    def learned(self, group):
+        """True when a group is scored against data learned from saved records."""
+        from normdb import MIN_SAMPLES
+        return self.db is not None and self.db.count(group) >= MIN_SAMPLES
+
+    def register(self, group, mean, std):
+        """Adds or replaces the parameters of a normative group."""
+        self.norms[group] = (mean, std)
+        self._curves.pop(group, None)
+
+    def group_for(self, age=None, language=None):
+        """Returns the most specific registered group for a patient."""
+        band = age_band(age)
+        language = (language or "").strip().lower() or None
+        for group in ((band, language), (band, None), (None, language), DEFAULT_GROUP):
+            if group in self.norms or self.learned(group):
+                return group
+        raise KeyError("No default normative group is registered.")
+
+    def curve(self, group=DEFAULT_GROUP):
+        curve = self._curves.get(group)
+        if curve is None:
+            if self.learned(group):
+                curve = EmpiricalCurve(self.db.sketch(group), self.snr_range)
+            else:
+                mean, std = self.norms[group]
+                curve = NormativeCurve(mean, std, self.snr_range)
+            self._curves[group] = curve
+        return curve
+
+    def percentile(self, snr, group=DEFAULT_GROUP):
+        return self.curve(group).percentile(snr)
+
+    def z_score(self, snr, group=DEFAULT_GROUP):
+        return self.curve(group).z_score(snr)
+
+    def score_many(self, snrs, groups):
+        """
+        Scores SNRs that belong to different groups.
+        Returns (percentiles, z_scores) arrays with one call per distinct group.
+        """
+        snrs = np.asarray(snrs, dtype=float)
+        lookup = {str(g): g for g in groups}
+        unique, inverse = np.unique([str(g) for g in groups], return_inverse=True)
+        percentiles = np.empty_like(snrs)
+        z_scores = np.empty_like(snrs)
+        for i, name in enumerate(unique):
+            curve = self.curve(lookup[name])
+            mask = inverse == i
+            percentiles[mask] = curve.percentile(snrs[mask])
+            z_scores[mask] = curve.z_score(snrs[mask])
+        return percentiles, z_scores
@@ -0,0 +1,279 @@
+# normdb.py
+# Normative SNR distributions learned from saved Diagnosis records, per age band and language.
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import logsegments
+from fileutil import atomic_write
+from normative import DEFAULT_GROUP, age_band
+from profilestore import ProfileStore
+from recordstore import patient_key
+
+# Sketch bins: 0.1 dB over a range wider than any VCV-in-noise threshold. SNRs
+# outside it land in the end bins, so quantiles are exact to half a bin.
+SKETCH_LOW = -30.0
+SKETCH_HIGH = 20.0
+SKETCH_BIN = 0.1
+SKETCH_BINS = int(round((SKETCH_HIGH - SKETCH_LOW) / SKETCH_BIN))
+
+MIN_SAMPLES = 50           # records a group needs before its learned curve replaces the default
+CHECKPOINT_SECONDS = 30.0  # checkpoint at most this often (and at exit)
+
+
+def stratum(age, language):
+    """The (age band, language) stratum of a patient; either may be None when unknown."""
+    try:
+        band = age_band(None if age in (None, "") else float(age))
+    except (TypeError, ValueError):
+        band = None
+    return band, (str(language or "").strip().lower() or None)
+
+
+class SNRSketch:
+    """
+    Bounded, mergeable summary of a stream of SNRs: counts over fixed 0.1 dB
+    bins plus running moments. Memory is SKETCH_BINS counts however many SNRs
+    are added, and merging two sketches is adding their arrays, so partial
+    sketches from different processes combine exactly and in any order.
+    """
+
+    def __init__(self, counts=None, total=0.0, total_sq=0.0):
+        self.counts = np.zeros(SKETCH_BINS, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.total = float(total)
+        self.total_sq = float(total_sq)
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def add(self, snrs):
+        snrs = np.atleast_1d(np.asarray(snrs, dtype=float))
+        snrs = snrs[np.isfinite(snrs)]
+        bins = np.clip(((snrs - SKETCH_LOW) / SKETCH_BIN).astype(np.int64), 0, SKETCH_BINS - 1)
+        self.counts += np.bincount(bins, minlength=SKETCH_BINS)
+        self.total += float(snrs.sum())
+        self.total_sq += float((snrs ** 2).sum())
+
+    def merge(self, other):
+        """Adds another sketch into this one and returns self."""
+        self.counts += other.counts
+        self.total += other.total
+        self.total_sq += other.total_sq
+        return self
+
+    def copy(self):
+        return SNRSketch(self.counts.copy(), self.total, self.total_sq)
+
+    def mean_std(self):
+        n = self.n
+        if n == 0:
+            return float("nan"), float("nan")
+        mean = self.total / n
+        return mean, float(np.sqrt(max(self.total_sq / n - mean * mean, 0.0)))
+
+    def edges(self):
+        return SKETCH_LOW + SKETCH_BIN * np.arange(SKETCH_BINS + 1)
+
+    def cdf_table(self):
+        """(edges, cdf) with the CDF linear within each bin."""
+        cdf = np.concatenate([[0.0], np.cumsum(self.counts)]) / max(self.n, 1)
+        return self.edges(), cdf
+
+    def quantile(self, q):
+        edges, cdf = self.cdf_table()
+        return np.interp(q, cdf, edges)
+
+    def to_json(self):
+        nonzero = np.flatnonzero(self.counts)
+        return {"bins": nonzero.tolist(), "counts": self.counts[nonzero].tolist(),
+                "total": self.total, "total_sq": self.total_sq}
+
+    @classmethod
+    def from_json(cls, state):
+        counts = np.zeros(SKETCH_BINS, dtype=np.int64)
+        counts[state["bins"]] = state["counts"]
+        return cls(counts, state["total"], state["total_sq"])
+
+
+def _matches(group, key):
+    return all(g is None or g == k for g, k in zip(group, key))
+
+
+def _ingest(path, profiles_root, segment, start, end):
+    """Sketches of one worker's share of a log (see logsegments.shares)."""
+    db = NormativeDB(path, ProfileStore(profiles_root) if profiles_root else None, checkpoint=os.devnull)
+    atexit.unregister(db.save)
+    db._read(logsegments.iter_share(path, segment, start, end))
+    return {key: sketch.to_json() for key, sketch in db.sketches.items()}, (db.segment, db.offset)
+
+
+class NormativeDB:
+    """
+    One SNRSketch per (age band, language) stratum, learned from the
+    Diagnosis log. The age and language of each record come from the
+    patient's saved profile.
+
+    update() tails the log, as TrendEngine does, so every server process
+    learns from records saved by any of them; the sketches and the log
+    position they cover are checkpointed together. build() re-learns the
+    whole log with a process pool, one closed segment or slice of the
+    active one per task, and merges the workers' sketches. A group such as
+    (age band, None) is the merge of every stratum it covers.
+    """
+
+    def __init__(self, path="diagnosis_log.json", profiles=None, checkpoint=None,
+                 checkpoint_seconds=CHECKPOINT_SECONDS):
+        self.path = path
+        self.profiles = profiles
+        self.checkpoint = checkpoint or path + ".norms"
+        self.checkpoint_seconds = checkpoint_seconds
+        self._lock = threading.Lock()
+        self.segment = 0
+        self.offset = 0
+        self.sketches = {}
+        self.version = 0
+        self._groups = {}
+        self._saved_offset = (0, 0)
+        self._saved_at = time.monotonic()
+        self._load()
+        atexit.register(self.save)
+
+    # --- Checkpoint ---
+    def _load(self):
+        try:
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self.segment, self.offset = state.get("segment", 0), state.get("offset", 0)
+        self._saved_offset = (self.segment, self.offset)
+        self.sketches = {tuple(s["group"]): SNRSketch.from_json(s) for s in state.get("strata", [])}
+
+    def save(self):
+        """Checkpoints the sketches if they cover lines the last checkpoint did not."""
+        with self._lock:
+            if (self.segment, self.offset) == self._saved_offset:
+                return
+            strata = [dict(sketch.to_json(), group=list(key)) for key, sketch in self.sketches.items()]
+            atomic_write(self.checkpoint, json.dumps({"segment": self.segment, "offset": self.offset,
+                                                      "strata": strata}))
+            self._saved_offset = (self.segment, self.offset)
+            self._saved_at = time.monotonic()
+
+    # --- Ingest ---
+    def _stratum(self, record, profiles):
+        key = patient_key(record)
+        if key not in profiles:
+            profiles[key] = (self.profiles.load(key) if self.profiles and key else None) or {}
+        profile = profiles[key]
+        return stratum(profile.get("age"), profile.get("primary_language"))
+
+    def _read(self, lines):
+        """Adds (segment, end offset, raw line) lines, moving the position past each."""
+        values, profiles = {}, {}
+        for segment, offset, raw in lines:
+            self.segment, self.offset = segment, offset
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and isinstance(record.get("snr"), (int, float)):
+                values.setdefault(self._stratum(record, profiles), []).append(record["snr"])
+        for key, snrs in values.items():
+            self.sketches.setdefault(key, SNRSketch()).add(snrs)
+        if values:
+            self.version += 1
+            self._groups.clear()
+        return sum(len(snrs) for snrs in values.values())
+
+    def update(self):
+        """Adds every complete record appended since the last update. Returns how many were read."""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            active = logsegments.active_segment(self.path)
+            if (self.segment, self.offset) > (active, size):  # the log was replaced; start over
+                self.segment, self.offset, self._saved_offset, self.sketches = 0, 0, None, {}
+                self.version += 1
+                self._groups.clear()
+            if (self.segment, self.offset) == (active, size):
+                return 0
+            count = self._read(logsegments.iter_lines(self.path, self.segment, self.offset))
+            due = time.monotonic() - self._saved_at >= self.checkpoint_seconds
+        if due:
+            self.save()
+        return count
+
+    def build(self, workers=None):
+        """
+        Re-learns the whole log, split across ``workers`` processes. Returns
+        the number of strata. Servers pass workers=1 and learn in-process.
+        """
+        workers = workers or os.cpu_count() or 1
+        root = self.profiles.root if self.profiles else None
+        shares, active = logsegments.shares(self.path, workers)
+        tasks = [(self.path, root) + share for share in shares]
+        if not tasks:
+            parts = [({}, (active, 0))]
+        elif workers == 1 or len(tasks) == 1:
+            parts = [_ingest(*task) for task in tasks]
+        else:
+            # Spawned, not forked: a fork of a threaded server copies locks other threads may hold
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=context) as pool:
+                parts = list(pool.map(_ingest, *zip(*tasks)))
+        sketches = {}
+        for part, _ in parts:
+            for key, state in part.items():
+                if key in sketches:
+                    sketches[key].merge(SNRSketch.from_json(state))
+                else:
+                    sketches[key] = SNRSketch.from_json(state)
+        with self._lock:
+            self.sketches = sketches
+            self.segment, self.offset = max(position for _, position in parts)
+            self._saved_offset = None
+            self.version += 1
+            self._groups.clear()
+        self.save()
+        return len(sketches)
+
+    # --- Queries ---
+    def sketch(self, group=DEFAULT_GROUP):
+        """The merged sketch of every stratum a group covers (cached until new records arrive)."""
+        with self._lock:
+            merged = self._groups.get(group)
+            if merged is None:
+                merged = SNRSketch()
+                for key, sketch in self.sketches.items():
+                    if _matches(group, key):
+                        merged.merge(sketch)
+                self._groups[group] = merged
+            return merged
+
+    def count(self, group=DEFAULT_GROUP):
+        return self.sketch(group).n
+
+
+if __name__ == "__main__":
+    import sys
+
+    from recordstore import RecordStore
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    db = NormativeDB(RecordStore(root).data_path("diagnosis"), ProfileStore(os.path.join(root, "profiles")))
+    print(f"{db.build()} strata learned from {db.count()} records")
+    for key, sketch in sorted(db.sketches.items(), key=str):
+        mean, std = sketch.mean_std()
+        q = sketch.quantile([0.1, 0.5, 0.9])
+        print(f"{key!s:28} n={sketch.n:6d} mean {mean:6.2f} sd {std:5.2f}  p10/p50/p90 "
+              f"{q[0]:6.2f} {q[1]:6.2f} {q[2]:6.2f}")
@@ -0,0 +1,319 @@
+# notes.py
+# Clinical notes for the Summary tab, drafted by a pluggable model backend in a worker pool
+# and cached by a hash of the patient data they were written from.
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from fileutil import atomic_write
+from instrumentation import timer
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSION = 1   # bump when the prompt or the inputs change meaning, so cached notes are redone
+
+PROMPT = """You are an audiologist's assistant. Write a short clinical note (under 200 words) on the
+patient below: hearing status, speech-in-noise performance against the norms, aided benefit,
+wellbeing, and one or two recommendations. Only use the data given.
+
+{data}"""
+
+
+def _round(value, digits=1):
+    return None if value is None else round(float(value), digits)
+
+
+def note_inputs(profile, diagnosis=None, summary=None):
+    """
+    The data a note is written from, reduced to what a note should change
+    with: profile answers, the latest Diagnosis, Fitting means and benefit,
+    the audiogram findings and the recent wellbeing scores.
+    """
+    summary = summary or {}
+    fitting = summary.get("fitting") or {}
+    audiogram = summary.get("audiogram") or {}
+    wellbeing = (summary.get("wellbeing") or {}).get("scores") or {}
+    diagnosis = diagnosis or {}
+    fit = diagnosis.get("fit") or {}
+    return {
+        "profile": {key: profile.get(key) for key in sorted(profile)},
+        "diagnosis": {
+            "snr": diagnosis.get("snr"),
+            "snr50_ci": fit.get("snr50_ci"),
+            "percentile": diagnosis.get("percentile"),
+            "error_proportion": diagnosis.get("error_proportion"),
+        } if diagnosis.get("snr") is not None else None,
+        "fitting": {
+            "means": {key: _round(c.get("mean"), 2) for key, c in sorted((fitting.get("conditions") or {}).items())},
+            "benefit": dict(sorted((fitting.get("benefit") or {}).items())),
+        },
+        "audiogram": {
+            "degree": audiogram.get("degree"),
+            "asymmetric": audiogram.get("asymmetric"),
+            "ears": {ear: {"pta_air": e.get("pta_air"), "air_bone_gap": e.get("air_bone_gap")}
+                     for ear, e in sorted((audiogram.get("ears") or {}).items())},
+        } if audiogram else None,
+        "wellbeing": {metric: _round(value) for metric, value in sorted(wellbeing.items())},
+    }
+
+
+def note_key(inputs, backend):
+    """Cache key of a note: the backend and prompt version plus a hash of the inputs."""
+    data = json.dumps([backend.name, PROMPT_VERSION, inputs], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def prompt(inputs):
+    """The prompt a model backend is given for a note."""
+    return PROMPT.format(data=json.dumps(inputs, indent=1, sort_keys=True, default=str))
+
+
+# --- Backends ---
+class StubBackend:
+    """
+    Local, deterministic stand-in for a language model: a templated note
+    built from the inputs, streamed a few words at a time after a fixed
+    time to first token. The same inputs always give the same text, so
+    latency and caching can be tested offline.
+    """
+
+    name = "stub"
+
+    def __init__(self, first_token=None, per_chunk=None, words_per_chunk=4):
+        self.first_token = config.NOTES_STUB_FIRST_TOKEN if first_token is None else first_token
+        self.per_chunk = config.NOTES_STUB_PER_CHUNK if per_chunk is None else per_chunk
+        self.words_per_chunk = words_per_chunk
+
+    def text(self, inputs):
+        profile = inputs.get("profile") or {}
+        name = profile.get("name") or "The patient"
+        sentences = [f"{name}, age {profile.get('age', 'unknown')}, primary language "
+                     f"{profile.get('primary_language') or 'not recorded'}."]
+        audiogram = inputs.get("audiogram")
+        if audiogram and audiogram.get("degree"):
+            ptas = ", ".join(f"{ear.lower()} PTA {e['pta_air']} dB HL" for ear, e in audiogram["ears"].items())
+            finding = ("hearing within normal limits" if audiogram["degree"] == "Normal"
+                       else f"{audiogram['degree'].lower()} hearing loss")
+            sentences.append(f"Audiogram shows {finding} ({ptas})"
+                             + (", asymmetric between ears." if audiogram.get("asymmetric") else "."))
+        diagnosis = inputs.get("diagnosis")
+        if diagnosis:
+            ci = diagnosis.get("snr50_ci")
+            interval = f" (95% CI {ci[0]:.1f} to {ci[1]:.1f})" if ci else ""
+            percentile = diagnosis.get("percentile")
+            standing = "" if percentile is None else f", percentile {percentile:.0f} against the norms"
+            sentences.append(f"Speech-in-noise threshold {diagnosis['snr']:.1f} dB SNR{interval}{standing}.")
+        else:
+            sentences.append("No speech-in-noise test on record yet.")
+        benefit = (inputs.get("fitting") or {}).get("benefit") or {}
+        for env, value in benefit.items():
+            sentences.append(f"Aided benefit in {env} is {value:+.1f} dB"
+                             + (", below what is expected; review the fitting." if value < 2 else "."))
+        wellbeing = inputs.get("wellbeing") or {}
+        if wellbeing:
+            worst = max(("listening_effort", "hearing_fatigue", "general_fatigue"), key=lambda m: wellbeing.get(m) or 0)
+            if (wellbeing.get(worst) or 0) >= 6:
+                sentences.append(f"Recent check-ins report high {worst.replace('_', ' ')} "
+                                 f"({wellbeing[worst]:.1f}/10); discuss listening strategies and rest breaks.")
+            else:
+                sentences.append("Recent check-ins show no marked listening fatigue.")
+        if profile.get("tinnitus") in ("Yes", "Sometimes"):
+            sentences.append("Reports tinnitus; consider a tinnitus questionnaire at the next visit.")
+        return " ".join(sentences)
+
+    def stream(self, inputs):
+        time.sleep(self.first_token)
+        words = re.findall(r"\S+\s*", self.text(inputs))
+        for i in range(0, len(words), self.words_per_chunk):
+            if i:
+                time.sleep(self.per_chunk)
+            yield "".join(words[i:i + self.words_per_chunk])
+
+
+BACKENDS = {"stub": StubBackend}
+
+
+def load_backend(spec=None):
+    """
+    The backend named by ``spec`` (default: config.NOTES_BACKEND): a key of
+    BACKENDS, or "module:attribute" naming a class or factory to call. A
+    backend has a ``name`` and a ``stream(inputs)`` method yielding text.
+    """
+    spec = spec or config.NOTES_BACKEND
+    if spec in BACKENDS:
+        return BACKENDS[spec]()
+    module, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown notes backend: {spec!r} (use one of {', '.join(BACKENDS)} or module:attribute)")
+    return getattr(importlib.import_module(module), attribute)()
+
+
+# --- Generation ---
+class NoteJob:
+    """One note being written (or already written): the text so far, and whether it is done."""
+
+    def __init__(self, key, text="", cached=False):
+        self.key = key
+        self.cached = cached
+        self.error = None
+        self.started = time.monotonic()
+        self.first_chunk = None   # seconds from the request to the first text
+        self.seconds = None       # seconds from the request to the end
+        self._chunks = [text] if text else []
+        self._done = threading.Event()
+        if cached:
+            self.seconds = 0.0
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def text(self):
+        return "".join(self._chunks)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _add(self, chunk):
+        if self.first_chunk is None:
+            self.first_chunk = time.monotonic() - self.started
+        self._chunks.append(chunk)
+
+    def _finish(self, error=None):
+        self.error = error
+        self.seconds = time.monotonic() - self.started
+        self._done.set()
+
+
+class NoteGenerator:
+    """
+    Writes notes off the script thread. request() returns at once with a
+    NoteJob that a worker thread fills in as the backend streams, so the
+    page can show the text as it arrives.
+
+    Finished notes are kept by key (see note_key) in a bounded LRU and as
+    files under ``cache_dir``, so unchanged inputs are never sent to the
+    backend again, even after a restart. A request for a note that is still
+    being written joins the job already running. A failed job is handed back
+    as it is for ``retry_seconds``, or until retry(), so a failing backend
+    is not called again on every rerun.
+    """
+
+    def __init__(self, backend=None, cache_dir=None, workers=None, max_entries=None, retry_seconds=None):
+        self.backend = backend or load_backend()
+        self.cache_dir = cache_dir or config.NOTES_CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_entries = max_entries or config.NOTES_CACHE_ENTRIES
+        self.retry_seconds = config.NOTES_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers or config.NOTES_WORKERS, thread_name_prefix="uliplus-notes")
+        self._lock = threading.Lock()
+        self._notes = OrderedDict()   # key -> finished text
+        self._running = {}            # key -> NoteJob
+        self._failed = OrderedDict()  # key -> (failed NoteJob, monotonic time), until its retry is due
+        self._latencies = deque(maxlen=256)
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _cached(self, key):
+        """The finished text of a note, from memory or disk (None when never written). Hold the lock."""
+        text = self._notes.get(key)
+        if text is not None:
+            self._notes.move_to_end(key)
+            return text
+        try:
+            with open(self.path(key)) as f:
+                text = json.load(f)["text"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        self._remember(key, text)
+        return text
+
+    def _remember(self, key, text):
+        self._notes[key] = text
+        while len(self._notes) > self.max_entries:
+            self._notes.popitem(last=False)
+
+    def request(self, inputs):
+        """The job writing the note for ``inputs``: finished at once when cached, else started or joined."""
+        key = note_key(inputs, self.backend)
+        with timer("notes.request"), self._lock:
+            job = self._running.get(key)
+            if job is not None:
+                return job
+            job, failed_at = self._failed.get(key, (None, None))
+            if job is not None:
+                if time.monotonic() - failed_at < self.retry_seconds:
+                    return job
+                del self._failed[key]
+            text = self._cached(key)
+            if text is not None:
+                self.hits += 1
+                return NoteJob(key, text, cached=True)
+            self.misses += 1
+            job = self._running[key] = NoteJob(key)
+        self._pool.submit(self._write, job, inputs)
+        return job
+
+    def retry(self, inputs):
+        """Forgets a failure of the note for ``inputs`` and requests it again."""
+        with self._lock:
+            self._failed.pop(note_key(inputs, self.backend), None)
+        return self.request(inputs)
+
+    def _write(self, job, inputs):
+        error = None
+        try:
+            for chunk in self.backend.stream(inputs):
+                job._add(chunk)
+        except Exception as exc:  # the backend's failure is shown in place of the note until a retry
+            error = f"{type(exc).__name__}: {exc}"
+        try:
+            if error is None:
+                # A note that cannot be cached on disk (a full disk, say) is still shown and kept in memory
+                try:
+                    atomic_write(self.path(job.key), json.dumps({
+                        "key": job.key, "backend": self.backend.name, "prompt_version": PROMPT_VERSION,
+                        "inputs": inputs, "text": job.text(), "seconds": round(time.monotonic() - job.started, 3)}))
+                except Exception:
+                    logger.exception("Could not cache note %s", job.key)
+            self._latencies.append(time.monotonic() - job.started)
+        finally:
+            with self._lock:
+                self._running.pop(job.key, None)
+                if error is None:
+                    self._remember(job.key, job.text())
+                else:
+                    self.failures += 1
+                    self._failed[job.key] = (job, time.monotonic())
+                    while len(self._failed) > self.max_entries:
+                        self._failed.popitem(last=False)
+            job._finish(error)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "entries": len(self._notes),
+                "running": len(self._running),
+                "failed": len(self._failed),
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+                "p50_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            }
@@ -0,0 +1,108 @@
+# profilestore.py
+# One current profile per patient, written atomically under a cross-process lock.
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from fileutil import atomic_write, locked
+from instrumentation import timer
+from recordstore import patient_key
+
+
+def patient_filename(patient):
+    """File name for a patient: a readable slug plus a hash to keep names unique."""
+    key = patient_key({"patient": patient})
+    slug = re.sub(r"[^a-z0-9]+", "-", key).strip("-")[:40] or "patient"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}-{digest}.json"
+
+
+class ProfileStore:
+    """
+    Keeps the latest profile of every patient as its own JSON file.
+
+    Each save takes an exclusive lock on that patient's lock file and then
+    atomically replaces the profile, so concurrent sessions never tear a file
+    and only saves for the *same* patient ever wait on each other. Save
+    latency and lock contention are tracked and reported by ``stats()``.
+    """
+
+    def __init__(self, root="profiles"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._stats_lock = threading.Lock()
+        # Recent samples only, so a long-running server does not grow these forever
+        self._latencies = deque(maxlen=1024)
+        self._saves = 0
+        self._lock_wait_total = 0.0
+        self._lock_wait_max = 0.0
+        self._contended = 0
+
+    def path(self, patient):
+        """Profile file for a patient."""
+        return os.path.join(self.root, patient_filename(patient))
+
+    def save(self, profile):
+        """Writes the profile as the current record for its patient."""
+        patient = profile.get("patient") or profile.get("name") or ""
+        if not patient_key({"patient": patient}):
+            raise ValueError("A profile needs a patient name before it can be saved.")
+        data = json.dumps(profile, indent=2)
+        path = self.path(patient)
+
+        start = time.perf_counter()
+        with timer("profile_store.save"), locked(path + ".lock") as waited:
+            atomic_write(path, data)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._latencies.append(elapsed)
+            self._saves += 1
+            self._lock_wait_total += waited
+            self._lock_wait_max = max(self._lock_wait_max, waited)
+            if waited > 0:
+                self._contended += 1
+
+    def load(self, patient):
+        """Returns the saved profile of a patient, or None."""
+        try:
+            with open(self.path(patient)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def profiles(self):
+        """Yields the saved profile of every patient, in file name order."""
+        for filename in sorted(os.listdir(self.root)):
+            if filename.endswith(".json") and not filename.startswith(".tmp-"):
+                with open(os.path.join(self.root, filename)) as f:
+                    yield json.load(f)
+
+    def patients(self):
+        """Returns the names of every patient with a saved profile."""
+        return [profile.get("name", "") for profile in self.profiles()]
+
+    def stats(self):
+        """
+        Save latency and lock contention (seconds) observed by this process.
+        Latency figures cover the most recent 1024 saves.
+        """
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "saves": self._saves,
+                "lock_wait_total": self._lock_wait_total,
+                "lock_wait_max": self._lock_wait_max,
+                "contended_saves": self._contended,
+            }
+        if latencies:
+            stats.update({
+                "latency_mean": sum(latencies) / len(latencies),
+                "latency_p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+                "latency_max": latencies[-1],
+            })
+        return stats
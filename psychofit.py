@@ -0,0 +1,156 @@
+# psychofit.py
+# Maximum-likelihood fits of the psychometric function to trial-level (SNR, correct) data,
+# for one session or thousands at once.
+import numpy as np
+from scipy.special import expit
+
+from staircase import N_CHOICES
+
+GUESS = 1.0 / N_CHOICES
+LAPSE = 0.02
+
+# Staircase data cluster around one point of the function and say little about its
+# slope, so the slope prior is kept fairly tight (a factor of ~1.6 either way); a
+# looser one lets slopes run steep and the SNR-50 intervals come out too narrow.
+# The midpoint prior is weak: with a few dozen trials the data dominate it.
+PRIOR_MIDPOINT = (-8.0, 10.0)          # dB SNR: mean, SD
+PRIOR_LOG_SLOPE = (np.log(0.8), 0.5)   # log(1/dB): mean, SD
+WARM_START_SD = 6.0                    # SD of the midpoint prior centred on a previous fit
+
+Z_95 = 1.959964
+
+
+def pad(sessions):
+    """
+    Stacks sessions of unequal length, each a sequence of (snr, correct) pairs,
+    into (sessions, trials) arrays; unused trials have a NaN SNR.
+    """
+    length = max((len(s) for s in sessions), default=0)
+    snr = np.full((len(sessions), length), np.nan)
+    correct = np.zeros((len(sessions), length), dtype=bool)
+    for i, session in enumerate(sessions):
+        if len(session):
+            values = np.asarray(session, dtype=float)
+            snr[i, :len(session)] = values[:, 0]
+            correct[i, :len(session)] = values[:, 1] > 0
+    return snr, correct
+
+
+def _penalized(theta, x, y, used, prior_mean, prior_sd, guess, lapse):
+    """Penalized log-likelihood, score and expected information of every session."""
+    m, s = theta[:, :1], theta[:, 1:]
+    b = np.exp(s)
+    z = b * (x - m)
+    f = expit(z)
+    p = np.clip(guess + (1.0 - guess - lapse) * f, 1e-12, 1 - 1e-12)
+    ll = np.where(used, np.where(y, np.log(p), np.log1p(-p)), 0.0).sum(axis=1)
+
+    dp = (1.0 - guess - lapse) * f * (1.0 - f)           # dp/dz
+    grads = np.stack([-b * np.ones_like(z), z], axis=-1)  # dz/dm, dz/ds
+    weight = np.where(used, dp / (p * (1.0 - p)), 0.0)
+    score = np.einsum("nt,ntk->nk", weight * (y - p), grads)
+    info = np.einsum("nt,ntk,ntl->nkl", weight * dp, grads, grads)
+
+    ll -= 0.5 * (((theta - prior_mean) / prior_sd) ** 2).sum(axis=1)
+    score -= (theta - prior_mean) / prior_sd ** 2
+    info[:, [0, 1], [0, 1]] += 1.0 / prior_sd ** 2
+    return ll, score, info
+
+
+def fit(snr, correct, previous=None, guess=GUESS, lapse=LAPSE, max_iter=50, tol=1e-6):
+    """
+    Fits midpoint (SNR-50 of the psychometric core) and slope for every row of
+    ``snr``/``correct`` (sessions x trials; NaN SNRs are padding; 1-D for one session).
+
+    All sessions take Fisher-scoring steps together, each step a handful of
+    array operations over the whole batch, with step halving wherever the
+    penalized likelihood would drop. ``previous`` is an optional
+    (midpoints, slopes) pair from earlier fits; those sessions start from it
+    and their midpoint prior is centred on it (NaN where there is none).
+
+    Returns a dict of per-session arrays: snr50, slope, snr50_se, snr50_ci and
+    slope_ci (n, 2), loglik, trials, iterations and converged.
+    """
+    x = np.atleast_2d(np.asarray(snr, dtype=float))
+    y = np.atleast_2d(np.asarray(correct, dtype=bool))
+    n = x.shape[0]
+    used = ~np.isnan(x)
+    x = np.where(used, x, 0.0)
+
+    prior_mean = np.tile([PRIOR_MIDPOINT[0], PRIOR_LOG_SLOPE[0]], (n, 1))
+    prior_sd = np.tile([PRIOR_MIDPOINT[1], PRIOR_LOG_SLOPE[1]], (n, 1))
+    theta = prior_mean.copy()
+    # Without a previous fit, start the midpoint at the session's mean SNR
+    counts = used.sum(axis=1)
+    has_trials = counts > 0
+    theta[has_trials, 0] = x[has_trials].sum(axis=1) / counts[has_trials]
+    if previous is not None:
+        prev_m = np.broadcast_to(np.asarray(previous[0], dtype=float), (n,))
+        prev_b = np.broadcast_to(np.asarray(previous[1], dtype=float), (n,))
+        warm = ~np.isnan(prev_m) & ~np.isnan(prev_b) & (prev_b > 0)
+        theta[warm, 0] = prior_mean[warm, 0] = prev_m[warm]
+        theta[warm, 1] = np.log(prev_b[warm])
+        prior_sd[warm, 0] = WARM_START_SD
+
+    ll, score, info = _penalized(theta, x, y, used, prior_mean, prior_sd, guess, lapse)
+    active = np.ones(n, dtype=bool)
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.zeros(n, dtype=np.int16)
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        step = np.linalg.solve(info[idx], score[idx][..., None])[..., 0]
+        scale = np.ones(idx.size)
+        for _ in range(10):
+            candidate = theta[idx] + scale[:, None] * step
+            c_ll, c_score, c_info = _penalized(candidate, x[idx], y[idx], used[idx], prior_mean[idx],
+                                               prior_sd[idx], guess, lapse)
+            worse = c_ll < ll[idx] - 1e-10
+            if not worse.any():
+                break
+            scale[worse] *= 0.5
+        better = ~worse
+        moved = idx[better]
+        theta[moved], ll[moved], score[moved], info[moved] = candidate[better], c_ll[better], c_score[better], c_info[better]
+        iterations[idx] += 1
+        done = np.abs(scale[:, None] * step).max(axis=1) < tol
+        converged[idx[done]] = True
+        # No step improves on the current point: it is the optimum to numerical precision
+        # when the score vanishes there, otherwise the fit is left unconverged
+        stalled = worse & ~done
+        converged[idx[stalled]] = np.abs(score[idx[stalled]]).max(axis=1) < 1e-4
+        active[idx[done | stalled]] = False
+
+    cov = np.linalg.inv(info)
+    se = np.sqrt(np.maximum(cov[:, [0, 1], [0, 1]], 0.0))
+    slope = np.exp(theta[:, 1])
+    return {
+        "snr50": theta[:, 0],
+        "slope": slope,
+        "snr50_se": se[:, 0],
+        "snr50_ci": theta[:, :1] + np.array([-Z_95, Z_95]) * se[:, :1],
+        "slope_ci": np.exp(theta[:, 1:] + np.array([-Z_95, Z_95]) * se[:, 1:]),
+        "loglik": ll,
+        "trials": counts,
+        "iterations": iterations,
+        "converged": converged,
+    }
+
+
+def fit_session(snr, correct, previous=None):
+    """
+    Fits one session and returns plain floats: snr50, slope, snr50_ci, slope_ci,
+    trials. ``previous`` is an earlier result of this function (or None).
+    """
+    prior = None
+    if previous and previous.get("snr50") is not None:
+        prior = (previous["snr50"], previous["slope"])
+    result = fit(snr, correct, previous=prior)
+    return {
+        "snr50": round(float(result["snr50"][0]), 2),
+        "slope": round(float(result["slope"][0]), 3),
+        "snr50_ci": [round(float(v), 2) for v in result["snr50_ci"][0]],
+        "slope_ci": [round(float(v), 3) for v in result["slope_ci"][0]],
+        "trials": int(result["trials"][0]),
+    }
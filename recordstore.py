@@ -0,0 +1,350 @@
+# recordstore.py
+# Indexed storage for the JSON-lines logs written by the ULIPlus tabs.
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+import logsegments
+from fileutil import locked
+
+# One data file per kind of record, kept under the names the app has always used
+LOG_FILES = {
+    "profile": "logevent.json",
+    "diagnosis": "diagnosis_log.json",
+    "fitting": "fitting_log_extended.json",
+    "monitoring": "daily_log.json",
+    "summary": "clinical_notes.json",
+    "session": "session_history.json",
+}
+
+
+def patient_key(record):
+    """Returns the normalized patient identifier of a record ('' when unknown)."""
+    name = record.get("patient") or record.get("name") or ""
+    return str(name).strip().lower()
+
+
+def _as_timestamp(value):
+    """Accepts a datetime or an ISO string and returns an ISO string (or None)."""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+class _KindIndex:
+    """In-memory view of one log's index: entries sorted by timestamp, across its segments."""
+
+    def __init__(self, active=0):
+        self.by_time = []      # (timestamp, segment, offset, length)
+        self.by_patient = {}   # patient -> [(timestamp, segment, offset, length)]
+        self.active = active   # number of the active segment
+        self.offsets = set()   # offsets indexed in the active segment
+        self.end = 0           # bytes of the active segment covered by the index
+
+    def add(self, segment, offset, length, timestamp, patient):
+        if segment == self.active:
+            if offset in self.offsets:
+                return False
+            self.offsets.add(offset)
+            self.end = max(self.end, offset + length)
+        if timestamp is None:  # malformed line, indexed only so it is not rescanned
+            return True
+        entry = (timestamp, segment, offset, length)
+        insort(self.by_time, entry)
+        insort(self.by_patient.setdefault(patient, []), entry)
+        return True
+
+    def load(self, entries):
+        """Adds many (segment, offset, length, timestamp, patient) entries with one sort."""
+        for segment, offset, length, timestamp, patient in entries:
+            if segment == self.active:
+                self.offsets.add(offset)
+                self.end = max(self.end, offset + length)
+            if timestamp is not None:
+                entry = (timestamp, segment, offset, length)
+                self.by_time.append(entry)
+                self.by_patient.setdefault(patient, []).append(entry)
+        self.by_time.sort()
+        for patient_entries in self.by_patient.values():
+            patient_entries.sort()
+
+
+class RecordStore:
+    """
+    Append-only JSON-lines logs with an on-disk index by patient and timestamp.
+
+    Every data file keeps a sidecar ``<file>.idx`` holding one small line per
+    record (offset, length, timestamp, patient). Lookups bisect the index and
+    then seek straight to the matching records, so reading one patient's
+    history or a time window never parses the rest of the log.
+
+    Logs rotate into compressed segments once they pass LOG_SEGMENT_BYTES
+    (see logsegments.py). Each segment keeps its own index, and an index
+    entry names its segment, so records in closed segments are read by
+    decompressing only the blocks that hold them.
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+        self._lock = threading.RLock()
+        self._indexes = {}
+
+    # --- Paths ---
+    def data_path(self, kind):
+        return os.path.join(self.root, LOG_FILES[kind])
+
+    def index_path(self, kind):
+        return self.data_path(kind) + ".idx"
+
+    # --- Index maintenance ---
+    def _index(self, kind, held=False):
+        """The up-to-date index of a kind; ``held`` means the caller holds the log's file lock."""
+        path = self.data_path(kind)
+        index = self._indexes.get(kind)
+        if index is None or logsegments.active_segment(path) != index.active:
+            # First use, or another process rotated the log: reload under the lock so
+            # the segment list and the active index are read from one consistent state
+            if held:
+                index = self._load_index(kind)
+            else:
+                with locked(logsegments.lock_path(path)):
+                    index = self._load_index(kind)
+            self._indexes[kind] = index
+        self._catch_up(kind, index)
+        return index
+
+    @staticmethod
+    def _read_index_file(path, size):
+        """Entries of an index file that tile its data from byte 0, and the offset they reach."""
+        entries = {}
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        offset, length, timestamp, patient = json.loads(line)
+                    except ValueError:
+                        continue  # torn index line; the data scan recovers it
+                    entries[offset] = (length, timestamp, patient)
+        except FileNotFoundError:
+            pass
+
+        # Entries must tile the data file from byte 0; anything after the first
+        # gap (a crashed writer, a file edited by hand) is rescanned from the data
+        tiled, end = [], 0
+        for offset in sorted(entries):
+            length, timestamp, patient = entries[offset]
+            if offset != end or offset + length > size:
+                break
+            tiled.append((offset, length, timestamp, patient))
+            end = offset + length
+        return tiled, end
+
+    def _load_index(self, kind):
+        path = self.data_path(kind)
+        logsegments.recover(path)
+        segments = logsegments.load_segments(path)
+        index = _KindIndex(segments[-1]["segment"] + 1 if segments else 0)
+        entries = []
+        for segment in segments:
+            number = segment["segment"]
+            index_file = logsegments.segment_index_path(path, number)
+            tiled, end = self._read_index_file(index_file, segment["bytes"])
+            if end < segment["bytes"]:
+                rest = [self._describe(raw, stop - len(raw)) for stop, raw in logsegments.iter_segment(path, segment, end)]
+                self._write_index(index_file, rest)
+                tiled.extend(rest)
+            entries.extend((number,) + entry for entry in tiled)
+        tiled, _ = self._read_index_file(self.index_path(kind), self._data_size(kind))
+        entries.extend((index.active,) + entry for entry in tiled)
+        index.load(entries)
+        return index
+
+    def _data_size(self, kind):
+        try:
+            return os.path.getsize(self.data_path(kind))
+        except FileNotFoundError:
+            return 0
+
+    def _catch_up(self, kind, index):
+        """Indexes records appended to the active segment since the index was last read."""
+        if self._data_size(kind) <= index.end:
+            return
+        new_entries = []
+        path = self.data_path(kind)
+        with open(path, "rb") as f:
+            if logsegments.active_segment(path) != index.active:
+                return  # rotated just now; the next lookup reloads the index
+            f.seek(index.end)
+            offset = index.end
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # a writer is mid-line; pick it up next time
+                entry = self._describe(raw, offset)
+                if index.add(index.active, *entry):
+                    new_entries.append(entry)
+                offset += len(raw)
+        self._write_index(self.index_path(kind), new_entries)
+
+    @staticmethod
+    def _describe(raw, offset):
+        try:
+            record = json.loads(raw)
+            return offset, len(raw), record.get("timestamp", ""), patient_key(record)
+        except (ValueError, AttributeError):
+            return offset, len(raw), None, None
+
+    @staticmethod
+    def _write_index(path, entries):
+        if not entries:
+            return
+        payload = "".join(json.dumps(list(entry)) + "\n" for entry in entries)
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                payload = "\n" + payload   # end a torn line first, or our first entry would be lost in it
+            os.write(fd, payload.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    # --- Writes ---
+    def append(self, kind, record):
+        """Appends one record to the log of the given kind."""
+        self.append_many(kind, [record])
+
+    def append_many(self, kind, records, durable=False):
+        """
+        Appends several records to one log with a single write.
+        With ``durable`` the data is fsynced before returning.
+        """
+        if not records:
+            return
+        lines = [(json.dumps(record) + "\n").encode("utf-8") for record in records]
+        payload = b"".join(lines)
+        path = self.data_path(kind)
+        # The file lock keeps other processes from appending while a segment is being closed
+        with self._lock, locked(logsegments.lock_path(path)):
+            index = self._index(kind, held=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload)
+                # O_APPEND writes land at end-of-file, so the position after the
+                # write tells us where our lines start even with other writers
+                end = os.lseek(fd, 0, os.SEEK_CUR)
+                if durable:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            offset = end - len(payload)
+            entries = []
+            for record, line in zip(records, lines):
+                entries.append((offset, len(line), record.get("timestamp", ""), patient_key(record)))
+                offset += len(line)
+            self._write_index(self.index_path(kind), entries)
+            if entries[0][0] == index.end:
+                for entry in entries:
+                    index.add(index.active, *entry)
+            else:
+                # Another process appended in between; index its lines (and ours) in order
+                self._catch_up(kind, index)
+
+            if logsegments.needs_rotation(end):
+                self._catch_up(kind, index)
+                if logsegments.rotate(path, self.index_path(kind)) is not None:
+                    # Entries keep their segment number, so the closed segment's stay valid
+                    index.active += 1
+                    index.offsets = set()
+                    index.end = 0
+
+    # --- Reads ---
+    def _fetch(self, kind, entries):
+        records = []
+        if not entries:
+            return records
+        path = self.data_path(kind)
+        by_segment = {}
+        for timestamp, segment, offset, length in entries:
+            by_segment.setdefault(segment, []).append((offset, length, timestamp))
+        for segment, items in by_segment.items():
+            items.sort()
+            f = None
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                pass
+            if f is not None and logsegments.active_segment(path) != segment:
+                f.close()
+                f = None
+            if f is None:
+                records.extend(self._fetch_closed(path, segment, items))
+                continue
+            with f:
+                for offset, length, timestamp in items:
+                    f.seek(offset)
+                    records.append((timestamp, json.loads(f.read(length))))
+        records.sort(key=lambda r: r[0])
+        return [record for _, record in records]
+
+    @staticmethod
+    def _fetch_closed(path, number, items):
+        """Reads records of a closed segment, decompressing each block that holds one just once."""
+        with locked(logsegments.lock_path(path)):
+            pass  # a rotation that is under way finishes before its segment is read
+        segment = next(s for s in logsegments.load_segments(path) if s["segment"] == number)
+        blocks = {}
+        records = []
+        for offset, length, timestamp in items:
+            block = logsegments.block_of(segment, offset)
+            if block not in blocks:
+                blocks[block] = logsegments.read_block(path, segment, block)
+            start = offset - segment["starts"][block]
+            records.append((timestamp, json.loads(blocks[block][start:start + length])))
+        return records
+
+    @staticmethod
+    def _slice(entries, start, end):
+        lo = 0 if start is None else bisect_left(entries, (start,))
+        hi = len(entries) if end is None else bisect_right(entries, (end, float("inf")))
+        return entries[lo:hi]
+
+    def history(self, patient, kinds=None, start=None, end=None):
+        """
+        Returns one patient's records as a timestamp-ordered list of (kind, record).
+        Optionally restricted to some kinds and to the window [start, end].
+        """
+        return self.window(start, end, kinds=kinds, patient=patient)
+
+    def window(self, start=None, end=None, kinds=None, patient=None):
+        """Returns every (kind, record) with a timestamp in [start, end]."""
+        start, end = _as_timestamp(start), _as_timestamp(end)
+        results = []
+        with self._lock:
+            for kind in kinds or LOG_FILES:
+                index = self._index(kind)
+                if patient is None:
+                    entries = index.by_time
+                else:
+                    entries = index.by_patient.get(patient_key({"patient": patient}), [])
+                for record in self._fetch(kind, self._slice(entries, start, end)):
+                    results.append((kind, record))
+        results.sort(key=lambda r: r[1].get("timestamp", ""))
+        return results
+
+    def latest(self, kind, patient):
+        """Returns the most recent record of one kind for a patient, or None."""
+        with self._lock:
+            entries = self._index(kind).by_patient.get(patient_key({"patient": patient}), [])
+            records = self._fetch(kind, entries[-1:])
+        return records[0] if records else None
+
+    def patients(self, kind=None):
+        """Returns the set of patient keys that have at least one record."""
+        with self._lock:
+            keys = set()
+            for k in ([kind] if kind else LOG_FILES):
+                keys.update(p for p, entries in self._index(k).by_patient.items() if entries)
+        keys.discard("")
+        return keys
+
@@ -0,0 +1,155 @@
+# scoring.py
+# Scores and log records of the Diagnosis, Fitting and Monitoring tabs, shared by the
+# Streamlit UI and the headless API.
+from datetime import datetime
+
+import numpy as np
+
+import psychofit
+import staircase
+from confusion import TOKEN_INDEX, PhonemeConfusion, simulate_responses
+
+DIAGNOSIS_TRIALS = 48
+DIAGNOSIS_DOWN = 2       # 2-down/1-up track, converging on ~71% correct
+
+MODES = ["Unaided", "Aided"]
+ENVIRONMENTS = ["Quiet", "Noise"]
+CONDITIONS = [f"{m.lower()}_{e.lower()}" for m in MODES for e in ENVIRONMENTS]
+
+# Answers kept for each kind of Monitoring check-in
+CHECKIN_FIELDS = {
+    "Morning": ["sleep_quality", "hours_slept", "wake_feeling", "physical_readiness", "mental_readiness",
+                "mood_morning", "planned_goals", "anticipated_challenges"],
+    "Day": ["listening_effort", "communication_success", "situations", "interest_level",
+            "distractions", "energy_current", "challenges_faced"],
+    "Evening": ["hearing_fatigue", "general_fatigue", "emotional_state", "energy_dip_time",
+                "goals_accomplished", "hearing_success", "suggestions_to_self"],
+}
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+# --- Diagnosis ---
+def score_diagnosis(engine, group, trials, snr=None, previous=None):
+    """
+    Scores one Diagnosis run from its trials ([target, response, snr] each).
+    The SNR score is ``snr`` when given, otherwise the SNR-50 of a
+    psychometric function fitted to the trials (reported, with its 95%
+    interval and slope, under "fit"); ``previous`` is the patient's last
+    fit, which the new one starts from.
+    """
+    if not trials:
+        raise ValueError("A diagnosis needs at least one trial.")
+    confusion = PhonemeConfusion()
+    for trial in trials:
+        if len(trial) < 2 or trial[0] not in TOKEN_INDEX or trial[1] not in TOKEN_INDEX:
+            raise ValueError(f"Not a VCV trial: {trial!r}")
+        confusion.add(trial[0], trial[1])
+    if snr is None:
+        if any(len(trial) < 3 or trial[2] is None for trial in trials):
+            raise ValueError("Trials need an SNR each when no overall SNR is given.")
+        fit = psychofit.fit_session([float(t[2]) for t in trials], [t[0] == t[1] for t in trials], previous)
+        snr = fit["snr50"]
+    else:
+        fit = None
+    snr = float(snr)
+
+    norm = engine.curve(group)
+    # A category without trials has no error proportion; None, not 0%, which would read as perfect
+    error_proportion = [None if np.isnan(p) else int(round(p)) for p in confusion.error_proportions()]
+    return {
+        "snr": round(snr, 2),
+        "error_proportion": error_proportion,
+        "percentile": round(float(norm.percentile(snr)), 1),
+        "z_score": round(float(norm.z_score(snr)), 2),
+        "group": list(group),
+        "feature_errors": {k: round(float(v), 1) for k, v in confusion.feature_errors().items()},
+        "fit": fit,
+        "trials": [[t[0], t[1], None if len(t) < 3 or t[2] is None else round(float(t[2]), 2)] for t in trials],
+        "timestamp": _now(),
+    }
+
+
+def simulate_diagnosis(engine, group, rng=None, previous=None):
+    """Simulated Diagnosis run for a listener drawn from the group, until the test UI reports real trials."""
+    rng = np.random.default_rng() if rng is None else rng
+    norm = engine.curve(group)
+    individual_snr = rng.normal(norm.mean, norm.std)
+    track = staircase.simulate(norm.mean, 0.0, [individual_snr], 0.8, down=DIAGNOSIS_DOWN,
+                               max_trials=DIAGNOSIS_TRIALS, rng=rng, record_trials=True)
+    trial_snr, trial_correct = track["trial_snr"][0], track["trial_correct"][0]
+    targets, responses = simulate_responses(trial_correct, rng)
+    return score_diagnosis(engine, group, list(zip(targets, responses, trial_snr)), previous=previous)
+
+
+def diagnosis_record(result, patient, subjective=None):
+    """The diagnosis_log.json record of a scored run."""
+    result = result or {}
+    return {
+        "timestamp": _now(),
+        "patient": patient,
+        "snr": result.get("snr"),
+        "error_proportion": result.get("error_proportion"),
+        "percentile": result.get("percentile"),
+        "z_score": result.get("z_score"),
+        "feature_errors": result.get("feature_errors"),
+        "fit": result.get("fit"),
+        "trials": result.get("trials"),
+        "subjective": subjective or {},
+    }
+
+
+# --- Fitting ---
+def condition_key(mode, environment):
+    """Fitting condition name, e.g. "aided_noise"."""
+    key = f"{str(mode).lower()}_{str(environment).lower()}"
+    if key not in CONDITIONS:
+        raise ValueError(f"Unknown fitting condition: {mode!r} in {environment!r}")
+    return key
+
+
+def score_fitting(trials, previous=None):
+    """
+    Psychometric fit (see psychofit.fit_session) of one Fitting run from its
+    trials ([snr, correct] each), warm-started from ``previous``.
+    """
+    if not trials:
+        raise ValueError("A fitting run needs at least one trial.")
+    if any(len(trial) < 2 or trial[0] is None for trial in trials):
+        raise ValueError("Fitting trials are [snr, correct] pairs.")
+    return psychofit.fit_session([float(t[0]) for t in trials], [bool(t[1]) for t in trials], previous)
+
+
+def simulate_fitting(environment, rng=None, previous=None):
+    """Simulated Fitting run (fitted as score_fitting() does), until the test UI reports real trials."""
+    rng = np.random.default_rng() if rng is None else rng
+    start = -8.0 if environment == "Noise" else -2.0
+    track = staircase.simulate(start, 0.0, [rng.normal(start, 1.2)], 0.8, down=DIAGNOSIS_DOWN,
+                               max_trials=DIAGNOSIS_TRIALS, rng=rng, record_trials=True)
+    return score_fitting(list(zip(track["trial_snr"][0], track["trial_correct"][0])), previous)
+
+
+def fitting_record(patient, mode, environment, snr, subjective=None, fit=None):
+    """The fitting_log_extended.json record of one condition."""
+    condition_key(mode, environment)
+    return {
+        "timestamp": _now(),
+        "patient": patient,
+        "mode": mode,
+        "environment": environment,
+        "snr": snr,
+        "fit": fit,
+        "subjective": subjective or {},
+    }
+
+
+# --- Monitoring ---
+def checkin_record(patient, checkin_type, answers):
+    """The daily_log.json record of one check-in; answers outside the check-in's questions are dropped."""
+    if checkin_type not in CHECKIN_FIELDS:
+        raise ValueError(f"Unknown check-in: {checkin_type!r}")
+    record = {"timestamp": _now(), "patient": patient, "checkin_type": checkin_type}
+    record.update((field, answers[field]) for field in CHECKIN_FIELDS[checkin_type] if field in answers)
+    return record
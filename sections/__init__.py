@@ -0,0 +1,17 @@
+# sections/__init__.py
+# Each tab of the app lives in its own module, imported the first time it is opened.
+import importlib
+
+SECTIONS = {
+    "Profile": "sections.profile",
+    "Screener": "sections.screener",
+    "Diagnosis": "sections.diagnosis",
+    "Fitting": "sections.fitting",
+    "Monitoring": "sections.monitoring",
+    "Summary": "sections.summary",
+}
+
+
+def render(choice):
+    """Renders the selected tab. Only that tab's module (and its heavy imports) gets loaded."""
+    importlib.import_module(SECTIONS[choice]).render()
@@ -0,0 +1,99 @@
+# sections/diagnosis.py
+import streamlit as st
+
+import charts
+import config
+import scoring
+from confusion import ERROR_LABELS
+from sections.shared import get_chart_cache, get_log_writer, get_normative_engine, get_summary_view, spill_run
+from sessionhistory import RunHistory
+
+
+def previous_fit():
+    """This session's last fit, else the last saved one, for the next run to start from."""
+    fit = st.session_state.diagnosis_results.last_fit()
+    if fit:
+        return fit
+    summary = get_summary_view().load(st.session_state.get("profile_name", "")) or {}
+    return ((summary.get("diagnosis") or {}).get("latest") or {}).get("fit")
+
+
+def render():
+    """Diagnosis tab: unaided VCV-in-noise test against normative data."""
+    # Fancy stacked icon header
+    st.markdown("""
+        <div style='text-align: center; margin-top: 1em; margin-bottom: 1em;'>
+            <div style='font-size: 60px;'>🩺</div>
+            <h2 style='margin: 0;'>Diagnosis</h2>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    if "diagnosis_results" not in st.session_state:
+        st.session_state.diagnosis_results = RunHistory()
+    history = st.session_state.diagnosis_results
+
+    # --- Instructions ---
+    st.markdown("### 📝 Test Instructions")
+    st.markdown("""
+    In this unaided test, you'll hear **VCV (vowel-consonant-vowel)** words in background noise.  
+    Listen carefully and select the option that sounds most like what you heard.
+    This helps us understand your natural hearing ability in noisy environments.
+    """)
+
+    # --- Run Test ---
+    if st.button("▶️ Run Diagnosis Test"):
+        engine = get_normative_engine()
+        engine.refresh()
+        group = engine.group_for(st.session_state.get("profile_age"), st.session_state.get("profile_language"))
+        result = scoring.simulate_diagnosis(engine, group, previous=previous_fit())
+        spill_run("diagnosis", history.append(result["snr"], result["fit"], result["timestamp"], detail=result))
+
+    # --- Plot Latest Result ---
+    # Redrawn on every rerun, but the image is only rendered when the result changes
+    latest = history.latest()
+    if latest:
+        norm = get_normative_engine().curve(tuple(latest["group"]))
+        st.markdown(f"#### Your SNR: **{latest['snr']:.2f} dB**")
+        if latest.get("fit"):
+            low, high = latest["fit"]["snr50_ci"]
+            st.caption(f"95% interval {low:.1f} to {high:.1f} dB; slope {latest['fit']['slope']:.2f} per dB")
+        st.markdown(f"Normative percentile: **{latest['percentile']:.0f}** (z = {latest['z_score']:+.2f}; lower SNR is better)")
+        features = latest["feature_errors"]
+        st.markdown(f"Consonant feature errors: voicing **{features['voicing']:.0f}%**, "
+                    f"manner **{features['manner']:.0f}%**, place **{features['place']:.0f}%** "
+                    f"({len(latest['trials'])} trials)")
+        untested = [label for label, p in zip(ERROR_LABELS, latest["error_proportion"]) if p is None]
+        if untested:
+            st.caption(f"Error proportion N/A (no trials) for: {', '.join(untested)}")
+
+        if config.CHART_BACKEND == "native":
+            col1, col2 = st.columns(2)
+            col1.vega_lite_chart(spec=charts.normative_spec(norm.x, norm.pdf, latest["snr"]), width="stretch")
+            col2.bar_chart({"Phoneme": ERROR_LABELS, "Error Proportion (%)": latest["error_proportion"]}, x="Phoneme")
+        else:
+            st.image(charts.diagnosis_png(get_chart_cache(), norm.x, norm.pdf, latest["snr"],
+                                          latest["error_proportion"], ERROR_LABELS))
+
+    st.markdown(f"🧾 Total diagnosis sessions: **{history.total}**")
+
+    # --- Subjective Feedback ---
+    with st.expander("🧠 Subjective Experience"):
+        perceived_difficulty = st.slider("How difficult was the listening task?", 0, 10, 5)
+        noise_level = st.selectbox("Was background noise distracting?", ["Not at all", "A little", "Moderately", "Very much"])
+        emotional_state = st.selectbox("How did you feel during the task?", ["Calm", "Focused", "Frustrated", "Anxious", "Confident"])
+        time_of_day = st.selectbox("What time of day was the test done?", ["Morning", "Afternoon", "Evening"])
+        notes = st.text_area("Any additional notes or context (e.g., noisy room, tired, etc.)")
+
+    # --- Save Diagnosis Data ---
+    if st.button("💾 Save Diagnosis Data"):
+        last_result = history.latest() or {}
+        diagnosis_log = scoring.diagnosis_record(last_result, st.session_state.get("profile_name", ""), {
+            "perceived_difficulty": perceived_difficulty,
+            "noise_level": noise_level,
+            "emotional_state": emotional_state,
+            "time_of_day": time_of_day,
+            "notes": notes
+        })
+
+        get_log_writer().submit("diagnosis", diagnosis_log)
+        st.success("Diagnosis session saved.")
@@ -0,0 +1,149 @@
+# sections/fitting.py
+from functools import lru_cache
+
+import streamlit as st
+
+import benefit
+import charts
+import config
+import scoring
+from instrumentation import timer
+from sections.shared import get_chart_cache, get_log_writer, get_record_store, get_summary_view, spill_run
+from sessionhistory import RunHistory
+
+
+def previous_fit(condition_key):
+    """This session's last fit of a condition, else the last saved one, for the next run to start from."""
+    fit = st.session_state.fitting_log[condition_key].last_fit()
+    if fit:
+        return fit
+    summary = get_summary_view().load(st.session_state.get("profile_name", "")) or {}
+    return (summary.get("fitting") or {}).get("conditions", {}).get(condition_key, {}).get("fit")
+
+
+@lru_cache(maxsize=64)
+def _session_benefit(runs):
+    return benefit.patient_benefit({key: list(snrs) for key, snrs in runs})
+
+
+@lru_cache(maxsize=256)
+def _saved_benefit(patient, version):
+    return benefit.patient_benefit(benefit.history_runs(
+        record for _, record in get_record_store().history(patient, kinds=["fitting"])))
+
+
+def saved_benefit(patient):
+    """
+    Benefit over every saved Fitting run of a patient. It is cached by the log
+    position of the patient's last Fitting record in their summary, so the
+    history is read and bootstrapped again only after a new save (from any
+    server process), not on every rerun.
+    """
+    summary = get_summary_view().load(patient) or {}
+    version = (summary.get("positions") or {}).get("fitting")
+    return _saved_benefit(patient, tuple(version)) if version else {}
+
+
+def benefit_lines(results):
+    """One markdown line per environment: the benefit, its interval and p-value."""
+    lines = []
+    for env, r in results.items():
+        line = f"- {env.title()}: **{r['benefit']:+.1f} dB**"
+        if r["ci"] is not None:
+            low, high = r["ci"]
+            verdict = "significant" if r["significant"] else "not significant"
+            line += f" (95% CI {low:+.1f} to {high:+.1f} dB, p = {r['p_value']:.3f}, {verdict})"
+        else:
+            line += " (one run in a mode; run more for an interval)"
+        if r["method"] == "paired":
+            line += f", paired over {r['pairs']} visits"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render():
+    """Fitting tab: compares aided and unaided performance in quiet and noise."""
+    # Fancy stacked icon header
+    st.markdown("""
+        <div style='text-align: center; margin-top: 1em; margin-bottom: 1em;'>
+            <div style='font-size: 60px;'>🦻</div>
+            <h2 style='margin: 0;'>Fitting</h2>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Initialize session state
+    if "fitting_log" not in st.session_state:
+        st.session_state.fitting_log = {key: RunHistory() for key in scoring.CONDITIONS}
+
+    st.markdown("Run VCV tests under different conditions to compare benefit.")
+
+    # --- Condition Selection ---
+    col1, col2 = st.columns(2)
+    mode = col1.radio("Hearing Mode", scoring.MODES, horizontal=True)
+    env = col2.radio("Listening Environment", scoring.ENVIRONMENTS, horizontal=True)
+
+    condition_key = scoring.condition_key(mode, env)
+
+    if st.button(f"▶️ Run Test ({mode} in {env})"):
+        fit = scoring.simulate_fitting(env, previous=previous_fit(condition_key))
+        spill_run(condition_key, st.session_state.fitting_log[condition_key].append(fit["snr50"], fit))
+        low, high = fit["snr50_ci"]
+        st.success(f"{mode} in {env} SNR: {fit['snr50']:.2f} dB (95% interval {low:.1f} to {high:.1f} dB)")
+
+    # --- Summary Counts ---
+    st.markdown("### ✅ Session Counts")
+    for k, v in st.session_state.fitting_log.items():
+        label = k.replace("_", " ").title()
+        st.markdown(f"- {label}: **{v.total} session(s)**")
+
+    # --- Subjective Experience ---
+    with st.expander("🧠 Subjective Experience"):
+        perceived_benefit = st.slider("How much benefit did you feel in this condition?", 0, 10, 5)
+        clarity = st.selectbox("Was speech clearer in this test?", ["Yes", "No", "Unsure"])
+        effort = st.slider("Listening effort required?", 0, 10, 5)
+        feedback_notes = st.text_area("Additional comments for this condition:")
+
+    # --- Save Session ---
+    if st.button("💾 Save Fitting Entry"):
+        last_run = st.session_state.fitting_log[condition_key].latest()
+        if last_run is None:
+            st.warning(f"Run a test in this condition ({mode} in {env}) before saving it.")
+        else:
+            entry = scoring.fitting_record(st.session_state.get("profile_name", ""), mode, env, last_run["snr"], {
+                "benefit": perceived_benefit,
+                "clarity": clarity,
+                "effort": effort,
+                "notes": feedback_notes
+            }, last_run["fit"])
+
+            get_log_writer().submit("fitting", entry)
+            st.success("Fitting entry saved.")
+
+    # --- Visual Comparison ---
+    if any(len(v) > 0 for v in st.session_state.fitting_log.values()):
+        st.markdown("### 📊 Condition Comparison")
+        series = {
+            key.replace("_", " ").title(): results.snrs().tolist()
+            for key, results in st.session_state.fitting_log.items() if results
+        }
+        if config.CHART_BACKEND == "native":
+            st.line_chart(charts.padded_series(series), x_label="Session", y_label="SNR (dB)")
+        else:
+            st.image(charts.fitting_png(get_chart_cache(), series))
+
+    # --- Aided Benefit ---
+    st.markdown("### 🎯 Aided Benefit")
+    st.caption("Unaided minus aided SNR; positive means the hearing aids help.")
+    patient = st.session_state.get("profile_name", "").strip()
+    with timer("fitting.benefit"):
+        # Cached by the runs themselves, so a rerun neither redoes the bootstrap nor redraws its interval
+        session = _session_benefit(tuple(
+            (key, tuple(results.snrs().tolist())) for key, results in st.session_state.fitting_log.items() if results))
+        saved = saved_benefit(patient) if patient else {}
+    st.markdown("**This session**")
+    st.markdown(benefit_lines(session) or "Run aided and unaided tests in the same environment to see the benefit.")
+    st.markdown("**All saved sessions**")
+    if patient:
+        st.markdown(benefit_lines(saved) or "No saved aided and unaided entries in the same environment yet.")
+    else:
+        st.markdown("Enter the patient's name on the Profile tab to include saved sessions.")
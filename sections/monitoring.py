@@ -0,0 +1,147 @@
+# sections/monitoring.py
+import streamlit as st
+
+import charts
+import config
+import scoring
+from instrumentation import timer
+from sections.shared import get_chart_cache, get_log_writer, get_trend_engine
+
+TREND_LABELS = {
+    "sleep": "Sleep quality",
+    "listening_effort": "Listening effort",
+    "hearing_fatigue": "Hearing fatigue",
+    "general_fatigue": "General fatigue",
+    "energy_current": "Energy",
+}
+
+
+def render():
+    """Monitoring tab: morning, day and evening check-ins."""
+    st.markdown("""
+    <div style='text-align: center; margin-top: 1em; margin-bottom: 1em;'>
+        <div style='font-size: 60px;'>📈</div>
+        <h2 style='margin: 0;'>Monitoring</h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("Choose the check-in that best fits your time of day:")
+
+    col1, col2, col3 = st.columns(3)
+    # Keep the chosen check-in across reruns, or the Save button below could never see it
+    if "checkin_time" not in st.session_state:
+        st.session_state.checkin_time = None
+
+    if col1.button("🕗 Morning Check-In"):
+        st.session_state.checkin_time = "Morning"
+    if col2.button("☀️ Day Activity Check-In"):
+        st.session_state.checkin_time = "Day"
+    if col3.button("🌙 Evening Check-In"):
+        st.session_state.checkin_time = "Evening"
+
+    checkin_time = st.session_state.checkin_time
+
+    if checkin_time == "Morning":
+        with st.expander("🛌 Sleep & Readiness"):
+            sleep_quality = st.selectbox("How would you rate your sleep quality last night?", ["Very Poor", "Poor", "Fair", "Good", "Excellent"])
+            hours_slept = st.radio("How many hours did you sleep?", ["<4", "4–6", "6–8", "8+"])
+            wake_feeling = st.selectbox("How rested do you feel this morning?", ["Exhausted", "Tired", "Okay", "Refreshed"])
+            physical_readiness = st.slider("How physically ready do you feel for today?", 0, 10, 5)
+            mental_readiness = st.slider("How mentally ready do you feel for today?", 0, 10, 5)
+
+        with st.expander("🧘 Wellbeing & Goals"):
+            mood_morning = st.selectbox("What is your current mood?", ["Stressed", "Anxious", "Neutral", "Optimistic", "Excited"])
+            planned_goals = st.text_area("What are your listening-related goals today? (e.g., meeting, social lunch, call)", "")
+            anticipated_challenges = st.text_area("Any challenging situations expected today?", "")
+
+    elif checkin_time == "Day":
+        with st.expander("🎧 Listening Experience"):
+            listening_effort = st.slider("How much effort is it taking to follow conversations today?", 0, 10, 5)
+            communication_success = st.slider("How successful are you in understanding others?", 0, 10, 6)
+            situations = st.multiselect("What listening situations have you encountered so far?", ["One-on-one", "Group", "Online Meeting", "Phone", "Public Transport", "Restaurant", "Other"])
+            interest_level = st.slider("How interested were you in the conversations?", 0, 10, 5)
+
+        with st.expander("🎯 Focus & Energy"):
+            distractions = st.slider("How distracted have you felt?", 0, 10, 5)
+            energy_current = st.slider("Current energy level:", 0, 10, 5)
+            challenges_faced = st.text_area("Describe any challenges you've faced so far today:", "")
+
+    elif checkin_time == "Evening":
+        with st.expander("😮‍💨 Fatigue & Wind-Down"):
+            hearing_fatigue = st.slider("How tired are your ears from today's listening?", 0, 10, 5)
+            general_fatigue = st.slider("Overall fatigue level now:", 0, 10, 6)
+            emotional_state = st.selectbox("What's your emotional state right now?", ["Drained", "Okay", "Content", "Happy"])
+            energy_dip_time = st.selectbox("When did you feel the biggest energy dip today?", ["Morning", "Afternoon", "Evening", "All day"])
+
+        with st.expander("✅ Reflection & Accomplishment"):
+            goals_accomplished = st.text_area("Which goals did you accomplish today?", "")
+            hearing_success = st.slider("How successful do you feel in managing hearing challenges today?", 0, 10, 5)
+            suggestions_to_self = st.text_area("Any ideas to improve tomorrow's experience?", "")
+
+    # Save Check-in Log
+    if checkin_time and st.button("💾 Save Check-In"):
+        if checkin_time == "Morning":
+            answers = {
+                "sleep_quality": sleep_quality,
+                "hours_slept": hours_slept,
+                "wake_feeling": wake_feeling,
+                "physical_readiness": physical_readiness,
+                "mental_readiness": mental_readiness,
+                "mood_morning": mood_morning,
+                "planned_goals": planned_goals,
+                "anticipated_challenges": anticipated_challenges
+            }
+        elif checkin_time == "Day":
+            answers = {
+                "listening_effort": listening_effort,
+                "communication_success": communication_success,
+                "situations": situations,
+                "interest_level": interest_level,
+                "distractions": distractions,
+                "energy_current": energy_current,
+                "challenges_faced": challenges_faced
+            }
+        else:
+            answers = {
+                "hearing_fatigue": hearing_fatigue,
+                "general_fatigue": general_fatigue,
+                "emotional_state": emotional_state,
+                "energy_dip_time": energy_dip_time,
+                "goals_accomplished": goals_accomplished,
+                "hearing_success": hearing_success,
+                "suggestions_to_self": suggestions_to_self
+            }
+
+        checkin_log = scoring.checkin_record(st.session_state.get("profile_name", ""), checkin_time, answers)
+        get_log_writer().submit("monitoring", checkin_log)
+        st.success(f"{checkin_time} check-in saved successfully!")
+
+    # --- Trends ---
+    with st.expander("📊 Trends"):
+        # A collapsed expander still runs its body, so reading new check-ins and drawing waits for the toggle
+        if not st.toggle("Show trends", key="monitoring_show_trends"):
+            return
+        patient = st.session_state.get("profile_name", "").strip()
+        with timer("monitoring.trends"):
+            engine = get_trend_engine()
+            engine.update()
+            trends = engine.trends(patient) if patient else None
+        if not trends:
+            st.markdown("No saved check-ins for this patient yet.")
+            return
+        st.markdown(f"{trends['checkins']} check-in(s), most recent `{trends['last']}`")
+        rows = [f"| {label} | {trends['averages'][m].get('7d', '–')} | {trends['averages'][m].get('30d', '–')} |"
+                for m, label in TREND_LABELS.items() if m in trends["averages"]]
+        if rows:
+            st.markdown("| Score (0-10) | 7-day mean | 30-day mean |\n|---|---|---|\n" + "\n".join(rows))
+        if trends["sleep_effort_r"] is not None:
+            st.markdown(f"Sleep vs. listening effort: r = **{trends['sleep_effort_r']:+.2f}** "
+                        f"({trends['sleep_effort_pairs']} check-in pairs)")
+        daily = {TREND_LABELS[m]: series for m, series in trends["daily"].items() if m in TREND_LABELS}
+        if daily and config.CHART_BACKEND == "native":
+            st.line_chart(daily, y_label="Daily mean (0-10)")
+        elif daily:
+            st.image(charts.trends_png(get_chart_cache(), daily))
+        for dip in trends["dips"][-5:]:
+            label = TREND_LABELS.get(dip["metric"], dip["metric"].replace("_", " ").capitalize())
+            st.warning(f"{dip['timestamp'][:16]} · {label} {dip['value']:.0f} vs. usual {dip['baseline']:.1f}")
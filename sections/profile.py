@@ -0,0 +1,141 @@
+# sections/profile.py
+import streamlit as st
+from datetime import datetime
+
+from instrumentation import timer
+from sections.shared import get_log_writer, get_profile_store
+
+
+def render():
+    """Profile tab: patient details, audiogram history and wellbeing questionnaire."""
+    # Fancy stacked icon header
+    st.markdown("""
+        <div style='text-align: center; margin-top: 1em; margin-bottom: 1em;'>
+            <div style='font-size: 60px;'>👤</div>
+            <h2 style='margin: 0;'>Profile</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # --- Basic Patient Information ---
+    with st.expander("🗞 Basic Information", expanded=True), timer("profile.basic_information"):
+        name = st.text_input("Full Name", key="profile_name")
+        age = st.number_input("Age", min_value=0, max_value=120, value=30, key="profile_age")
+        gender = st.selectbox("Gender", ["Male", "Female", "Other"], key="profile_gender")
+        primary_language = st.text_input("Primary Language Spoken", key="profile_language")
+
+    # --- Medical & Hearing History ---
+    with st.expander("🚒 Medical & Hearing History"), timer("profile.medical_history"):
+        past_hearing_test = st.selectbox("Have you had a hearing test before?", ["Yes", "No"], key="profile_past_test")
+        freqs = ["250 Hz", "500 Hz", "1000 Hz", "2000 Hz", "4000 Hz", "8000 Hz"]
+        air_condition = {}
+        bone_condition = {}
+
+        if past_hearing_test == "Yes":
+            air_condition = {"Left": {}, "Right": {}}
+            bone_condition = {"Left": {}, "Right": {}}
+
+            st.markdown("**Enter Previous Hearing Test Results (dB HL) for Each Ear:**")
+
+            st.markdown("*Air Conduction*")
+            st.markdown("**Left Ear**")
+            ac_left_cols = st.columns(len(freqs))
+            for i, freq in enumerate(freqs):
+                with ac_left_cols[i]:
+                    air_condition["Left"][freq] = st.number_input(f"L AC {freq}", value=0, key=f"ac_L_{freq}")
+
+            st.markdown("**Right Ear**")
+            ac_right_cols = st.columns(len(freqs))
+            for i, freq in enumerate(freqs):
+                with ac_right_cols[i]:
+                    air_condition["Right"][freq] = st.number_input(f"R AC {freq}", value=0, key=f"ac_R_{freq}")
+
+            st.markdown("*Bone Conduction*")
+            st.markdown("**Left Ear**")
+            bc_left_cols = st.columns(len(freqs))
+            for i, freq in enumerate(freqs):
+                with bc_left_cols[i]:
+                    bone_condition["Left"][freq] = st.number_input(f"L BC {freq}", value=0, key=f"bc_L_{freq}")
+
+            st.markdown("**Right Ear**")
+            bc_right_cols = st.columns(len(freqs))
+            for i, freq in enumerate(freqs):
+                with bc_right_cols[i]:
+                    bone_condition["Right"][freq] = st.number_input(f"R BC {freq}", value=0, key=f"bc_R_{freq}")
+
+    with st.expander("📉 Hearing Difficulties & Impact"), timer("profile.difficulties"):
+        hearing_changes = st.selectbox("Have you experienced sudden or rapid hearing changes?", ["Yes", "No"], key="profile_changes")
+        ear_conditions = st.text_area("Any history of ear infections, surgeries, or trauma?", key="profile_ear_conditions")
+        family_history = st.selectbox("Do you have a family history of hearing loss?", ["Yes", "No", "Not sure"], key="profile_family_history")
+        tinnitus = st.selectbox("Do you experience ringing in your ears (tinnitus)?", ["Yes", "No", "Sometimes"], key="profile_tinnitus")
+        balance_issues = st.selectbox("Do you have dizziness or balance issues?", ["Yes", "No", "Sometimes"], key="profile_balance")
+        medications = st.text_area("List any current medications (esp. ototoxic ones):", key="profile_medications")
+
+    with st.expander("🎤 Hearing Symptoms and Communication Challenges"), timer("profile.symptoms"):
+        worse_ear = st.selectbox("Which ear do you feel is worse?", ["Left", "Right", "Both", "Not sure"], key="profile_worse_ear")
+        background_noise = st.selectbox("Do you struggle to hear in noisy settings?", ["Never", "Sometimes", "Often", "Always"], key="profile_noise_struggle")
+        phone_difficulty = st.selectbox("Do you have trouble hearing on the phone?", ["Yes", "No"], key="profile_phone")
+        volume_increase = st.selectbox("Do you turn up the volume on devices more than others?", ["Yes", "No"], key="profile_volume")
+        mumbling_complaints = st.selectbox("Do others seem to mumble?", ["Yes", "No"], key="profile_mumble")
+        hearing_duration = st.text_input("How long have you noticed hearing difficulties?", key="profile_duration")
+
+    with st.expander("📣 Hearing Aid Use and Daily Impact"), timer("profile.hearing_aid_use"):
+        hearing_aid_use = st.selectbox("Do you currently use hearing aids or assistive devices?", ["Yes", "No"], key="profile_ha_use")
+        hearing_aid_experience = st.text_area("If yes, how are they working for you? If no, have you tried them before?", key="profile_ha_experience")
+        daily_impact = st.text_area("How is your hearing affecting your daily life (work, social, family)?", key="profile_impact")
+        patient_goals = st.text_area("What would you like to achieve with better hearing?", key="profile_goals")
+
+    with st.expander("🔋 Wellbeing & Energy Check-In"), timer("profile.wellbeing"):
+        sleep_quality = st.selectbox("How would you rate your sleep quality this week?", ["Very Poor", "Poor", "Fair", "Good", "Excellent"], key="profile_sleep_quality")
+        sleep_hours = st.radio("Avg. hours of sleep per night?", ["<4", "4–6", "6–8", "8+"], key="profile_sleep_hours")
+        wakes_rested = st.selectbox("Do you wake up feeling rested?", ["Yes", "No", "Sometimes"], key="profile_wake_rested")
+        fatigue_level = st.slider("How fatigued do you feel at the end of a typical day?", 0, 10, 5, key="profile_fatigue_level")
+        energy_dip = st.selectbox("When do you feel the lowest energy?", ["Morning", "Afternoon", "Evening", "It varies"], key="profile_energy_dip")
+        fatigue_impact = st.selectbox("Does fatigue affect your daily tasks?", ["Never", "Rarely", "Sometimes", "Often", "Always"], key="profile_fatigue_impact")
+        stress_triggers = st.multiselect("⚠️ Which situations are most challenging for you?", ["Social interactions", "Workload pressure", "Noise", "Unpredictability", "Deadlines", "Group settings", "Other"], key="profile_stress_triggers")
+        social_fatigue = st.selectbox("Do social interactions leave you emotionally drained?", ["Never", "Rarely", "Sometimes", "Often", "Always"], key="profile_social_fatigue")
+        situation_avoidance = st.selectbox("Do you avoid situations due to discomfort/exhaustion?", ["Yes", "No", "Sometimes"], key="profile_situation_avoidance")
+
+    # --- Save Button ---
+    if st.button("💾 Save Profile"):
+        profile_data = {
+            "timestamp": datetime.now().isoformat(),
+            "name": name,
+            "age": age,
+            "gender": gender,
+            "primary_language": primary_language,
+            "past_hearing_test": past_hearing_test,
+            "air_condition": air_condition,
+            "bone_condition": bone_condition,
+            "hearing_changes": hearing_changes,
+            "ear_conditions": ear_conditions,
+            "family_history": family_history,
+            "tinnitus": tinnitus,
+            "balance_issues": balance_issues,
+            "medications": medications,
+            "worse_ear": worse_ear,
+            "background_noise": background_noise,
+            "phone_difficulty": phone_difficulty,
+            "volume_increase": volume_increase,
+            "mumbling_complaints": mumbling_complaints,
+            "hearing_duration": hearing_duration,
+            "hearing_aid_use": hearing_aid_use,
+            "hearing_aid_experience": hearing_aid_experience,
+            "daily_impact": daily_impact,
+            "patient_goals": patient_goals,
+            "sleep_quality": sleep_quality,
+            "sleep_hours": sleep_hours,
+            "wakes_rested": wakes_rested,
+            "fatigue_level": fatigue_level,
+            "energy_dip": energy_dip,
+            "fatigue_impact": fatigue_impact,
+            "stress_triggers": stress_triggers,
+            "social_fatigue": social_fatigue,
+            "situation_avoidance": situation_avoidance
+        }
+
+        if not name.strip():
+            st.error("Please enter the patient's full name before saving.")
+        else:
+            get_profile_store().save(profile_data)
+            get_log_writer().submit("profile", profile_data)
+            st.success("Profile data saved successfully!")
@@ -0,0 +1,49 @@
+# sections/screener.py
+import streamlit as st
+
+from adaptivetest import adaptive_test
+from instrumentation import timer
+
+
+def render():
+    """Screener tab: runs the adaptive VCV screening test."""
+    # Fancy stacked icon header
+    st.markdown("""
+        <div style='text-align: center; margin-top: 1em; margin-bottom: 1em;'>
+            <div style='font-size: 60px;'>👂</div>
+            <h2 style='margin: 0;'>Screener</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    if "run_screener_triggered" not in st.session_state:
+        st.session_state.run_screener_triggered = False
+
+    with st.expander("📝 Test Instructions", expanded=not st.session_state.run_screener_triggered):
+        st.markdown("""
+        You will hear **VCV** words (like _\"ala\"_, _\"omo\"_, _\"iki\"_).
+        Choose the word you hear by pressing the correct option below.
+        Try your best even if uncertain!
+        """)
+
+    if not st.session_state.run_screener_triggered:
+        st.subheader("🧪 Setup Parameters")
+        client_name = st.session_state.get("profile_name", "").strip()
+        if not client_name:
+            client_name = st.text_input("Enter Client Name or ID", key="client_name_manual")
+
+        threshold_val = st.number_input("Initial Threshold Value", value=-8.0, step=0.1)
+        convergence_criteria = st.number_input("Convergence Criteria", value=1.0, step=0.1)
+
+        if st.button("Run Screener"):
+            st.session_state.run_screener_triggered = True
+            st.rerun()
+    else:
+        # 🎯 Call the test UI
+        client_name = st.session_state.get("profile_name") or st.session_state.get("client_name_manual", "")
+        threshold_val = -8.0
+        convergence_criteria = 1.0
+        with timer("screener.adaptive_test"):
+            result_word = adaptive_test(threshold_val, convergence_criteria, client_name)
+
+        if result_word:
+            st.success(f"You selected: {result_word}")
@@ -0,0 +1,87 @@
+# sections/shared.py
+# Resources shared by every tab and every session of this server process.
+import streamlit as st
+
+from profilestore import ProfileStore
+from recordstore import RecordStore
+
+
+@st.cache_resource
+def get_record_store():
+    """One indexed record store shared by every session of this server process."""
+    return RecordStore()
+
+
+@st.cache_resource
+def get_profile_store():
+    """Current profile of every patient, shared by every session of this server process."""
+    from instrumentation import PROFILER
+    store = ProfileStore()
+    PROFILER.add_gauges("profile_store", store.stats)
+    return store
+
+
+@st.cache_resource
+def get_normative_engine():
+    """Normative curves and CDF tables, learning from saved Diagnosis records as they arrive."""
+    import os
+    from normative import NormativeEngine
+    from normdb import NormativeDB
+    db = NormativeDB(get_record_store().data_path("diagnosis"), get_profile_store())
+    if not os.path.exists(db.checkpoint):
+        db.build(workers=1)  # no process pool inside the threaded server
+    return NormativeEngine(db=db)
+
+
+@st.cache_resource
+def get_chart_cache():
+    """Rendered chart images shared by every session of this server process."""
+    from charts import ChartCache
+    from instrumentation import PROFILER
+    cache = ChartCache()
+    PROFILER.add_gauges("chart_cache", cache.stats)
+    return cache
+
+
+@st.cache_resource
+def get_log_writer():
+    """Background writer the Save buttons hand their records to."""
+    from instrumentation import PROFILER
+    from logwriter import BatchedLogWriter
+    writer = BatchedLogWriter(get_record_store())
+    PROFILER.add_gauges("log_writer", writer.metrics)
+    return writer
+
+
+@st.cache_resource
+def get_trend_engine():
+    """Rolling Monitoring statistics, resumed from their checkpoint once per server process."""
+    from trends import TrendEngine
+    return TrendEngine(get_record_store().data_path("monitoring"))
+
+
+@st.cache_resource
+def get_summary_view():
+    """Materialized per-patient summaries, folded forward from the logs whenever one is read."""
+    from summaryview import SummaryView
+    return SummaryView(get_record_store())
+
+
+@st.cache_resource
+def get_note_generator():
+    """Background writer of the Summary tab's clinical notes, with its cache."""
+    from instrumentation import PROFILER
+    from notes import NoteGenerator
+    generator = NoteGenerator()
+    PROFILER.add_gauges("notes", generator.stats)
+    return generator
+
+
+def spill_run(test, run):
+    """Writes a run that fell out of a session's in-memory history to session_history.json."""
+    if run is None:
+        return
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    get_log_writer().submit("session", dict(run, patient=st.session_state.get("profile_name", ""), test=test,
+                                            session=ctx.session_id if ctx else None))
@@ -0,0 +1,149 @@
+# sections/summary.py
+import streamlit as st
+from datetime import datetime
+
+import config
+from instrumentation import timer
+from notes import note_inputs
+from sections.shared import get_log_writer, get_note_generator, get_record_store, get_summary_view
+
+NOTE_POLL_SECONDS = 0.3   # how often a note being written is redrawn
+
+
+@st.fragment(run_every=NOTE_POLL_SECONDS)
+def _streaming_note(job):
+    """
+    Redraws a note as the worker writes it, then reruns the page once it is
+    done. The rerun shows a failure with a Retry button: the generator hands
+    the failed job back until its retry is due, rather than starting it again.
+    """
+    if job.done:
+        st.rerun()
+    st.markdown(job.text() + " ▌" if job.text() else "_Drafting the note…_")
+
+
+def _note(generator, inputs, job):
+    if not job.done:
+        _streaming_note(job)
+    elif job.error:
+        st.error(f"The note could not be written ({job.error}). It is tried again after "
+                 f"{config.NOTES_RETRY_SECONDS:.0f} s, or now with Retry.")
+        if st.button("🔁 Retry Note"):
+            generator.retry(inputs)
+            st.rerun()
+    else:
+        st.markdown(job.text())
+        st.caption(f"Draft by the {generator.backend.name} backend. Review it before adding it to the record.")
+
+
+def render():
+    """Summary tab: session overview and clinician notes."""
+    st.markdown("""
+        <div style='text-align: center; margin-top: 1em; margin-bottom: 1em;'>
+            <div style='font-size: 60px;'>📄 </div>
+            <h2 style='margin: 0;'> Summary</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Placeholder summary
+    name = st.session_state.get("profile_name", "Patient")
+    age = st.session_state.get("profile_age", "N/A")
+    primary_language = st.session_state.get("profile_language", "N/A")
+    tinnitus = st.session_state.get("profile_tinnitus", "N/A")
+    ha_use = st.session_state.get("profile_ha_use", "N/A")
+
+    # The materialized summary is one file read, after folding in whatever was saved since the last one
+    patient = st.session_state.get("profile_name", "").strip()
+    with timer("summary.view"):
+        summary = get_summary_view().load(patient) if patient else None
+
+    diagnosis_results = st.session_state.get("diagnosis_results")
+    latest_diagnosis = (diagnosis_results.latest() if diagnosis_results else None) or {}
+    if not latest_diagnosis and summary and summary["diagnosis"]["latest"]:
+        latest_diagnosis = summary["diagnosis"]["latest"]  # from an earlier visit
+
+    diagnosis_snr = latest_diagnosis.get("snr", "N/A")
+    diagnosis_time = latest_diagnosis.get("timestamp", "N/A")
+
+    st.markdown("### 🧾 Summary Preview:")
+    st.markdown(f"""
+    - **Patient Name**: {name}
+    - **Age**: {age}
+    - **Primary Language**: {primary_language}
+    - **Hearing Aid Use**: {ha_use}
+    - **Tinnitus**: {tinnitus}
+    - **Most Recent Diagnosis SNR**: {diagnosis_snr} dB (Date: {diagnosis_time})
+    """)
+
+    # --- Clinical Note ---
+    # Drafted in the background and cached by its input data, so the rerun never waits on it.
+    # Only shown when a notes backend is configured.
+    if config.NOTES_BACKEND:
+        st.markdown("### 🤖 Clinical Note")
+        if not patient:
+            st.info("Enter the patient's name on the Profile tab to draft a clinical note.")
+        else:
+            profile = {"name": name, "age": age, "primary_language": primary_language,
+                       "tinnitus": tinnitus, "hearing_aid_use": ha_use}
+            generator = get_note_generator()
+            inputs = note_inputs(profile, latest_diagnosis, summary)
+            with timer("summary.note"):
+                job = generator.request(inputs)
+            _note(generator, inputs, job)
+
+    # --- Saved Summary ---
+    if summary:
+        st.markdown("### 📚 Across Visits")
+        lines = []
+        latest = summary["diagnosis"]["latest"]
+        if latest:
+            recent = ", ".join(f"{snr:.1f}" for _, snr in summary["diagnosis"]["recent_snr"])
+            percentile = f", percentile {latest['percentile']:.0f}" if latest.get("percentile") is not None else ""
+            lines.append(f"- **Diagnosis SNR**: {latest['snr']:.2f} dB{percentile} "
+                         f"({summary['diagnosis']['count']} saved; recent: {recent})")
+        for env, benefit in summary["fitting"]["benefit"].items():
+            lines.append(f"- **Aided benefit in {env}**: {benefit:+.1f} dB")
+        for key, condition in summary["fitting"]["conditions"].items():
+            lines.append(f"- {key.replace('_', ' ').title()}: mean {condition['mean']:.1f} dB over {condition['count']} run(s)")
+        audiogram = summary["audiogram"]
+        if audiogram:
+            ears = []
+            for ear, values in audiogram["ears"].items():
+                gap = values["air_bone_gap"]
+                ears.append(f"{ear} PTA {values['pta_air']} dB HL" + (f", air-bone gap {gap} dB" if gap is not None else ""))
+            ears = "; ".join(ears)
+            flags = " · asymmetric" if audiogram["asymmetric"] else ""
+            lines.append(f"- **Audiogram**: {audiogram['degree']} loss{flags} ({ears})")
+        wellbeing = summary["wellbeing"]
+        if wellbeing["checkins"]:
+            scores = ", ".join(f"{metric.replace('_', ' ')} {value:.1f}" for metric, value in wellbeing["scores"].items())
+            lines.append(f"- **Wellbeing** ({wellbeing['checkins']} check-ins, last `{wellbeing['last'][:16]}`): {scores}")
+        st.markdown("\n".join(lines) or "No results saved yet.")
+
+    with st.expander("🗂️ Saved History"):
+        # Every saved record of the patient; read only on request, as the expander's body runs on each rerun
+        if st.toggle("Show saved records", key="summary_show_history"):
+            with timer("summary.history"):
+                history = get_record_store().history(patient) if patient else []
+            if history:
+                for kind, record in history:
+                    st.markdown(f"- `{record.get('timestamp', '')}` · {kind.title()}")
+            else:
+                st.markdown("No saved records for this patient yet.")
+
+    st.text_area("🗒️ Additional Clinician Notes", placeholder="Enter any manual comments or observations here...")
+
+    if st.button("💾 Save Summary"):
+        notes_data = {
+            "timestamp": datetime.now().isoformat(),
+            "name": name,
+            "age": age,
+            "primary_language": primary_language,
+            "tinnitus": tinnitus,
+            "hearing_aid_use": ha_use,
+            "diagnosis_snr": diagnosis_snr,
+            "diagnosis_time": diagnosis_time,
+            "manual_notes": ""
+        }
+        get_log_writer().submit("summary", notes_data)
+        st.success("Summary saved for this session.")
@@ -0,0 +1,106 @@
+# sessionhistory.py
+# Bounded per-session histories of Diagnosis and Fitting runs, stored as typed NumPy columns.
+from datetime import datetime
+
+import numpy as np
+
+import config
+
+# Column name -> dtype; NaN marks runs without a psychometric fit
+COLUMNS = {
+    "timestamp": np.int64,   # milliseconds since the epoch
+    "snr": np.float32,
+    "snr_low": np.float32,
+    "snr_high": np.float32,
+    "slope": np.float32,
+    "trials": np.int16,
+}
+
+
+def _millis(timestamp=None):
+    when = datetime.now() if timestamp is None else datetime.fromisoformat(timestamp)
+    return int(when.timestamp() * 1000)
+
+
+def _isoformat(millis):
+    return datetime.fromtimestamp(int(millis) / 1000).isoformat()
+
+
+class RunHistory:
+    """
+    The last ``limit`` runs of one test in one browser session, kept in a
+    ring of fixed-size typed columns (about 30 bytes a run) instead of a
+    growing list of dicts with ISO timestamp strings.
+
+    Only the newest run keeps its full result dict (``detail``), which the
+    tabs display. append() returns the run it pushes out of the ring, if
+    any, so the caller can spill it to the persistent log.
+    """
+
+    __slots__ = ("limit", "total", "_start", "_size", "_columns", "_detail")
+
+    def __init__(self, limit=None):
+        self.limit = max(1, config.SESSION_HISTORY_LIMIT if limit is None else limit)
+        self.total = 0          # runs ever appended, including those no longer retained
+        self._start = 0
+        self._size = 0
+        self._columns = {name: np.zeros(self.limit, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._detail = None
+
+    def __len__(self):
+        return self._size
+
+    def _order(self):
+        return (self._start + np.arange(self._size)) % self.limit
+
+    def _row(self, i):
+        c = self._columns
+        run = {"timestamp": _isoformat(c["timestamp"][i]), "snr": round(float(c["snr"][i]), 2), "fit": None}
+        if not np.isnan(c["slope"][i]):
+            run["fit"] = {"snr50": run["snr"], "slope": round(float(c["slope"][i]), 3),
+                          "snr50_ci": [round(float(c["snr_low"][i]), 2), round(float(c["snr_high"][i]), 2)],
+                          "trials": int(c["trials"][i])}
+        return run
+
+    def append(self, snr, fit=None, timestamp=None, detail=None):
+        """Adds a run; returns the evicted oldest run as a dict, or None."""
+        evicted = None
+        if self._size == self.limit:
+            evicted = self._row(self._start)
+            i = self._start
+            self._start = (self._start + 1) % self.limit
+        else:
+            i = (self._start + self._size) % self.limit
+            self._size += 1
+        c = self._columns
+        c["timestamp"][i] = _millis(timestamp)
+        c["snr"][i] = snr
+        c["snr_low"][i], c["snr_high"][i] = fit["snr50_ci"] if fit else (np.nan, np.nan)
+        c["slope"][i] = fit["slope"] if fit else np.nan
+        c["trials"][i] = fit["trials"] if fit else 0
+        self.total += 1
+        self._detail = detail
+        return evicted
+
+    def latest(self):
+        """The newest run: its full result when one was given, else its stored columns (None if empty)."""
+        if not self._size:
+            return None
+        if self._detail is not None:
+            return self._detail
+        return self._row((self._start + self._size - 1) % self.limit)
+
+    def last_fit(self):
+        """The newest retained run's fit, or None."""
+        for i in self._order()[::-1]:
+            if not np.isnan(self._columns["slope"][i]):
+                return self._row(i)["fit"]
+        return None
+
+    def snrs(self):
+        """SNRs of the retained runs, oldest first."""
+        return self._columns["snr"][self._order()].astype(float).round(2)
+
+    def nbytes(self):
+        """Bytes held by the columns (the detail dict is not counted)."""
+        return sum(column.nbytes for column in self._columns.values())
@@ -0,0 +1,145 @@
+# staircase.py
+# Headless, vectorized simulation of the adaptive SNR staircase used by the Screener.
+#
+# adaptive_test(threshold_val, convergence_criteria, client_name) drives the test
+# through the UI one trial at a time. This module runs the same kind of procedure
+# for thousands of virtual listeners at once: every array holds one value per
+# listener and each loop iteration presents one trial to all of them.
+import numpy as np
+
+N_CHOICES = 3            # response options per VCV trial ("ala", "omo", "iki")
+INITIAL_STEP = 4.0       # dB
+MAX_TRIALS = 60
+
+
+def psychometric(snr, midpoint, slope, guess=1.0 / N_CHOICES, lapse=0.02):
+    """Probability of a correct response at an SNR (logistic, with guessing and lapses)."""
+    return guess + (1.0 - guess - lapse) / (1.0 + np.exp(-slope * (snr - midpoint)))
+
+
+def snr_at(probability, midpoint, slope, guess=1.0 / N_CHOICES, lapse=0.02):
+    """Inverse of psychometric(): the SNR at which a listener is correct with the given probability."""
+    scaled = (probability - guess) / (1.0 - guess - lapse)
+    return midpoint - np.log(1.0 / scaled - 1.0) / slope
+
+
+def target_probability(down):
+    """Percent-correct point an n-down/1-up staircase converges on (Levitt, 1971)."""
+    return 0.5 ** (1.0 / down)
+
+
+def simulate(threshold_val, convergence_criteria, midpoints, slopes, down=1,
+             initial_step=INITIAL_STEP, max_trials=MAX_TRIALS, rng=None, record_trials=False):
+    """
+    Runs the staircase for every listener described by ``midpoints``/``slopes``.
+
+    The track starts at ``threshold_val`` dB SNR. The SNR drops after ``down``
+    consecutive correct answers and rises after each error. The step is halved
+    at every reversal, and a track converges once the step falls below
+    ``convergence_criteria`` dB. The estimate is the mean of the last two
+    reversal SNRs.
+
+    Returns a dict of per-listener arrays: threshold, trials, reversals and
+    converged. With ``record_trials`` it also returns trial_snr and
+    trial_correct of shape (listeners, max_trials), NaN/False after a track ends.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    midpoints = np.asarray(midpoints, dtype=float)
+    slopes = np.broadcast_to(np.asarray(slopes, dtype=float), midpoints.shape)
+    n = midpoints.size
+
+    snr = np.full(n, float(threshold_val))
+    step = np.full(n, float(initial_step))
+    direction = np.zeros(n, dtype=np.int8)       # -1 going down, +1 going up, 0 not yet moved
+    run_correct = np.zeros(n, dtype=np.int16)
+    trials = np.zeros(n, dtype=np.int16)
+    reversals = np.zeros(n, dtype=np.int16)
+    last_reversals = np.full((n, 2), np.nan)
+    active = np.ones(n, dtype=bool)
+
+    if record_trials:
+        trial_snr = np.full((n, max_trials), np.nan)
+        trial_correct = np.zeros((n, max_trials), dtype=bool)
+
+    for t in range(max_trials):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        level = snr[idx]
+        correct = rng.random(idx.size) < psychometric(level, midpoints[idx], slopes[idx])
+        trials[idx] += 1
+        if record_trials:
+            trial_snr[idx, t] = level
+            trial_correct[idx, t] = correct
+
+        run_correct[idx] = np.where(correct, run_correct[idx] + 1, 0)
+        go_down = correct & (run_correct[idx] >= down)
+        go_up = ~correct
+        move = np.where(go_down, -1, np.where(go_up, 1, 0)).astype(np.int8)
+        moved = move != 0
+        run_correct[idx[go_down]] = 0
+
+        # A reversal is a move against the previous direction
+        reversed_ = moved & (direction[idx] != 0) & (move != direction[idx])
+        rev_idx = idx[reversed_]
+        last_reversals[rev_idx, 0] = last_reversals[rev_idx, 1]
+        last_reversals[rev_idx, 1] = snr[rev_idx]
+        reversals[rev_idx] += 1
+        step[rev_idx] /= 2.0
+
+        direction[idx[moved]] = move[moved]
+        snr[idx] += move * step[idx]
+        active[rev_idx[step[rev_idx] < convergence_criteria]] = False
+
+    converged = ~active
+    counted = (~np.isnan(last_reversals)).sum(axis=1)
+    reversal_mean = np.nansum(last_reversals, axis=1) / np.maximum(counted, 1)
+    # Tracks that hit max_trials without reversing fall back to their last level
+    threshold = np.where(counted > 0, reversal_mean, snr)
+
+    result = {
+        "threshold": threshold,
+        "trials": trials,
+        "reversals": reversals,
+        "converged": converged,
+    }
+    if record_trials:
+        result["trial_snr"] = trial_snr
+        result["trial_correct"] = trial_correct
+    return result
+
+
+def summarize(result, midpoints, slopes, down=1):
+    """Convergence speed, trial counts and threshold bias of one simulate() run."""
+    target = snr_at(target_probability(down), np.asarray(midpoints, dtype=float), np.asarray(slopes, dtype=float))
+    error = result["threshold"] - target
+    trials = result["trials"]
+    return {
+        "listeners": int(trials.size),
+        "converged": float(result["converged"].mean()),
+        "trials_mean": float(trials.mean()),
+        "trials_median": float(np.median(trials)),
+        "trials_p95": float(np.percentile(trials, 95)),
+        "reversals_mean": float(result["reversals"].mean()),
+        "bias": float(error.mean()),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+    }
+
+
+def sweep(initial_thresholds, criteria, listeners=5000, midpoint_mean=-8.0, midpoint_std=1.6,
+          slope=0.8, down=1, seed=0, **kwargs):
+    """
+    Simulates every (initial threshold, convergence criterion) pair against the
+    same virtual listener population and returns one summary row per pair.
+    """
+    rng = np.random.default_rng(seed)
+    midpoints = rng.normal(midpoint_mean, midpoint_std, listeners)
+    slopes = np.full(listeners, slope)
+    rows = []
+    for threshold_val in initial_thresholds:
+        for convergence_criteria in criteria:
+            result = simulate(threshold_val, convergence_criteria, midpoints, slopes, down=down, rng=rng, **kwargs)
+            row = summarize(result, midpoints, slopes, down=down)
+            row.update(initial_threshold=threshold_val, convergence_criteria=convergence_criteria)
+            rows.append(row)
+    return rows
@@ -0,0 +1,161 @@
+# stimuli.py
+# Memory-mapped bank of VCV tokens and masking noise, mixed on request at a given SNR.
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+DTYPE = np.float32
+
+
+def build_bank(path, tokens, noise, fs):
+    """
+    Writes a stimulus bank: every waveform back to back as raw float32 in ``path``,
+    plus a ``path.json`` manifest with each waveform's offset, length and RMS.
+    """
+    manifest = {"fs": fs, "dtype": np.dtype(DTYPE).str, "tokens": {}}
+    offset = 0
+    with open(path, "wb") as f:
+        for name, wave in list(tokens.items()) + [(None, noise)]:
+            wave = np.ascontiguousarray(wave, dtype=DTYPE)
+            entry = {"offset": offset, "length": int(wave.size), "rms": float(np.sqrt(np.mean(np.square(wave, dtype=np.float64))))}
+            if name is None:
+                manifest["noise"] = entry
+            else:
+                manifest["tokens"][name] = entry
+            f.write(wave.tobytes())
+            offset += wave.size
+    with open(path + ".json", "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+class StimulusBank:
+    """
+    Read-only view of a bank built by build_bank().
+
+    Waveforms are slices of one np.memmap, so opening the bank costs nothing
+    and every process serving listeners shares the same page cache. Mixes are
+    kept in an LRU keyed by (token, SNR, noise start).
+    """
+
+    def __init__(self, path, cache_size=256):
+        with open(path + ".json") as f:
+            self.manifest = json.load(f)
+        self.fs = self.manifest["fs"]
+        self._data = np.memmap(path, dtype=np.dtype(self.manifest["dtype"]), mode="r")
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=4096)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def tokens(self):
+        return list(self.manifest["tokens"])
+
+    def _view(self, entry, start=0, length=None):
+        length = entry["length"] - start if length is None else length
+        begin = entry["offset"] + start
+        return self._data[begin:begin + length]
+
+    def token(self, name):
+        """Clean waveform of a token (a read-only view, no copy)."""
+        return self._view(self.manifest["tokens"][name])
+
+    def gains(self, name, snrs):
+        """
+        Noise gains that put a token at each SNR (dB), relative to the long-term
+        RMS of the whole noise recording; vectorized over ``snrs``.
+        """
+        token_rms = self.manifest["tokens"][name]["rms"]
+        noise_rms = self.manifest["noise"]["rms"]
+        return (token_rms / noise_rms) * np.power(10.0, -np.asarray(snrs, dtype=np.float64) / 20.0)
+
+    def mix(self, name, snr, noise_start=0):
+        """Token in noise at ``snr`` dB. The result is cached and must not be modified."""
+        key = (name, round(float(snr), 2), noise_start)
+        start = time.perf_counter()
+        with self._lock:
+            mixed = self._cache.get(key)
+            if mixed is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if mixed is None:
+            mixed = self._mix(name, key[1], noise_start)
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = mixed
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        self._latencies.append(time.perf_counter() - start)
+        return mixed
+
+    def _mix(self, name, snr, noise_start):
+        token = self.token(name)
+        noise_entry = self.manifest["noise"]
+        if noise_start + token.size > noise_entry["length"]:
+            raise ValueError("Noise segment is shorter than the token at this start offset.")
+        noise = self._view(noise_entry, noise_start, token.size)
+        # The output buffer is the only allocation: scale the noise into it, add the token in place
+        mixed = np.multiply(noise, DTYPE(self.gains(name, snr)), dtype=DTYPE)
+        np.add(mixed, token, out=mixed)
+        mixed.flags.writeable = False
+        return mixed
+
+    def mix_many(self, name, snrs, noise_start=0):
+        """Mixes one token at several SNRs in a single broadcast; returns (len(snrs), samples)."""
+        token = self.token(name)
+        noise = self._view(self.manifest["noise"], noise_start, token.size)
+        gains = self.gains(name, snrs).astype(DTYPE)[:, None]
+        mixed = np.multiply(gains, noise[None, :], dtype=DTYPE)
+        np.add(mixed, token[None, :], out=mixed)
+        return mixed
+
+    def stats(self):
+        """Cache hit rate and per-trial preparation latency (seconds)."""
+        with self._lock:
+            latencies = np.array(self._latencies)
+            stats = {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+        if latencies.size:
+            stats.update(latency_p50=float(np.percentile(latencies, 50)),
+                         latency_p95=float(np.percentile(latencies, 95)),
+                         latency_max=float(latencies.max()))
+        return stats
+
+
+def synthetic_corpus(tokens=("ala", "omo", "iki"), fs=16000, noise_seconds=10.0, seed=0):
+    """
+    Deterministic stand-in waveforms for offline testing: each vowel is a harmonic
+    complex with its own formant emphasis and each consonant a shaped noise burst.
+    Returns (tokens dict, noise array, fs).
+    """
+    rng = np.random.default_rng(seed)
+    formants = {"a": (700, 1200), "o": (450, 800), "i": (300, 2300)}
+
+    def vowel(v, seconds=0.18, f0=120.0):
+        t = np.arange(int(seconds * fs)) / fs
+        f1, f2 = formants.get(v, (500, 1500))
+        wave = np.zeros_like(t)
+        for h in range(1, int(4000 / f0)):
+            weight = np.exp(-((h * f0 - f1) / 300.0) ** 2) + 0.5 * np.exp(-((h * f0 - f2) / 400.0) ** 2) + 0.02
+            wave += weight * np.sin(2 * np.pi * h * f0 * t)
+        return wave * np.hanning(t.size)
+
+    def consonant(c, seconds=0.08):
+        burst = rng.standard_normal(int(seconds * fs))
+        # Crude spectral tilt: fricatives high-passed, nasals/liquids low-passed
+        if c in "sfzvkt":
+            burst = np.diff(burst, prepend=0.0)
+        else:
+            burst = np.convolve(burst, np.ones(16) / 16, mode="same")
+        return 0.3 * burst * np.hanning(burst.size)
+
+    corpus = {}
+    for token in tokens:
+        parts = [vowel(ch) if ch in "aeiou" else consonant(ch) for ch in token]
+        corpus[token] = np.concatenate(parts).astype(DTYPE)
+    noise = np.convolve(rng.standard_normal(int(noise_seconds * fs)), np.ones(4) / 4, mode="same").astype(DTYPE)
+    return corpus, noise, fs
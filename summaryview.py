@@ -0,0 +1,243 @@
+# summaryview.py
+# Materialized per-patient summaries, folded forward from the logs as records are saved.
+import json
+import os
+
+import logsegments
+
+from audiogram import DEGREE_LABELS, EARS, AudiogramTable
+from benefit import visit, visit_benefit
+from fileutil import atomic_write, locked
+from profilestore import patient_filename
+from recordstore import LOG_FILES, patient_key
+from scoring import ENVIRONMENTS, condition_key
+from trends import scores
+
+KINDS = ("profile", "diagnosis", "fitting", "monitoring")
+RECENT = 10              # diagnosis SNRs kept per patient
+WELLBEING_ALPHA = 0.3    # weight of a new check-in in the recent wellbeing scores
+
+
+def _round(value, digits=1):
+    return None if value is None or value != value else round(float(value), digits)
+
+
+def _new_summary(patient):
+    return {
+        "patient": patient,
+        "updated": None,
+        "profile": {},
+        "audiogram": {},
+        "diagnosis": {"count": 0, "latest": None, "recent_snr": []},
+        "fitting": {"conditions": {}, "benefit": {}},
+        "wellbeing": {"checkins": 0, "last": None, "scores": {}},
+    }
+
+
+def _fold_profile(summary, record):
+    summary["profile"] = {key: record.get(key) for key in
+                          ("name", "age", "gender", "primary_language", "tinnitus", "hearing_aid_use", "worse_ear")}
+    summary["profile"]["timestamp"] = record.get("timestamp")
+    table = AudiogramTable.from_profiles([record])
+    if not len(table):
+        return
+    metrics = table.analyze()
+    ears = {}
+    for row in range(len(table)):
+        ears[EARS[table.ear[row]]] = {
+            "pta_air": _round(metrics["pta_air"][row]),
+            "pta_bone": _round(metrics["pta_bone"][row]),
+            "air_bone_gap": _round(metrics["air_bone_gap"][row]),
+            "conductive": bool(metrics["conductive"][row]),
+        }
+    degree = int(metrics["degree"][0])
+    summary["audiogram"] = {
+        "timestamp": record.get("timestamp"),
+        "ears": ears,
+        "degree": DEGREE_LABELS[degree] if degree >= 0 else None,
+        "asymmetric": bool(metrics["asymmetric"][0]),
+    }
+
+
+def _fold_diagnosis(summary, record):
+    if record.get("snr") is None:
+        return
+    diagnosis = summary["diagnosis"]
+    diagnosis["count"] += 1
+    diagnosis["latest"] = {key: record.get(key) for key in
+                           ("timestamp", "snr", "percentile", "z_score", "error_proportion", "feature_errors", "fit")}
+    diagnosis["recent_snr"] = (diagnosis["recent_snr"] + [[record.get("timestamp"), record["snr"]]])[-RECENT:]
+
+
+def _fold_fitting(summary, record):
+    try:
+        key = condition_key(record.get("mode"), record.get("environment"))
+    except ValueError:
+        return
+    if record.get("snr") is None:
+        return
+    condition = summary["fitting"]["conditions"].setdefault(key, {"count": 0, "mean": 0.0, "latest": None})
+    condition["count"] += 1
+    condition["mean"] += (record["snr"] - condition["mean"]) / condition["count"]
+    condition["latest"] = record["snr"]
+    condition["timestamp"] = record.get("timestamp")
+    condition["fit"] = record.get("fit")
+    totals = condition.setdefault("visits", {}).setdefault(visit(record.get("timestamp")), [0.0, 0])
+    totals[0] += record["snr"]
+    totals[1] += 1
+    # The same benefit the Fitting tab reports (paired by visit once there are enough), without its interval
+    conditions = summary["fitting"]["conditions"]
+    for env in ENVIRONMENTS:
+        unaided, aided = conditions.get(f"unaided_{env.lower()}"), conditions.get(f"aided_{env.lower()}")
+        if unaided and aided:
+            summary["fitting"]["benefit"][env.lower()] = round(visit_benefit(unaided["visits"], aided["visits"]), 2)
+
+
+def _fold_monitoring(summary, record):
+    wellbeing = summary["wellbeing"]
+    wellbeing["checkins"] += 1
+    wellbeing["last"] = max(wellbeing["last"] or "", record.get("timestamp") or "")
+    for metric, value in scores(record).items():
+        current = wellbeing["scores"].get(metric)
+        wellbeing["scores"][metric] = value if current is None else current + WELLBEING_ALPHA * (value - current)
+
+
+_FOLD = {
+    "profile": _fold_profile,
+    "diagnosis": _fold_diagnosis,
+    "fitting": _fold_fitting,
+    "monitoring": _fold_monitoring,
+}
+
+
+def _name(record):
+    return str(record.get("patient") or record.get("name") or "").strip()
+
+
+def _fold(summary, fold, record):
+    fold(summary, record)
+    summary["updated"] = max(summary["updated"] or "", record.get("timestamp") or "")
+
+
+class SummaryView:
+    """
+    One small JSON document per patient combining the latest profile and
+    audiogram averages, Diagnosis SNRs, Fitting condition means and aided
+    benefit, and recent wellbeing scores.
+
+    update() tails the profile, Diagnosis, Fitting and Monitoring logs from
+    the (segment, offset) positions checkpointed in the summaries directory,
+    so every server process folds each record exactly once, whichever
+    process saved it. Each document also keeps the position of the last
+    record folded into it, so an update cut short between writing the
+    documents and the checkpoint is not folded twice. load() updates first,
+    then reads one file however long the patient's history is.
+    """
+
+    def __init__(self, store, root="summaries"):
+        self.store = store
+        self.root = root
+        self.checkpoint = os.path.join(root, ".positions.json")
+        os.makedirs(root, exist_ok=True)
+        self._positions = None  # what this process last folded up to, to skip the lock when nothing is new
+
+    def path(self, patient):
+        return os.path.join(self.root, patient_filename(patient))
+
+    def load(self, patient):
+        """The materialized summary of a patient, or None."""
+        self.update()
+        return self._read(patient)
+
+    def _read(self, patient):
+        try:
+            with open(self.path(patient)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    # --- Ingest ---
+    def _ends(self):
+        ends = {}
+        for kind in KINDS:
+            path = self.store.data_path(kind)
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                size = 0
+            ends[kind] = (logsegments.active_segment(path), size)
+        return ends
+
+    def update(self):
+        """Folds every record saved since the last update, by any process. Returns how many."""
+        ends = self._ends()
+        if self._positions == ends:
+            return 0
+        with locked(self.checkpoint + ".lock"):
+            return self._tail(ends)[0]
+
+    def rebuild(self):
+        """Recreates every summary from the logs. Returns how many were written."""
+        with locked(self.checkpoint + ".lock"):
+            self._clear()
+            return self._tail(self._ends())[1]
+
+    def _clear(self):
+        for filename in os.listdir(self.root):
+            if filename.endswith(".json") and not filename.startswith(".tmp-"):  # the checkpoint too
+                os.unlink(os.path.join(self.root, filename))
+        self._positions = None
+
+    def _tail(self, ends):
+        """Folds the logs on from the checkpoint; the caller holds the checkpoint lock."""
+        try:
+            with open(self.checkpoint) as f:
+                positions = {kind: tuple(position) for kind, position in json.load(f).items()}
+        except (FileNotFoundError, ValueError):
+            positions = None
+        if positions is None or any(positions.get(kind, (0, 0)) > ends[kind] for kind in KINDS):
+            # First run, or a log was replaced: documents without a checkpoint are rebuilt from the first line
+            self._clear()
+            positions = {}
+        saved = dict(positions)
+        summaries = {}
+        count = 0
+        for kind in KINDS:
+            fold = _FOLD[kind]
+            start = positions.get(kind, (0, 0))
+            for segment, offset, raw in logsegments.iter_lines(self.store.data_path(kind), *start):
+                positions[kind] = (segment, offset)
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                key = patient_key(record) if isinstance(record, dict) else ""
+                if not key:
+                    continue
+                summary = summaries.get(key)
+                if summary is None:
+                    summary = summaries[key] = self._read(key) or _new_summary(_name(record))
+                folded = summary.setdefault("positions", {})
+                if tuple(folded.get(kind, (0, 0))) >= (segment, offset):
+                    continue
+                _fold(summary, fold, record)
+                folded[kind] = [segment, offset]
+                count += 1
+            if ends[kind][1] == 0 and positions.get(kind, (0, 0)) < ends[kind]:
+                positions[kind] = ends[kind]  # read to the end of a just-closed segment
+        for key, summary in summaries.items():
+            atomic_write(self.path(key), json.dumps(summary))
+        if positions != saved:
+            atomic_write(self.checkpoint, json.dumps({kind: list(p) for kind, p in positions.items()}))
+        self._positions = {kind: positions.get(kind, (0, 0)) for kind in KINDS}
+        return count, len(summaries)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from recordstore import RecordStore
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    count = SummaryView(RecordStore(root), os.path.join(root, "summaries")).rebuild()
+    print(f"Rebuilt {count} summaries from {', '.join(LOG_FILES[k] for k in KINDS)}")
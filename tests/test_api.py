@@ -0,0 +1,128 @@
+# test_api.py
+# ScoringAPI routing, its error statuses, and one keep-alive connection over HTTP.
+import asyncio
+import json
+
+import pytest
+
+from api import Client, create_api
+
+# Only "a" tokens: the "o" and "i" vowel categories get no trials
+TRIALS = [["ala", "ala", -6.0], ["ama", "ana", -6.0], ["aka", "aka", -6.0], ["asa", "afa", -6.0]]
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = create_api(str(tmp_path))
+    yield api
+    api.writer.close()
+
+
+def test_health_reports_the_log_writer(api):
+    status, payload = api.dispatch("GET", "/health")
+    assert status == 200
+    assert payload["status"] == "ok" and "records_written" in payload["log_writer"]
+
+
+def test_percentile_needs_an_snr(api):
+    status, payload = api.dispatch("GET", "/percentile?snr=-7.5&age=45&language=en")
+    assert status == 200
+    assert 0 <= payload["percentile"] <= 100
+    assert api.dispatch("GET", "/percentile?age=45")[0] == 400
+
+
+def test_unknown_paths_and_methods(api):
+    assert api.dispatch("GET", "/nowhere")[0] == 404
+    status, payload = api.dispatch("GET", "/diagnosis")
+    assert status == 405 and "GET" in payload["error"]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/diagnosis", None),                                          # no JSON object
+    ("/diagnosis", {"trials": TRIALS, "snr": -6.0}),                # no patient
+    ("/diagnosis", {"patient": "Jane Doe", "trials": [["ala", "xyz"]], "snr": -6.0}),
+    ("/fitting", {"patient": "Jane Doe", "mode": "Aided", "environment": "Noise"}),   # no snr or trials
+    ("/fitting", {"patient": "Jane Doe", "mode": "Half", "environment": "Noise", "snr": -3.0}),
+    ("/monitoring", {"patient": "Jane Doe", "checkin_type": "Midnight", "answers": {}}),
+])
+def test_bad_requests_are_400_and_write_nothing(api, path, body):
+    status, payload = api.dispatch("POST", path, body)
+    assert status == 400 and payload["error"]
+    assert api.writer.flush(5)
+    assert api.writer.metrics()["records_written"] == 0
+
+
+def test_diagnosis_keeps_untested_categories_as_none(api):
+    status, result = api.dispatch("POST", "/diagnosis", {"patient": "Jane Doe", "trials": TRIALS, "snr": -6.0})
+    assert status == 200
+    assert result["snr"] == -6.0
+    assert result["error_proportion"][1:3] == [None, None]
+    assert isinstance(result["error_proportion"][0], int)
+
+
+def test_saved_runs_reach_the_summary(api):
+    assert api.dispatch("GET", "/summary?patient=Jane%20Doe")[0] == 404
+    status, record = api.dispatch("POST", "/fitting", {"patient": "Jane Doe", "mode": "Aided",
+                                                      "environment": "Noise", "snr": -7.0})
+    assert status == 200
+    assert record["condition"] == "aided_noise" and "percentile" not in record
+    status, checkin = api.dispatch("POST", "/monitoring", {"patient": "Jane Doe", "checkin_type": "Morning",
+                                                           "answers": {"sleep_quality": 7, "bogus": 1}})
+    assert status == 200
+    assert checkin["sleep_quality"] == 7 and "bogus" not in checkin
+    assert api.writer.flush(5)
+    status, summary = api.dispatch("GET", "/summary?patient=Jane%20Doe")
+    assert status == 200
+    assert summary["fitting"]["conditions"]["aided_noise"]["mean"] == -7.0
+
+
+def test_http_round_trip(api):
+    async def run():
+        server = await api.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = Client("127.0.0.1", port)
+        try:
+            health = await client.request("GET", "/health")
+            fitting = await client.request("POST", "/fitting", {"patient": "Jane Doe", "mode": "Unaided",
+                                                                "environment": "Quiet", "snr": -4.0})
+            missing = await client.request("POST", "/fitting", {"mode": "Unaided"})
+            # The same connection carries on after an error
+            again = await client.request("GET", "/health")
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /diagnosis HTTP/1.1\r\nContent-Length: 5\r\nConnection: close\r\n\r\n{nope")
+            await writer.drain()
+            raw = await reader.read()
+            writer.close()
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+        return health, fitting, missing, again, raw
+
+    health, fitting, missing, again, raw = asyncio.run(run())
+    assert health[0] == again[0] == 200
+    assert fitting[0] == 200 and fitting[1]["condition"] == "unaided_quiet"
+    assert missing[0] == 400
+    head, _, body = raw.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 400 ")
+    assert "not valid JSON" in json.loads(body)["error"]
+
+
+def test_unexpected_errors_are_500(api, monkeypatch):
+    def broken(query):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(api.routes, ("GET", "/health"), broken)
+
+    async def run():
+        server = await api.serve("127.0.0.1", 0)
+        client = Client("127.0.0.1", server.sockets[0].getsockname()[1])
+        try:
+            return await client.request("GET", "/health")
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+
+    assert asyncio.run(run()) == (500, {"error": "Internal error."})
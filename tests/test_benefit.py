@@ -0,0 +1,96 @@
+# test_benefit.py
+# Aided benefit intervals: t intervals at the Fitting tab's sizes, the paired/unpaired choice, and no spread.
+import numpy as np
+import pytest
+
+import benefit
+
+TRUE = 3.0   # unaided minus aided, dB
+
+
+def _runs(rng, n, sd=1.5):
+    return rng.normal(-4.0, sd, n), rng.normal(-4.0 - TRUE, sd, n)
+
+
+def test_three_runs_per_arm_get_a_welch_interval_that_covers():
+    rng = np.random.default_rng(0)
+    hits, widths = [], []
+    for _ in range(1000):
+        r = benefit.environment_benefit(*_runs(rng, 3), rng=rng)
+        assert r["method"] == "unpaired" and r["interval"] == "t"
+        low, high = r["ci"]
+        hits.append(low <= TRUE <= high)
+        widths.append(high - low)
+    assert 0.92 <= np.mean(hits) <= 0.98
+    # sd 1.5 with 3 runs a side: se about 1.2 dB on about 4 df, so about 7 dB wide; never hundreds
+    assert np.median(widths) < 8.0 and max(widths) < 30.0
+
+
+def test_three_visits_get_a_paired_t_interval():
+    rng = np.random.default_rng(1)
+    hits = []
+    visits = ["2026-03-01", "2026-03-02", "2026-03-03"]
+    for _ in range(1000):
+        unaided, aided = _runs(rng, 3)
+        r = benefit.environment_benefit(unaided, aided, visits, visits, rng=rng)
+        assert r["method"] == "paired" and r["pairs"] == 3 and r["interval"] == "t"
+        hits.append(r["ci"][0] <= TRUE <= r["ci"][1])
+    assert 0.92 <= np.mean(hits) <= 0.98
+
+
+def test_larger_sessions_are_bootstrapped_without_blowing_up():
+    rng = np.random.default_rng(2)
+    hits = []
+    for _ in range(200):
+        unaided, aided = _runs(rng, benefit.BOOTSTRAP_MIN_N)
+        r = benefit.environment_benefit(unaided, aided, rng=rng, resamples=500)
+        assert r["interval"] == "bootstrap-t" and r["p_bootstrap"] is not None
+        se = np.sqrt(unaided.var(ddof=1) / unaided.size + aided.var(ddof=1) / aided.size)
+        assert r["ci"][1] - r["ci"][0] < 10 * se
+        hits.append(r["ci"][0] <= TRUE <= r["ci"][1])
+    assert np.mean(hits) >= 0.88
+
+
+@pytest.mark.parametrize("visits, method", [
+    (["2026-03-01", "2026-03-02", "2026-03-03"], "paired"),
+    (["2026-03-01", "2026-03-01", "2026-03-02"], "unpaired"),   # only two visits
+    (None, "unpaired"),
+])
+def test_paired_only_from_min_pairs_visits(visits, method):
+    r = benefit.environment_benefit([-4.0, -3.0, -5.0], [-7.0, -6.5, -8.0], visits, visits,
+                                    rng=np.random.default_rng(0))
+    assert r["method"] == method
+    assert r["pairs"] == (3 if method == "paired" else 0)
+
+
+def test_no_spread_gives_a_point_interval():
+    rng = np.random.default_rng(0)
+    r = benefit.environment_benefit([-4.0, -4.0], [-7.0, -7.0], rng=rng)
+    assert r["ci"] == [3.0, 3.0] and r["p_value"] == 0.0 and r["significant"]
+    r = benefit.environment_benefit([-4.0, -4.0], [-4.0, -4.0], rng=rng)
+    assert r["ci"] == [0.0, 0.0] and r["p_value"] == 1.0 and not r["significant"]
+
+
+def test_one_run_gives_only_the_estimate():
+    r = benefit.environment_benefit([-4.0], [-7.0, -6.0])
+    assert r["benefit"] == 2.5 and r["ci"] is None and r["method"] == "single"
+
+
+@pytest.mark.parametrize("days", [2, 4])
+def test_visit_benefit_agrees_with_environment_benefit(days):
+    unaided, aided = [], []
+    for day in range(1, days + 1):
+        stamp = f"2026-03-{day:02d}T10:00:00"
+        unaided += [(stamp, -3.0 - day), (stamp, -2.0)]
+        aided += [(stamp, -8.0 + day / 2)]
+    totals = {}
+    for key, runs in (("unaided", unaided), ("aided", aided)):
+        totals[key] = {}
+        for stamp, snr in runs:
+            day = totals[key].setdefault(benefit.visit(stamp), [0.0, 0])
+            day[0] += snr
+            day[1] += 1
+    expected = benefit.environment_benefit([snr for _, snr in unaided], [snr for _, snr in aided],
+                                           [benefit.visit(s) for s, _ in unaided],
+                                           [benefit.visit(s) for s, _ in aided])
+    assert round(benefit.visit_benefit(totals["unaided"], totals["aided"]), 2) == expected["benefit"]
@@ -0,0 +1,38 @@
+# test_confusion.py
+# The clinic confusion report: tokens outside the inventory, and categories no session tested.
+import json
+import warnings
+
+import confusion
+
+
+def _record(trials):
+    return {"patient": "Jane Doe", "trials": trials}
+
+
+def test_trials_with_unknown_tokens_are_skipped_and_counted():
+    records = [_record([["ala", "ala", -6.0], ["ama", "ana", -6.0]]),
+               _record([["ala", "ata", -6.0], ["uzu", "uzu", -6.0]]),   # an older inventory
+               _record([["uzu", "ala", -6.0]])]
+    used, counts, skipped = confusion.batch_matrices(records)
+    assert len(used) == 2 and skipped == 2
+    assert counts.sum() == 3
+    report = confusion.clinic_report(records)
+    assert report["sessions"] == 2 and report["trials"] == 3 and report["skipped_trials"] == 2
+
+
+def test_untested_categories_are_none_without_warnings():
+    # Only "a" tokens with Low and Mid consonants: the o/i vowels and High band get no trials
+    records = [_record([["ala", "ala", -6.0], ["ama", "ana", -6.0], ["aka", "aga", -6.0]])]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        report = confusion.clinic_report(records)
+    assert report["error_proportion"]["o"] is None and report["error_proportion"]["High"] is None
+    assert report["error_proportion"]["a"] == 0.0
+    assert report["pooled_error_proportion"]["i"] is None
+    assert "NaN" not in json.dumps(report)
+
+
+def test_no_sessions():
+    assert confusion.clinic_report([_record([["uzu", "uzu", -6.0]]), {"patient": "Jane Doe"}]) == \
+        {"sessions": 0, "skipped_trials": 1}
@@ -0,0 +1,82 @@
+# test_logsegments.py
+# Rotation into gzip segments, and the readers that span the closed segments and the active one.
+import json
+import os
+
+import pytest
+
+import logsegments
+
+
+def _record(i):
+    return {"timestamp": f"2026-03-{1 + i // 10:02d}T10:{i % 10:02d}:00", "patient": "Jane Doe", "snr": -float(i)}
+
+
+def _append(path, records):
+    with open(path, "ab") as f:
+        for record in records:
+            f.write((json.dumps(record) + "\n").encode("utf-8"))
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    """A log with three closed segments of 10 records, several blocks each, and 10 records still active."""
+    monkeypatch.setattr(logsegments, "BLOCK_BYTES", 256)
+    path = str(tmp_path / "diagnosis_log.json")
+    for segment in range(3):
+        _append(path, [_record(i) for i in range(10 * segment, 10 * segment + 10)])
+        assert logsegments.rotate(path) == segment
+    _append(path, [_record(i) for i in range(30, 40)])
+    return path
+
+
+def test_rotation_closes_numbered_segments(log):
+    segments = logsegments.load_segments(log)
+    assert [s["segment"] for s in segments] == [0, 1, 2]
+    assert all(len(s["blocks"]) > 1 for s in segments)
+    assert segments[1]["first"] == _record(10)["timestamp"] and segments[1]["last"] == _record(19)["timestamp"]
+    assert logsegments.active_segment(log) == 3
+    usage = logsegments.disk_usage(log)
+    assert usage["segments"] == 3 and usage["uncompressed"] > usage["compressed"] + usage["active"]
+
+
+def test_an_empty_active_segment_is_not_rotated(tmp_path):
+    path = str(tmp_path / "daily_log.json")
+    assert logsegments.rotate(path) is None
+    open(path, "w").close()
+    assert logsegments.rotate(path) is None
+    assert logsegments.load_segments(path) == []
+
+
+def test_read_log_spans_every_segment(log):
+    assert list(logsegments.read_log(log)) == [_record(i) for i in range(40)]
+
+
+@pytest.mark.parametrize("first, last", [(5, 34), (12, 17), (25, 39), (0, 9)])
+def test_read_log_time_windows(log, first, last):
+    start, end = _record(first)["timestamp"], _record(last)["timestamp"]
+    assert list(logsegments.read_log(log, start, end)) == [_record(i) for i in range(first, last + 1)]
+
+
+def test_iter_lines_resumes_from_any_position(log):
+    lines = list(logsegments.iter_lines(log))
+    assert [json.loads(raw) for _, _, raw in lines] == [_record(i) for i in range(40)]
+    for i in (0, 9, 10, 23, 29, 35):
+        segment, offset, _ = lines[i]
+        rest = [json.loads(raw) for _, _, raw in logsegments.iter_lines(log, segment, offset)]
+        assert rest == [_record(j) for j in range(i + 1, 40)]
+
+
+def test_a_partial_last_line_is_not_read(log):
+    with open(log, "ab") as f:
+        f.write(json.dumps(_record(40)).encode("utf-8")[:20])
+    assert len(list(logsegments.iter_lines(log))) == 40
+    assert len(list(logsegments.read_log(log))) == 40
+
+
+def test_an_interrupted_rotation_is_recovered(log):
+    # As if the process died after renaming the active segment, before compressing it
+    os.replace(log, f"{log}.00003")
+    logsegments.recover(log)
+    assert logsegments.active_segment(log) == 4
+    assert list(logsegments.read_log(log)) == [_record(i) for i in range(40)]
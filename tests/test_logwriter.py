@@ -0,0 +1,61 @@
+# test_logwriter.py
+# BatchedLogWriter: flush() against a failing store, and submit() racing close().
+import threading
+
+import pytest
+
+import logwriter
+from logwriter import BatchedLogWriter
+
+
+class FailingStore:
+    def __init__(self):
+        self.calls = 0
+
+    def append_many(self, kind, records, durable=False):
+        self.calls += 1
+        raise OSError(28, "No space left on device")
+
+
+class ListStore:
+    def __init__(self):
+        self.records = []
+
+    def append_many(self, kind, records, durable=False):
+        self.records.extend(records)
+
+
+def test_flush_gives_up_on_a_failing_batch():
+    store = FailingStore()
+    writer = BatchedLogWriter(store, max_delay=0.0)
+    writer.submit("fitting", {"snr": -7.0})
+    assert writer.flush(timeout=30) is False
+    assert store.calls >= logwriter.FLUSH_ATTEMPTS
+    assert writer.metrics()["pending_retry"] == 1
+    writer.close(timeout=5)
+    assert writer.flush(timeout=5) is False
+
+
+def test_no_record_is_queued_after_close():
+    store = ListStore()
+    writer = BatchedLogWriter(store, max_delay=0.0)
+    accepted = []
+
+    def produce(n):
+        for i in range(500):
+            try:
+                writer.submit("fitting", {"i": (n, i)})
+            except RuntimeError:
+                return
+            accepted.append((n, i))
+
+    producers = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+    for t in producers:
+        t.start()
+    writer.close(timeout=10)
+    for t in producers:
+        t.join()
+    # Every submit() that returned was written; the rest raised
+    assert sorted(r["i"] for r in store.records) == sorted(accepted)
+    with pytest.raises(RuntimeError):
+        writer.submit("fitting", {})
@@ -0,0 +1,121 @@
+# test_notes.py
+# NoteGenerator: cache hits from memory and disk, misses, joined jobs, failed backends and cache writes.
+import threading
+
+import pytest
+
+import notes
+from notes import NoteGenerator, StubBackend, note_inputs
+
+INPUTS = note_inputs({"name": "Jane Doe", "age": 45, "primary_language": "English"})
+
+
+class FailingBackend:
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    def stream(self, inputs):
+        self.calls += 1
+        raise RuntimeError("model unavailable")
+        yield
+
+
+class GatedBackend(StubBackend):
+    """The stub, held before its first chunk until the test opens the gate."""
+
+    def __init__(self):
+        super().__init__(first_token=0.0, per_chunk=0.0)
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def stream(self, inputs):
+        self.calls += 1
+        self.gate.wait(5)
+        yield from super().stream(inputs)
+
+
+@pytest.fixture
+def generator(tmp_path):
+    made = []
+
+    def make(backend, **kwargs):
+        made.append(NoteGenerator(backend, cache_dir=str(tmp_path / "notes"), workers=1, **kwargs))
+        return made[-1]
+
+    yield make
+    for g in made:
+        g.close()
+
+
+def test_miss_then_hit_from_memory_and_disk(generator):
+    backend = StubBackend(first_token=0.0, per_chunk=0.0)
+    first = generator(backend)
+    job = first.request(INPUTS)
+    assert job.wait(5) and job.error is None
+    assert job.text() == backend.text(INPUTS)
+
+    again = first.request(INPUTS)
+    assert again.cached and again.done and again.text() == job.text()
+    # A new process finds the note on disk
+    restarted = generator(backend)
+    assert restarted.request(INPUTS).text() == job.text()
+    assert (first.stats()["misses"], first.stats()["hits"], restarted.stats()["hits"]) == (1, 1, 1)
+
+
+def test_different_inputs_are_a_miss(generator):
+    g = generator(StubBackend(first_token=0.0, per_chunk=0.0))
+    g.request(INPUTS).wait(5)
+    other = g.request(note_inputs({"name": "John Roe", "age": 60}))
+    assert other.wait(5) and not other.cached
+    assert g.stats()["misses"] == 2
+
+
+def test_a_running_note_is_joined(generator):
+    backend = GatedBackend()
+    g = generator(backend)
+    job = g.request(INPUTS)
+    assert g.request(INPUTS) is job
+    backend.gate.set()
+    assert job.wait(5) and job.error is None
+    assert backend.calls == 1
+
+
+def test_a_failure_is_not_retried_until_due_or_asked(generator):
+    backend = FailingBackend()
+    g = generator(backend, retry_seconds=60)
+    job = g.request(INPUTS)
+    assert job.wait(5)
+    assert job.error == "RuntimeError: model unavailable" and job.text() == ""
+    # Reruns get the failed job back instead of calling the backend again
+    assert g.request(INPUTS) is job
+    assert backend.calls == 1
+    assert g.stats()["failures"] == 1 and g.stats()["failed"] == 1
+
+    retried = g.retry(INPUTS)
+    assert retried is not job and retried.wait(5)
+    assert backend.calls == 2
+
+
+def test_a_failure_is_retried_once_due(generator):
+    backend = FailingBackend()
+    g = generator(backend, retry_seconds=0)
+    g.request(INPUTS).wait(5)
+    g.request(INPUTS).wait(5)
+    assert backend.calls == 2
+    assert g.stats()["hits"] == 0
+
+
+def test_a_failed_cache_write_still_finishes_the_note(generator, monkeypatch):
+    def full_disk(path, data):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(notes, "atomic_write", full_disk)
+    g = generator(StubBackend(first_token=0.0, per_chunk=0.0))
+    job = g.request(INPUTS)
+    assert job.wait(5) and job.error is None and job.text()
+    assert g.stats()["running"] == 0
+    # Kept in memory, though not on disk
+    again = g.request(INPUTS)
+    assert again.cached and again.text() == job.text()
@@ -0,0 +1,96 @@
+# test_recordstore.py
+# RecordStore indexes: torn and truncated .idx files, partial lines, and reads across rotated segments.
+import json
+import os
+
+import pytest
+
+import config
+import logsegments
+from recordstore import RecordStore
+
+
+def _record(i, patient="Jane Doe"):
+    return {"timestamp": f"2026-03-{1 + i // 24:02d}T{i % 24:02d}:00:00", "patient": patient, "snr": -float(i)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecordStore(str(tmp_path))
+
+
+def _snrs(results):
+    return [record["snr"] for _, record in results]
+
+
+def test_a_truncated_index_is_rebuilt_from_the_data(store, tmp_path):
+    store.append_many("fitting", [_record(i) for i in range(20)])
+    index = store.index_path("fitting")
+    with open(index, "rb") as f:
+        data = f.read()
+    # Cut the index mid-line, as a crash between two writes would
+    with open(index, "wb") as f:
+        f.write(data[:len(data) // 2 + 3])
+    fresh = RecordStore(str(tmp_path))
+    assert _snrs(fresh.history("Jane Doe")) == [-float(i) for i in range(20)]
+    # The missing entries were written back, so a third reader needs no rescan
+    tiled, end = RecordStore._read_index_file(index, os.path.getsize(store.data_path("fitting")))
+    assert len(tiled) == 20 and end == os.path.getsize(store.data_path("fitting"))
+
+
+def test_a_torn_index_line_is_skipped(store, tmp_path):
+    store.append_many("fitting", [_record(i) for i in range(5)])
+    with open(store.index_path("fitting"), "a") as f:
+        f.write('[999, 12, "2026-')
+    assert _snrs(RecordStore(str(tmp_path)).history("Jane Doe")) == [-float(i) for i in range(5)]
+
+
+def test_a_partial_last_line_is_indexed_once_finished(store):
+    store.append_many("fitting", [_record(i) for i in range(3)])
+    line = (json.dumps(_record(3)) + "\n").encode("utf-8")
+    with open(store.data_path("fitting"), "ab") as f:
+        f.write(line[:15])   # another process is mid-write
+    assert _snrs(store.history("Jane Doe")) == [0.0, -1.0, -2.0]
+    with open(store.data_path("fitting"), "ab") as f:
+        f.write(line[15:])
+    assert store.latest("fitting", "Jane Doe")["snr"] == -3.0
+    assert len(store.history("Jane Doe")) == 4
+
+
+@pytest.fixture
+def rotated(store, monkeypatch):
+    """About ten 2 KB segments of two patients' records, written in batches of 7."""
+    monkeypatch.setattr(config, "LOG_SEGMENT_BYTES", 2048)
+    records = [_record(i, "Jane Doe" if i % 3 else "John Roe") for i in range(200)]
+    for i in range(0, len(records), 7):
+        store.append_many("fitting", records[i:i + 7])
+    return records
+
+
+def test_append_many_rotates_and_keeps_every_record(store, rotated, tmp_path):
+    path = store.data_path("fitting")
+    segments = logsegments.load_segments(path)
+    assert len(segments) >= 5
+    assert all(os.path.exists(logsegments.segment_index_path(path, s["segment"])) for s in segments)
+    assert os.path.getsize(path) < 2048
+    for reader in (store, RecordStore(str(tmp_path))):   # the writer's own index, and one loaded from disk
+        jane = [r for r in rotated if r["patient"] == "Jane Doe"]
+        assert [record for _, record in reader.history("Jane Doe")] == jane
+        assert reader.latest("fitting", "John Roe") == rotated[198]
+        assert reader.latest("fitting", "Jane Doe") == rotated[199]
+
+
+@pytest.mark.parametrize("first, last", [(0, 199), (30, 170), (100, 104), (190, 199)])
+def test_windows_across_closed_and_active_segments(store, rotated, tmp_path, first, last):
+    start, end = rotated[first]["timestamp"], rotated[last]["timestamp"]
+    expected = rotated[first:last + 1]
+    assert [record for _, record in store.window(start, end, kinds=["fitting"])] == expected
+    assert [record for _, record in RecordStore(str(tmp_path)).window(start, end, kinds=["fitting"])] == expected
+    assert list(logsegments.read_log(store.data_path("fitting"), start, end)) == expected
+
+
+def test_a_lost_segment_index_is_rebuilt(store, rotated, tmp_path):
+    path = store.data_path("fitting")
+    os.unlink(logsegments.segment_index_path(path, 1))
+    assert [record for _, record in RecordStore(str(tmp_path)).window(kinds=["fitting"])] == rotated
+    assert os.path.exists(logsegments.segment_index_path(path, 1))
@@ -0,0 +1,68 @@
+# test_stimuli.py
+# StimulusBank mixing and its (token, SNR, noise start) cache.
+import numpy as np
+import pytest
+
+from stimuli import StimulusBank, build_bank, synthetic_corpus
+
+
+@pytest.fixture
+def bank_path(tmp_path):
+    tokens, noise, fs = synthetic_corpus(noise_seconds=1.0)
+    path = str(tmp_path / "bank.f32")
+    build_bank(path, tokens, noise, fs)
+    return path
+
+
+def test_mix_adds_noise_scaled_to_the_snr(bank_path):
+    bank = StimulusBank(bank_path)
+    token = bank.token("ala")
+    noise = bank._view(bank.manifest["noise"], 100, token.size)
+    mixed = bank.mix("ala", -6.0, noise_start=100)
+    assert mixed.shape == token.shape
+    assert np.allclose(mixed, token + noise * bank.gains("ala", -6.0), atol=1e-5)
+    # 6 dB more SNR is half the noise amplitude
+    assert bank.gains("ala", 0.0) / bank.gains("ala", 6.0) == pytest.approx(10 ** (6 / 20))
+
+
+def test_mix_is_cached_by_token_snr_and_noise_start(bank_path):
+    bank = StimulusBank(bank_path)
+    first = bank.mix("ala", -6.0)
+    assert bank.mix("ala", -6.001) is first  # SNRs are keyed to 0.01 dB
+    assert bank.mix("ala", -6.0, noise_start=160) is not first
+    assert bank.mix("omo", -6.0) is not first
+    stats = bank.stats()
+    assert (stats["hits"], stats["misses"], stats["cached"]) == (1, 3, 3)
+
+
+def test_cached_mixes_are_read_only(bank_path):
+    mixed = StimulusBank(bank_path).mix("iki", 0.0)
+    with pytest.raises(ValueError):
+        mixed[0] = 1.0
+
+
+def test_cache_evicts_the_least_recently_used_mix(bank_path):
+    bank = StimulusBank(bank_path, cache_size=2)
+    a = bank.mix("ala", 0.0)
+    bank.mix("ala", 2.0)
+    assert bank.mix("ala", 0.0) is a  # now the most recent
+    bank.mix("ala", 4.0)              # evicts 2.0
+    assert bank.mix("ala", 0.0) is a
+    assert bank.stats()["cached"] == 2
+    misses = bank.misses
+    bank.mix("ala", 2.0)
+    assert bank.misses == misses + 1
+
+
+def test_mix_many_matches_mix(bank_path):
+    bank = StimulusBank(bank_path)
+    snrs = [-9.0, -3.0, 3.0]
+    many = bank.mix_many("omo", snrs, noise_start=50)
+    for row, snr in zip(many, snrs):
+        assert np.allclose(row, bank.mix("omo", snr, noise_start=50), atol=1e-6)
+
+
+def test_noise_must_cover_the_token(bank_path):
+    bank = StimulusBank(bank_path)
+    with pytest.raises(ValueError):
+        bank.mix("ala", 0.0, noise_start=bank.manifest["noise"]["length"] - 10)
@@ -0,0 +1,74 @@
+# test_summaryview.py
+# SummaryView folding the logs forward from its checkpoint, shared by several processes.
+import json
+
+import pytest
+
+import benefit
+from recordstore import RecordStore
+from summaryview import SummaryView
+
+
+def _fitting(patient, mode, snr, day):
+    return {"timestamp": f"2026-03-{day:02d}T10:00:00", "patient": patient, "mode": mode,
+            "environment": "Noise", "snr": snr}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecordStore(str(tmp_path))
+
+
+def test_records_saved_after_the_first_read_are_folded_in(store, tmp_path):
+    view = SummaryView(store, str(tmp_path / "summaries"))
+    assert view.load("Jane Doe") is None
+    store.append_many("fitting", [_fitting("Jane Doe", "Unaided", -4.0, 1), _fitting("Jane Doe", "Aided", -7.0, 1)])
+    conditions = view.load("Jane Doe")["fitting"]["conditions"]
+    assert conditions["unaided_noise"]["count"] == conditions["aided_noise"]["count"] == 1
+    store.append_many("fitting", [_fitting("Jane Doe", "Aided", -9.0, 2)])
+    assert view.load("Jane Doe")["fitting"]["conditions"]["aided_noise"]["mean"] == -8.0
+    assert view.update() == 0
+
+
+def test_every_record_is_folded_once_across_views(store, tmp_path):
+    # Two views on one directory stand in for two server processes
+    first, second = (SummaryView(store, str(tmp_path / "summaries")) for _ in range(2))
+    for day in range(1, 6):
+        store.append_many("fitting", [_fitting("Jane Doe", "Aided", -float(day), day)])
+        (first if day % 2 else second).update()
+    summary = second.load("Jane Doe")
+    assert summary == first.load("Jane Doe")
+    assert summary["fitting"]["conditions"]["aided_noise"]["count"] == 5
+    rebuilt = SummaryView(store, str(tmp_path / "rebuilt"))
+    assert rebuilt.rebuild() == 1
+    assert rebuilt.load("Jane Doe") == summary
+
+
+def test_an_update_cut_short_before_the_checkpoint_is_not_folded_twice(store, tmp_path):
+    view = SummaryView(store, str(tmp_path / "summaries"))
+    store.append_many("fitting", [_fitting("Jane Doe", "Aided", -7.0, 1)])
+    view.update()
+    with open(view.checkpoint) as f:
+        positions = f.read()
+    store.append_many("fitting", [_fitting("Jane Doe", "Aided", -9.0, 2)])
+    view.update()
+    # As if the process died after writing the documents but before the checkpoint
+    with open(view.checkpoint, "w") as f:
+        f.write(positions)
+    fresh = SummaryView(store, view.root)
+    assert fresh.update() == 0
+    assert fresh.load("Jane Doe")["fitting"]["conditions"]["aided_noise"]["count"] == 2
+    assert json.loads(open(fresh.checkpoint).read()) != json.loads(positions)
+
+
+@pytest.mark.parametrize("days", [2, 4])   # too few visits to pair, then enough
+def test_summary_benefit_is_the_fitting_tab_estimate(store, tmp_path, days):
+    records = []
+    for day in range(1, days + 1):
+        records += [_fitting("Jane Doe", "Unaided", -3.0 - day, day), _fitting("Jane Doe", "Unaided", -2.0, day),
+                    _fitting("Jane Doe", "Aided", -8.0 + day / 2, day)]
+    store.append_many("fitting", records)
+    summary = SummaryView(store, str(tmp_path / "summaries")).load("Jane Doe")
+    expected = benefit.patient_benefit(benefit.history_runs(records))["noise"]
+    assert expected["method"] == ("paired" if days >= benefit.MIN_PAIRS else "unpaired")
+    assert summary["fitting"]["benefit"]["noise"] == expected["benefit"]
@@ -0,0 +1,258 @@
+# trends.py
+# Rolling per-patient statistics over the Monitoring check-ins, updated as lines are appended.
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import logsegments
+from fileutil import atomic_write
+from recordstore import patient_key
+
+# Check-in answers tracked as 0-10 scores; True marks metrics where higher is worse
+METRICS = {
+    "sleep": False,
+    "hours_slept": False,
+    "physical_readiness": False,
+    "mental_readiness": False,
+    "listening_effort": True,
+    "communication_success": False,
+    "energy_current": False,
+    "hearing_fatigue": True,
+    "general_fatigue": True,
+    "hearing_success": False,
+}
+SLEEP_QUALITY = ["Very Poor", "Poor", "Fair", "Good", "Excellent"]
+HOURS_SLEPT = {"<4": 3.5, "4–6": 5.0, "6–8": 7.0, "8+": 8.5}
+
+WINDOWS = (7, 30)        # days covered by the rolling averages
+KEEP_DAYS = max(WINDOWS)
+DIP_ALPHA = 0.2          # weight of a new check-in in the moving baseline
+DIP_SD = 1.5             # how far past the baseline (in SDs) a check-in has to land
+DIP_MIN_CHECKINS = 5
+MAX_DIPS = 20
+CHECKPOINT_SECONDS = 30.0  # checkpoint at most this often (and at exit)
+
+
+def scores(record):
+    """The tracked metrics of one check-in record, as {metric: score}."""
+    values = {}
+    for metric in METRICS:
+        value = record.get(metric)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[metric] = float(value)
+    if record.get("sleep_quality") in SLEEP_QUALITY:
+        values["sleep"] = 2.5 * SLEEP_QUALITY.index(record["sleep_quality"])
+    if record.get("hours_slept") in HOURS_SLEPT:
+        values["hours_slept"] = HOURS_SLEPT[record["hours_slept"]]
+    return values
+
+
+def _new_patient():
+    return {
+        "checkins": 0,
+        "last": None,
+        "days": {},        # ISO date -> {metric: [sum, count]}, the last KEEP_DAYS days only
+        "baseline": {},    # metric -> [count, moving mean, moving variance]
+        "pair": [0, 0.0, 0.0, 0.0, 0.0, 0.0],  # sleep vs effort: n, mean x, mean y, M2 x, M2 y, C xy
+        "dips": [],
+    }
+
+
+class TrendEngine:
+    """
+    Tails ``daily_log.json`` and keeps bounded per-patient state: daily sums
+    for the last KEEP_DAYS days, a moving baseline per metric for dip
+    detection and running co-moments of sleep against listening effort.
+
+    update() only parses lines appended since the last call. The state and
+    the log position it covers (segment and offset, so rotation never loses
+    the place) are checkpointed together next to the log, at most every
+    CHECKPOINT_SECONDS (from a background thread) and at exit, so a restart
+    resumes where the previous process stopped and re-reads at most a few
+    seconds of lines.
+    """
+
+    def __init__(self, path="daily_log.json", checkpoint=None, checkpoint_seconds=CHECKPOINT_SECONDS):
+        self.path = path
+        self.checkpoint = checkpoint or path + ".trends"
+        self.checkpoint_seconds = checkpoint_seconds
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()   # one checkpoint write at a time
+        self.segment = 0
+        self.offset = 0
+        self.patients = {}
+        self._saved_offset = (0, 0)
+        self._saved_at = time.monotonic()
+        self._load()
+        atexit.register(self.save)
+
+    # --- Checkpoint ---
+    def _load(self):
+        try:
+            with open(self.checkpoint) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self.segment, self.offset = state.get("segment", 0), state.get("offset", 0)
+        self._saved_offset = (self.segment, self.offset)
+        self.patients = state.get("patients", {})
+
+    def save(self):
+        """Checkpoints the state if it covers lines the last checkpoint did not."""
+        with self._save_lock:
+            with self._lock:
+                position = (self.segment, self.offset)
+                if position == self._saved_offset:
+                    return
+                data = json.dumps({"segment": self.segment, "offset": self.offset, "patients": self.patients})
+                self._saved_at = time.monotonic()
+            # The fsyncs run outside the state lock, so update() never waits on the disk
+            atomic_write(self.checkpoint, data)
+            with self._lock:
+                self._saved_offset = position
+
+    # --- Ingest ---
+    def update(self):
+        """Folds in every complete line appended since the last update. Returns how many were read."""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            active = logsegments.active_segment(self.path)
+            if (self.segment, self.offset) > (active, size):  # the log was replaced; start over
+                self.segment, self.offset, self._saved_offset, self.patients = 0, 0, None, {}
+            if (self.segment, self.offset) == (active, size):
+                return 0
+            count = 0
+            # Lines are read on from the saved position, through any segments closed since
+            for segment, offset, raw in logsegments.iter_lines(self.path, self.segment, self.offset):
+                self.segment, self.offset = segment, offset
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    self.add(record)
+                    count += 1
+            due = time.monotonic() - self._saved_at >= self.checkpoint_seconds
+            if due:
+                self._saved_at = time.monotonic()
+        if due:
+            # Off the caller's thread: update() runs on Streamlit reruns
+            threading.Thread(target=self.save, name="uliplus-trends-checkpoint", daemon=True).start()
+        return count
+
+    def add(self, record):
+        """Folds one check-in record into its patient's state."""
+        key = patient_key(record)
+        timestamp = record.get("timestamp") or ""
+        if not key or len(timestamp) < 10:
+            return
+        state = self.patients.get(key)
+        if state is None:
+            state = self.patients[key] = _new_patient()
+        state["checkins"] += 1
+        state["last"] = max(state["last"] or "", timestamp)
+        day = timestamp[:10]
+        values = scores(record)
+
+        buckets = state["days"].get(day)
+        if buckets is None:
+            buckets = state["days"][day] = {}
+            # A new day: drop the ones that fell out of the longest window
+            cutoff = (date.fromisoformat(max(state["days"])) - timedelta(days=KEEP_DAYS)).isoformat()
+            for old in [d for d in state["days"] if d <= cutoff]:
+                del state["days"][old]
+        for metric, value in values.items():
+            total = buckets.setdefault(metric, [0.0, 0])
+            total[0] += value
+            total[1] += 1
+            self._check_dip(state, timestamp, metric, value)
+
+        # Pair each effort report with that day's sleep, whichever check-in came first
+        if "listening_effort" in values and "sleep" in buckets:
+            total, count = buckets["sleep"]
+            self._add_pair(state, total / count, values["listening_effort"])
+        elif "sleep" in values and "listening_effort" in buckets:
+            total, count = buckets["listening_effort"]
+            self._add_pair(state, values["sleep"], total / count)
+
+    @staticmethod
+    def _check_dip(state, timestamp, metric, value):
+        baseline = state["baseline"].setdefault(metric, [0, 0.0, 0.0])
+        n, mean, var = baseline
+        if n >= DIP_MIN_CHECKINS:
+            worse = value - mean if METRICS[metric] else mean - value
+            if worse > DIP_SD * max(math.sqrt(var), 1.0):
+                state["dips"].append({"timestamp": timestamp, "metric": metric, "value": value,
+                                      "baseline": round(mean, 2)})
+                del state["dips"][:-MAX_DIPS]
+        if n == 0:
+            baseline[:] = [1, value, 0.0]
+        else:
+            delta = value - mean
+            mean += DIP_ALPHA * delta
+            var = (1 - DIP_ALPHA) * (var + DIP_ALPHA * delta * delta)
+            baseline[:] = [n + 1, mean, var]
+
+    @staticmethod
+    def _add_pair(state, x, y):
+        n, mx, my, m2x, m2y, cxy = state["pair"]
+        n += 1
+        dx = x - mx
+        mx += dx / n
+        my_new = my + (y - my) / n
+        m2x += dx * (x - mx)
+        m2y += (y - my) * (y - my_new)
+        cxy += dx * (y - my_new)
+        state["pair"] = [n, mx, my_new, m2x, m2y, cxy]
+
+    # --- Queries ---
+    def trends(self, patient, as_of=None):
+        """
+        Rolling averages, sleep/effort correlation, recent dips and the daily
+        means of the last KEEP_DAYS days for one patient (None if no check-ins).
+        """
+        key = patient_key({"patient": patient})
+        with self._lock:
+            state = self.patients.get(key)
+            if state is None:
+                return None
+            state = json.loads(json.dumps(state))  # a copy, so callers never see updates mid-read
+        days = state["days"]
+        as_of = as_of or (max(days) if days else date.today().isoformat())
+        averages = {}
+        for window in WINDOWS:
+            start = (date.fromisoformat(as_of) - timedelta(days=window - 1)).isoformat()
+            sums = {}
+            for day, buckets in days.items():
+                if start <= day <= as_of:
+                    for metric, (total, count) in buckets.items():
+                        s = sums.setdefault(metric, [0.0, 0])
+                        s[0] += total
+                        s[1] += count
+            for metric, (total, count) in sums.items():
+                averages.setdefault(metric, {})[f"{window}d"] = round(total / count, 2)
+
+        n, _, _, m2x, m2y, cxy = state["pair"]
+        correlation = None
+        if n >= 3 and m2x > 0 and m2y > 0:
+            correlation = round(cxy / math.sqrt(m2x * m2y), 3)
+        daily = {}
+        for day in sorted(days):
+            for metric, (total, count) in days[day].items():
+                daily.setdefault(metric, {})[day] = round(total / count, 2)
+        return {
+            "checkins": state["checkins"],
+            "last": state["last"],
+            "averages": averages,
+            "sleep_effort_r": correlation,
+            "sleep_effort_pairs": n,
+            "dips": state["dips"],
+            "daily": daily,
+        }
@@ -0,0 +1,457 @@
+# workload.py
+# Seeded synthetic corpora in the exact record shapes the tabs save, for benchmarking the
+# storage and analytics paths (see benchmarks/workload_bench.py).
+#
+# Every patient of the cohort has fixed traits (age, language, audiogram, a quiet and
+# a noise threshold, aided benefit, a fatigue tendency), and every record is drawn
+# around them, so the learned norms, trends and summaries have real structure to find.
+# Records come in time slices of about CHUNK records, each kind's timestamps rising
+# through the slices; a slice is drawn from its own generator seeded with
+# (seed, kind, slice), so a corpus is the same however it is consumed.
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+import scoring
+from audiogram import EARS, FREQ_LABELS
+from confusion import ERROR_LABELS, FEATURES, TOKENS
+from normative import DEFAULT_GROUP, NormativeEngine
+from profilestore import ProfileStore
+from recordstore import RecordStore
+
+# name -> (records, patients, days)
+PRESETS = {
+    "small": (20_000, 200, 90),
+    "medium": (500_000, 2_000, 365),
+    "large": (5_000_000, 20_000, 730),
+}
+
+# Share of the records of each kind; Fitting records come four to a session, one per condition
+MIX = {"profile": 0.02, "diagnosis": 0.2, "fitting": 0.28, "monitoring": 0.48, "summary": 0.02}
+KINDS = list(MIX)
+
+START = datetime(2025, 1, 1)
+CLINIC_HOURS = (7, 22)   # records are saved between these hours of each day
+CHUNK = 50_000
+
+LANGUAGES = ["English", "Spanish", "Mandarin", "Arabic", "Hindi", "French"]
+LANGUAGE_WEIGHTS = [0.45, 0.2, 0.1, 0.1, 0.1, 0.05]
+DIAGNOSIS_TRIALS = scoring.DIAGNOSIS_TRIALS
+
+# Answer options of the Profile, Diagnosis, Fitting and Monitoring forms
+FIVE_POINT = ["Never", "Rarely", "Sometimes", "Often", "Always"]
+SLEEP_QUALITY = ["Very Poor", "Poor", "Fair", "Good", "Excellent"]
+HOURS_SLEPT = ["<4", "4–6", "6–8", "8+"]
+SITUATIONS = ["One-on-one", "Group", "Online Meeting", "Phone", "Public Transport", "Restaurant", "Other"]
+STRESS_TRIGGERS = ["Social interactions", "Workload pressure", "Noise", "Unpredictability", "Deadlines",
+                   "Group settings", "Other"]
+NOTES = ["", "", "", "", "Noisy room.", "Felt tired.", "Struggled with the last few items.",
+         "Good session.", "Meeting at work went well.", "Restaurant was hard to follow."]
+
+
+def preset(name):
+    """(records, patients, days) of a named corpus size."""
+    if name not in PRESETS:
+        raise ValueError(f"Unknown workload preset: {name!r} (choose from {', '.join(PRESETS)})")
+    return PRESETS[name]
+
+
+def counts(records):
+    """Records of each kind in a corpus of about ``records`` (Fitting rounded to whole sessions)."""
+    split = {kind: int(round(records * share)) for kind, share in MIX.items()}
+    split["fitting"] -= split["fitting"] % len(scoring.CONDITIONS)
+    return split
+
+
+def cohort(patients, seed=0):
+    """The fixed traits of every patient, as NumPy columns (plus their names)."""
+    rng = np.random.default_rng([seed, 0])
+    age = rng.integers(18, 91, patients)
+    # Presbycusis: air-conduction loss grows with age, most at the high frequencies
+    slope = np.array([0.1, 0.15, 0.2, 0.35, 0.6, 0.8])
+    loss = np.maximum(age[:, None] - 30, 0) * slope + rng.normal(0, 8, (patients, 1)) + rng.normal(0, 4, (patients, 6))
+    air = np.stack([loss, loss + rng.normal(0, 3, (patients, 6))], axis=1)          # (patients, ear, frequency)
+    air[rng.random(patients) < 0.08, rng.integers(2)] += 20                         # some asymmetric losses
+    gap = np.where(rng.random((patients, 2, 1)) < 0.1, rng.uniform(15, 30, (patients, 2, 1)), 0.0)
+    air = np.clip(np.round(air / 5) * 5, -10, 120)
+    bone = np.clip(np.round((air - gap) / 5) * 5, -10, 70)
+    pta = air[:, :, 1:5].mean(axis=(1, 2))
+    language = rng.choice(len(LANGUAGES), patients, p=LANGUAGE_WEIGHTS)
+    width = len(str(patients - 1))
+    return {
+        "name": [f"Synthetic Patient {p:0{width}d}" for p in range(patients)],
+        "age": age,
+        "gender": rng.choice(3, patients, p=[0.49, 0.49, 0.02]),
+        "language": language,
+        "air": air.astype(int),
+        "bone": bone.astype(int),
+        "tested": rng.random(patients) < 0.7,       # had an earlier hearing test, so has an audiogram
+        "tinnitus": rng.choice(3, patients, p=[0.3, 0.5, 0.2]),
+        "aided": rng.random(patients) < 0.4,
+        "snr": -9.0 + 0.04 * age + 0.3 * (language > 0) + 0.04 * pta + rng.normal(0, 1.2, patients),
+        "quiet": -3.0 + 0.05 * pta + rng.normal(0, 1.0, patients),
+        "benefit": rng.normal(3.0, 1.5, patients),
+        "fatigue": rng.normal(0, 1, patients),
+        "activity": rng.lognormal(0, 1, patients),   # how often a patient shows up
+    }
+
+
+def _timestamps(rng, lo, hi, total, days):
+    """
+    ISO timestamps of records lo..hi of ``total``, spread evenly over the clinic
+    hours of ``days`` days and rising with the index; also their hours of the day.
+    """
+    x = (np.arange(lo, hi) + rng.random(hi - lo)) / total * days
+    day = np.floor(x)
+    hours = CLINIC_HOURS[0] + (CLINIC_HOURS[1] - CLINIC_HOURS[0]) * (x - day)
+    when = (np.datetime64(START, "us") + (day * 86_400e6).astype("timedelta64[us]")
+            + (hours * 3_600e6).astype("timedelta64[us]"))
+    return np.datetime_as_string(when, unit="us").tolist(), hours
+
+
+def _who(rng, people, size):
+    weights = people["activity"] / people["activity"].sum()
+    return rng.choice(len(weights), size, p=weights)
+
+
+def _pick(rng, options, size, p=None):
+    """``size`` answers drawn from a list of options."""
+    return np.array(options, dtype=object)[rng.choice(len(options), size, p=p)].tolist()
+
+
+def _subset(rng, options, size, share):
+    """``size`` multiselect answers, each option ticked with probability ``share``."""
+    ticked = rng.random((size, len(options))) < share
+    return [[option for option, tick in zip(options, row) if tick] for row in ticked.tolist()]
+
+
+def _scale(values):
+    """Rounds and clips to a 0-10 slider answer."""
+    return np.clip(np.round(values), 0, 10).astype(int).tolist()
+
+
+# --- Record builders: (rng, people, lo, hi, total, days) -> records lo..hi of a kind ---
+def _profiles(rng, people, lo, hi, total, days):
+    n = hi - lo
+    timestamps, _ = _timestamps(rng, lo, hi, total, days)
+    index = np.arange(lo, hi)
+    patients = len(people["name"])
+    # Every patient's first profile comes before any re-save, which may shift a threshold by 5 dB
+    who = np.where(index < patients, index % patients, _who(rng, people, n))
+    air = people["air"][who] + rng.integers(0, 2, (n, 2, 6)) * 5 * (index >= patients)[:, None, None]
+    bone = np.minimum(people["bone"][who], air)
+    answers = {
+        "hearing_changes": _pick(rng, ["Yes", "No"], n, p=[0.05, 0.95]),
+        "ear_conditions": _pick(rng, NOTES, n),
+        "family_history": _pick(rng, ["Yes", "No", "Not sure"], n),
+        "balance_issues": _pick(rng, ["Yes", "No", "Sometimes"], n, p=[0.1, 0.8, 0.1]),
+        "worse_ear": _pick(rng, ["Left", "Right", "Both", "Not sure"], n),
+        "background_noise": _pick(rng, ["Never", "Sometimes", "Often", "Always"], n),
+        "phone_difficulty": _pick(rng, ["Yes", "No"], n, p=[0.4, 0.6]),
+        "volume_increase": _pick(rng, ["Yes", "No"], n),
+        "mumbling_complaints": _pick(rng, ["Yes", "No"], n),
+        "hearing_duration": _pick(rng, ["", "A few months", "1-2 years", "Over 5 years"], n),
+        "daily_impact": _pick(rng, NOTES, n),
+        "sleep_quality": _pick(rng, SLEEP_QUALITY, n),
+        "sleep_hours": _pick(rng, HOURS_SLEPT, n, p=[0.05, 0.25, 0.55, 0.15]),
+        "wakes_rested": _pick(rng, ["Yes", "No", "Sometimes"], n),
+        "fatigue_level": _scale(5 + 2 * people["fatigue"][who] + rng.normal(0, 1, n)),
+        "energy_dip": _pick(rng, ["Morning", "Afternoon", "Evening", "It varies"], n),
+        "fatigue_impact": _pick(rng, FIVE_POINT, n),
+        "stress_triggers": _subset(rng, STRESS_TRIGGERS, n, 0.15),
+        "social_fatigue": _pick(rng, FIVE_POINT, n),
+        "situation_avoidance": _pick(rng, ["Yes", "No", "Sometimes"], n),
+    }
+    air, bone = air.tolist(), bone.tolist()
+    records = []
+    for k, p in enumerate(who.tolist()):
+        a = {key: values[k] for key, values in answers.items()}
+        tested = people["tested"][p]
+        records.append({
+            "timestamp": timestamps[k],
+            "name": people["name"][p],
+            "age": int(people["age"][p]),
+            "gender": ["Male", "Female", "Other"][people["gender"][p]],
+            "primary_language": LANGUAGES[people["language"][p]],
+            "past_hearing_test": "Yes" if tested else "No",
+            "air_condition": {ear: dict(zip(FREQ_LABELS, air[k][e])) for e, ear in enumerate(EARS)} if tested else {},
+            "bone_condition": {ear: dict(zip(FREQ_LABELS, bone[k][e])) for e, ear in enumerate(EARS)} if tested else {},
+            "hearing_changes": a["hearing_changes"],
+            "ear_conditions": a["ear_conditions"],
+            "family_history": a["family_history"],
+            "tinnitus": ["Yes", "No", "Sometimes"][people["tinnitus"][p]],
+            "balance_issues": a["balance_issues"],
+            "medications": "",
+            "worse_ear": a["worse_ear"],
+            "background_noise": a["background_noise"],
+            "phone_difficulty": a["phone_difficulty"],
+            "volume_increase": a["volume_increase"],
+            "mumbling_complaints": a["mumbling_complaints"],
+            "hearing_duration": a["hearing_duration"],
+            "hearing_aid_use": "Yes" if people["aided"][p] else "No",
+            "hearing_aid_experience": "",
+            "daily_impact": a["daily_impact"],
+            "patient_goals": "",
+            "sleep_quality": a["sleep_quality"],
+            "sleep_hours": a["sleep_hours"],
+            "wakes_rested": a["wakes_rested"],
+            "fatigue_level": a["fatigue_level"],
+            "energy_dip": a["energy_dip"],
+            "fatigue_impact": a["fatigue_impact"],
+            "stress_triggers": a["stress_triggers"],
+            "social_fatigue": a["social_fatigue"],
+            "situation_avoidance": a["situation_avoidance"],
+        })
+    return records
+
+
+def _fits(rng, snr, trials):
+    """Psychometric-fit dicts (as psychofit.fit_session reports them) around the given SNR-50s."""
+    half = rng.uniform(0.8, 2.0, len(snr))
+    slope = np.exp(rng.normal(np.log(0.8), 0.3, len(snr)))
+    return [{"snr50": round(float(s), 2), "slope": round(float(b), 3),
+             "snr50_ci": [round(float(s - h), 2), round(float(s + h), 2)],
+             "slope_ci": [round(float(b * 0.5), 3), round(float(b * 2.0), 3)], "trials": trials}
+            for s, b, h in zip(snr, slope, half)]
+
+
+def _diagnoses(rng, people, lo, hi, total, days):
+    n = hi - lo
+    timestamps, hours = _timestamps(rng, lo, hi, total, days)
+    who = _who(rng, people, n)
+    snr = np.round(people["snr"][who] + rng.normal(0, 0.8, n), 2)
+    norm = _norm()
+    percentile = np.round(norm.percentile(snr), 1)
+    z_score = np.round(norm.z_score(snr), 2)
+    # A 2-down/1-up track around each listener's threshold, scored against a logistic
+    steps = np.cumsum(rng.choice([-2.0, 2.0], (n, DIAGNOSIS_TRIALS)), axis=1) / 3
+    trial_snr = np.round(norm.mean + 4 * np.exp(-np.arange(DIAGNOSIS_TRIALS) / 8) + steps, 2)
+    correct = rng.random((n, DIAGNOSIS_TRIALS)) < 1 / (1 + np.exp(-0.8 * (trial_snr - snr[:, None])))
+    targets = rng.integers(len(TOKENS), size=(n, DIAGNOSIS_TRIALS))
+    responses = np.where(correct, targets, (targets + rng.integers(1, len(TOKENS), (n, DIAGNOSIS_TRIALS))) % len(TOKENS))
+    errors = np.clip(np.round((1 - correct.mean(axis=1))[:, None] * 100 + rng.normal(0, 10, (n, len(ERROR_LABELS)))), 0, 100)
+    features = np.clip(np.round(errors[:, :len(FEATURES)] * 0.8 + rng.normal(0, 5, (n, len(FEATURES))), 1), 0, 100)
+    fits = _fits(rng, snr, DIAGNOSIS_TRIALS)
+    difficulty = _scale(5 + (snr - norm.mean) + rng.normal(0, 1.5, n))
+    noise_level = _pick(rng, ["Not at all", "A little", "Moderately", "Very much"], n)
+    emotional_state = _pick(rng, ["Calm", "Focused", "Frustrated", "Anxious", "Confident"], n)
+    notes = _pick(rng, NOTES, n)
+    trials = np.empty((n, DIAGNOSIS_TRIALS, 3), dtype=object)   # [target, response, snr] per trial
+    trials[..., 0], trials[..., 1] = np.array(TOKENS, dtype=object)[[targets, responses]]
+    trials[..., 2] = trial_snr
+    trials = trials.tolist()
+    errors, features = errors.astype(int).tolist(), features.tolist()
+    records = []
+    for k, p in enumerate(who.tolist()):
+        records.append({
+            "timestamp": timestamps[k],
+            "patient": people["name"][p],
+            "snr": float(snr[k]),
+            "error_proportion": errors[k],
+            "percentile": float(percentile[k]),
+            "z_score": float(z_score[k]),
+            "feature_errors": dict(zip(FEATURES, features[k])),
+            "fit": fits[k],
+            "trials": trials[k],
+            "subjective": {
+                "perceived_difficulty": difficulty[k],
+                "noise_level": noise_level[k],
+                "emotional_state": emotional_state[k],
+                "time_of_day": "Morning" if hours[k] < 12 else "Afternoon" if hours[k] < 17 else "Evening",
+                "notes": notes[k],
+            },
+        })
+    return records
+
+
+def _fittings(rng, people, lo, hi, total, days):
+    """Fitting records lo..hi; every four consecutive records are one session covering each condition."""
+    per = len(scoring.CONDITIONS)
+    n = hi - lo
+    timestamps, _ = _timestamps(rng, lo, hi, total, days)
+    who = np.repeat(_who(rng, people, n // per), per)
+    aided = np.tile([m == "Aided" for m in scoring.MODES for _ in scoring.ENVIRONMENTS], n // per)
+    noise = np.tile([e == "Noise" for _ in scoring.MODES for e in scoring.ENVIRONMENTS], n // per)
+    base = np.where(noise, people["snr"][who], people["quiet"][who])
+    snr = np.round(base - aided * people["benefit"][who] * np.where(noise, 0.7, 1.0) + rng.normal(0, 0.8, n), 2)
+    fits = _fits(rng, snr, DIAGNOSIS_TRIALS)
+    benefit = _scale(5 + 2 * aided + rng.normal(0, 1.5, n))
+    effort = _scale(4 + 2 * noise - aided + rng.normal(0, 1.5, n))
+    clarity = _pick(rng, ["Yes", "No", "Unsure"], n)
+    notes = _pick(rng, NOTES, n)
+    records = []
+    for k, p in enumerate(who.tolist()):
+        records.append({
+            "timestamp": timestamps[k],
+            "patient": people["name"][p],
+            "mode": "Aided" if aided[k] else "Unaided",
+            "environment": "Noise" if noise[k] else "Quiet",
+            "snr": float(snr[k]),
+            "fit": fits[k],
+            "subjective": {
+                "benefit": benefit[k],
+                "clarity": clarity[k],
+                "effort": effort[k],
+                "notes": notes[k],
+            },
+        })
+    return records
+
+
+def _checkins(rng, people, lo, hi, total, days):
+    n = hi - lo
+    timestamps, hours = _timestamps(rng, lo, hi, total, days)
+    who = _who(rng, people, n)
+    fatigue = people["fatigue"][who] + rng.normal(0, 1, n)   # a bad day shows in sleep, effort and fatigue
+    score = [_scale(5 + sign * 1.5 * fatigue + rng.normal(0, 1.2, n)) for sign in (-1, 1, 1, -1)]
+    sleep = np.clip(np.round(2 - 0.8 * fatigue + rng.normal(0, 0.6, n)), 0, 4).astype(int).tolist()
+    mood = _pick(rng, ["Stressed", "Anxious", "Neutral", "Optimistic", "Excited"], n)
+    feeling = _pick(rng, ["Drained", "Okay", "Content", "Happy"], n)
+    dip = _pick(rng, ["Morning", "Afternoon", "Evening", "All day"], n)
+    situations = _subset(rng, SITUATIONS, n, 0.2)
+    interest, distractions = rng.integers(0, 11, (2, n)).tolist()
+    notes = _pick(rng, NOTES, n)
+    records = []
+    for k, p in enumerate(who.tolist()):
+        good, effort, tired, energy = score[0][k], score[1][k], score[2][k], score[3][k]
+        if hours[k] < 11:
+            checkin_type = "Morning"
+            answers = {
+                "sleep_quality": SLEEP_QUALITY[sleep[k]],
+                "hours_slept": HOURS_SLEPT[min(sleep[k], 3)],
+                "wake_feeling": ["Exhausted", "Tired", "Okay", "Refreshed"][min(sleep[k], 3)],
+                "physical_readiness": good,
+                "mental_readiness": energy,
+                "mood_morning": mood[k],
+                "planned_goals": notes[k],
+                "anticipated_challenges": "",
+            }
+        elif hours[k] < 17:
+            checkin_type = "Day"
+            answers = {
+                "listening_effort": effort,
+                "communication_success": good,
+                "situations": situations[k],
+                "interest_level": interest[k],
+                "distractions": distractions[k],
+                "energy_current": energy,
+                "challenges_faced": notes[k],
+            }
+        else:
+            checkin_type = "Evening"
+            answers = {
+                "hearing_fatigue": tired,
+                "general_fatigue": tired,
+                "emotional_state": feeling[k],
+                "energy_dip_time": dip[k],
+                "goals_accomplished": notes[k],
+                "hearing_success": good,
+                "suggestions_to_self": "",
+            }
+        record = {"timestamp": timestamps[k], "patient": people["name"][p], "checkin_type": checkin_type}
+        record.update(answers)
+        records.append(record)
+    return records
+
+
+def _summaries(rng, people, lo, hi, total, days):
+    n = hi - lo
+    timestamps, _ = _timestamps(rng, lo, hi, total, days)
+    who = _who(rng, people, n)
+    snr = np.round(people["snr"][who] + rng.normal(0, 0.8, n), 2)
+    ran = rng.random(n) < 0.8   # a Diagnosis was run before the summary was saved
+    records = []
+    for k, p in enumerate(who.tolist()):
+        records.append({
+            "timestamp": timestamps[k],
+            "name": people["name"][p],
+            "age": int(people["age"][p]),
+            "primary_language": LANGUAGES[people["language"][p]],
+            "tinnitus": ["Yes", "No", "Sometimes"][people["tinnitus"][p]],
+            "hearing_aid_use": "Yes" if people["aided"][p] else "No",
+            "diagnosis_snr": float(snr[k]) if ran[k] else "N/A",
+            "diagnosis_time": timestamps[k] if ran[k] else "N/A",
+            "manual_notes": "",
+        })
+    return records
+
+
+_BUILDERS = {"profile": _profiles, "diagnosis": _diagnoses, "fitting": _fittings,
+             "monitoring": _checkins, "summary": _summaries}
+_norms = []
+
+
+def _norm():
+    """The default normative curve the Diagnosis records are scored against (built once)."""
+    if not _norms:
+        _norms.append(NormativeEngine().curve(DEFAULT_GROUP))
+    return _norms[0]
+
+
+# --- Corpora ---
+def generate(records, patients, days=365, seed=0, chunk=CHUNK, kinds=None):
+    """
+    Yields (kind, records) batches of a corpus of about ``records`` records
+    from ``patients`` patients over ``days`` days. Batches come in time
+    slices of about ``chunk`` records, every kind in each slice, so they
+    can be appended as they come like a live clinic's saves. With ``kinds``,
+    only those kinds are built; they are the same records as in the full corpus.
+    """
+    if patients < 1:
+        raise ValueError("A workload needs at least one patient.")
+    split = counts(records)
+    split["profile"] = max(split["profile"], patients)   # everyone has a profile
+    slices = max(1, -(-sum(split.values()) // chunk))
+    people = cohort(patients, seed)
+    per = len(scoring.CONDITIONS)
+    for s in range(slices):
+        for k, kind in enumerate(KINDS):
+            total = split[kind]
+            lo, hi = total * s // slices, total * (s + 1) // slices
+            if kind == "fitting":   # whole sessions only
+                lo, hi = lo - lo % per, hi - hi % per if s < slices - 1 else total
+            if hi > lo and (kinds is None or kind in kinds):
+                yield kind, _BUILDERS[kind](np.random.default_rng([seed, k + 1, s]), people, lo, hi, total, days)
+
+
+def write_corpus(root, records, patients, days=365, seed=0, chunk=CHUNK):
+    """
+    Writes a generated corpus under ``root`` as the app would: every record
+    appended to its log through a RecordStore, and each patient's latest
+    profile saved to the ProfileStore. Returns the records written per kind.
+    """
+    os.makedirs(root, exist_ok=True)
+    store = RecordStore(root)
+    written = dict.fromkeys(KINDS, 0)
+    latest = {}
+    for kind, batch in generate(records, patients, days, seed, chunk):
+        store.append_many(kind, batch)
+        written[kind] += len(batch)
+        if kind == "profile":
+            latest.update((profile["name"], profile) for profile in batch)
+    profiles = ProfileStore(os.path.join(root, "profiles"))
+    for profile in latest.values():
+        profiles.save(profile)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic ULIPlus corpus")
+    parser.add_argument("root", help="Data directory (the logs go straight into it, profiles/ below it)")
+    parser.add_argument("--preset", default="small", choices=list(PRESETS))
+    parser.add_argument("--records", type=int, help="Overrides the preset's record count")
+    parser.add_argument("--patients", type=int, help="Overrides the preset's patient count")
+    parser.add_argument("--days", type=int, help="Overrides the preset's time span")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    records, patients, days = preset(args.preset)
+    start = time.perf_counter()
+    written = write_corpus(args.root, args.records or records, args.patients or patients, args.days or days, args.seed)
+    print(f"{sum(written.values())} records ({json.dumps(written)}) written to {args.root} "
+          f"in {time.perf_counter() - start:.1f} s")